@@ -0,0 +1,170 @@
+"""
+Mode cascade : le modele rapide repond, le modele complet seulement si necessaire.
+
+Pour chaque ligne, le modele rapide (models/fast_model.joblib, voir
+src/models/cascade.py) donne un prix et une estimation de son ecart au
+modele complet. Le modele complet n'est evalue que :
+- pour les lignes dont l'erreur estimee depasse le seuil ;
+- pour tout le batch si le budget de latence de la requete couvre le
+  cout estime du chemin complet.
+
+Une petite fraction des lignes servies par le modele rapide est aussi
+evaluee par le modele complet (audit) pour mesurer en continu la perte
+de precision, sans changer la reponse.
+
+Configuration (variables d'environnement) :
+- CASCADE_ENABLED : active le mode cascade sur /predict et /predict-batch
+- CASCADE_MAX_ERROR : seuil d'erreur estimee en 100k$ (defaut : seuil
+  calibre a l'entrainement du modele rapide)
+- CASCADE_AUDIT_RATE : part des lignes rapides auditees (defaut 0.02)
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+
+from .dependencies import get_fast_model
+from .inference import predict_matrix
+from .metrics import Counter, Histogram
+from src.models.intervals import confidence_from_interval
+
+CASCADE_ENABLED = os.getenv("CASCADE_ENABLED", "false").lower() in ("1", "true", "yes")
+CASCADE_MAX_ERROR = float(os.environ["CASCADE_MAX_ERROR"]) if os.getenv("CASCADE_MAX_ERROR") else None
+CASCADE_AUDIT_RATE = float(os.getenv("CASCADE_AUDIT_RATE", "0.02"))
+
+CASCADE_ROWS = Counter(
+    "cascade_rows_total",
+    "Lignes servies en mode cascade, par modele (fast, full)",
+    labelnames=("model",)
+)
+CASCADE_ESCALATIONS = Counter(
+    "cascade_escalations_total",
+    "Lignes envoyees au modele complet, par raison (error, budget, unavailable)",
+    labelnames=("reason",)
+)
+CASCADE_AUDIT_ERROR = Histogram(
+    "cascade_audit_abs_error",
+    "Ecart |rapide - complet| des lignes auditees, en 100k$ (perte de precision)",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+
+
+class FullCostEstimate:
+    """
+    Cout du chemin complet : fixe + par_ligne x lignes.
+
+    Moindres carres ponderes avec oubli exponentiel sur les durees
+    mesurees, amorces par deux pseudo-observations (valeurs a priori).
+    """
+
+    def __init__(self, fixed: float = 0.005, per_row: float = 2e-5, decay: float = 0.98):
+        self.prior_per_row = per_row
+        self.decay = decay
+        self._lock = threading.Lock()
+        self._sums = np.zeros(5)  # poids, n, n^2, t, n*t
+        for n_rows in (1, 1000):
+            self._add(n_rows, fixed + per_row * n_rows)
+
+    def _add(self, n_rows, seconds):
+        self._sums += (1.0, n_rows, n_rows * n_rows, seconds, n_rows * seconds)
+
+    def observe(self, n_rows: int, seconds: float):
+        with self._lock:
+            self._sums *= self.decay
+            self._add(n_rows, seconds)
+
+    def estimate(self, n_rows: int) -> float:
+        with self._lock:
+            w, sx, sxx, sy, sxy = self._sums
+        denominator = w * sxx - sx * sx
+        # Observations toutes de la meme taille : pente a priori
+        slope = (w * sxy - sx * sy) / denominator if denominator > 1e-9 * w * sxx else self.prior_per_row
+        slope = max(slope, 0.0)
+        fixed = max((sy - slope * sx) / w, 0.0)
+        return fixed + slope * n_rows
+
+
+# Un estimateur par processus (celui qui execute le modele complet)
+_full_cost = FullCostEstimate()
+
+
+def _predict_full(X) -> dict:
+    start = time.perf_counter()
+    result = predict_matrix(X)
+    _full_cost.observe(len(X), time.perf_counter() - start)
+    return result
+
+
+def predict_matrix_cascade(X, budget_seconds=None):
+    """
+    Travail soumis a l'executor d'inference en mode cascade.
+
+    Args:
+        X: Matrice (n, 8) validee, dans l'ordre FEATURE_NAMES
+        budget_seconds: Budget de calcul de la requete (None : aucun)
+
+    Returns:
+        tuple: (resultat au format de predict_frame(), compteurs pour
+            record_cascade())
+    """
+    n_rows = len(X)
+    fast = get_fast_model()
+    info = {"fast": 0, "full": n_rows, "error": 0, "budget": 0, "unavailable": 0, "audit_errors": np.empty(0)}
+    if fast is None:
+        info["unavailable"] = n_rows
+        return predict_matrix(X), info
+    if budget_seconds is not None and _full_cost.estimate(n_rows) <= budget_seconds:
+        info["budget"] = n_rows
+        return _predict_full(X), info
+
+    fast_price, estimated_error, lower, upper = fast.predict(X)
+    threshold = CASCADE_MAX_ERROR if CASCADE_MAX_ERROR is not None else fast.threshold
+    escalate = estimated_error > threshold
+    audit = ~escalate & (np.random.random(n_rows) < CASCADE_AUDIT_RATE)
+    price = fast_price.copy()
+
+    rows = np.flatnonzero(escalate | audit)
+    if len(rows):
+        full = _predict_full(X[rows])
+        served = escalate[rows]
+        escalated = rows[served]
+        price[escalated] = full["predicted_price"][served]
+        if full["lower_bound"] is not None:
+            lower[escalated] = full["lower_bound"][served]
+            upper[escalated] = full["upper_bound"][served]
+        else:
+            # Pas d'intervalle pour le modele complet : bornes conformes recentrees
+            lower[escalated] = price[escalated] + fast.residual_bounds_[0]
+            upper[escalated] = price[escalated] + fast.residual_bounds_[1]
+        info["audit_errors"] = np.abs(fast_price[rows[~served]] - full["predicted_price"][~served])
+
+    info["error"] = int(escalate.sum())
+    info["full"] = info["error"]
+    info["fast"] = n_rows - info["error"]
+    lower = np.minimum(lower, price)
+    upper = np.maximum(upper, price)
+    return {
+        "predicted_price": price,
+        "lower_bound": lower,
+        "upper_bound": upper,
+        "confidence": confidence_from_interval(price, lower, upper)
+    }, info
+
+
+def record_cascade(info: dict):
+    """Metriques d'une requete (appele dans le processus de l'API, y compris en mode process)."""
+    CASCADE_ROWS.inc("fast", amount=info["fast"])
+    CASCADE_ROWS.inc("full", amount=info["full"])
+    for reason in ("error", "budget", "unavailable"):
+        if info[reason]:
+            CASCADE_ESCALATIONS.inc(reason, amount=info[reason])
+    for value in info["audit_errors"]:
+        CASCADE_AUDIT_ERROR.observe(value)
+
+
+def escalation_ratio(info: dict) -> float:
+    """Part des lignes servies par le modele complet."""
+    total = info["fast"] + info["full"]
+    return info["full"] / total if total else 0.0
@@ -2,18 +2,128 @@
 Dependencies pour l'API.
 """
 
-import joblib
+import json
 import os
+import threading
+import time
 from typing import Tuple
 from pathlib import Path
 
+from .metrics import (
+    MODEL_LOAD_SECONDS, DRIFT_PSI, DRIFT_KS, REGION_MODEL_LOADS, REGION_MODEL_EVICTIONS
+)
+from src.models.artifacts import latest_model_path, artifact_version
+from src.models.grid import DEFAULT_STEP, ensure_price_grid
+from src.models.regional import INDEX_FILENAME, RegionalModelPool
+from src.data.drift import DriftMonitor
+
 # Chemins vers les modèles
 BASE_DIR = Path(__file__).resolve().parent.parent
-MODEL_DIR = BASE_DIR / "models"
+MODEL_DIR = Path(os.getenv("MODEL_DIR", BASE_DIR / "models"))
+METADATA_PATH = MODEL_DIR / "model_metadata.json"
+
+# Grille de prix precalculee (src/models/grid.py)
+PRICE_GRID_DIR = Path(os.getenv("PRICE_GRID_DIR", MODEL_DIR / "price_grid"))
+PRICE_GRID_STEP = float(os.getenv("PRICE_GRID_STEP", str(DEFAULT_STEP)))
+PRICE_GRID_PROFILES = os.getenv("PRICE_GRID_PROFILES")
+
+# Suivi de derive des entrees (src/data/drift.py)
+DRIFT_ENABLED = os.getenv("DRIFT_ENABLED", "true").lower() in ("1", "true", "yes")
+DRIFT_WINDOW_SECONDS = float(os.getenv("DRIFT_WINDOW_SECONDS", "3600"))
+
+# Modeles par region (src/models/regional.py), charges a la demande
+REGION_MODELS_ENABLED = os.getenv("REGION_MODELS_ENABLED", "false").lower() in ("1", "true", "yes")
+REGION_MODEL_DIR = Path(os.getenv("REGION_MODEL_DIR", MODEL_DIR / "regions"))
+REGION_POOL_MAX_MODELS = int(os.getenv("REGION_POOL_MAX_MODELS", "16"))
+REGION_POOL_MAX_MB = float(os.getenv("REGION_POOL_MAX_MB", "0"))
+
+# What-if / dependance partielle (src/models/partial_dependence.py) : lignes par requete
+WHATIF_MAX_ROWS = int(os.getenv("WHATIF_MAX_ROWS", "200000"))
 
 # Variables globales pour le modèle et preprocessor
 _model = None
 _preprocessor = None
+_interval_model = None
+_fast_model = None
+_model_version = None
+_model_modified_at = None
+_interval_version = None
+_interval_modified_at = None
+_metadata_cache = None
+_metadata_lock = threading.Lock()
+_price_grid = None
+_price_grid_lock = threading.Lock()
+_drift_monitor = None
+_drift_loaded = False
+_drift_lock = threading.Lock()
+_region_pool = None
+_region_pool_loaded = False
+_region_pool_version = None
+_region_pool_modified_at = None
+_region_pool_lock = threading.Lock()
+
+def load_artifacts(model_dir, label: str = "Modele") -> dict:
+    """
+    Charge les artefacts d'un dossier de modele.
+    
+    Mecanisme commun au modele de production et au modele candidat
+    (shadow) : dernier best_model_*.joblib, preprocessor.joblib et tetes
+    quantiles optionnelles.
+    
+    Args:
+        model_dir: Dossier des artefacts
+        label: Prefixe des messages de chargement
+    
+    Returns:
+        dict: 'model', 'preprocessor', 'interval_model' et 'fast_model'
+            (ou None), 'version', 'model_file' et 'modified_at' (date de
+            modification la plus recente du modele et du preprocessor),
+            'interval_version' et 'interval_modified_at' (None sans tetes)
+    """
+    # Import différé : joblib (et sklearn via le dépickling) seulement au chargement
+    import joblib
+    
+    model_dir = Path(model_dir)
+    
+    # Prendre le modèle le plus récent
+    latest_model = latest_model_path(model_dir)
+    
+    # Charger le modèle
+    model = joblib.load(latest_model)
+    print(f" {label} charge : {latest_model.name}")
+    
+    # Charger le preprocessor
+    preprocessor_path = model_dir / "preprocessor.joblib"
+    preprocessor = joblib.load(preprocessor_path)
+    print(f" Preprocessor charge")
+    
+    # Tetes quantiles optionnelles (intervalles de prediction hors forets)
+    interval_model = interval_version = interval_modified_at = None
+    heads_path = model_dir / "quantile_heads.joblib"
+    if heads_path.exists():
+        interval_model = joblib.load(heads_path)
+        interval_version = artifact_version(heads_path)
+        interval_modified_at = os.path.getmtime(heads_path)
+        print(f" Tetes quantiles chargees")
+    
+    # Modele rapide optionnel (mode cascade, src/models/cascade.py)
+    fast_model = None
+    fast_path = model_dir / "fast_model.joblib"
+    if fast_path.exists():
+        fast_model = joblib.load(fast_path)
+        print(f" Modele rapide charge ({fast_model.kind})")
+    
+    return {
+        "model": model,
+        "preprocessor": preprocessor,
+        "interval_model": interval_model,
+        "fast_model": fast_model,
+        "version": artifact_version(latest_model, preprocessor_path),
+        "model_file": latest_model.name,
+        "modified_at": max(os.path.getmtime(latest_model), os.path.getmtime(preprocessor_path)),
+        "interval_version": interval_version,
+        "interval_modified_at": interval_modified_at
+    }
 
 def load_model_and_preprocessor() -> Tuple:
     """
@@ -22,29 +132,24 @@ def load_model_and_preprocessor() -> Tuple:
     Returns:
         tuple: (model, preprocessor)
     """
-    global _model, _preprocessor
+    global _model, _preprocessor, _interval_model, _fast_model, _model_version, _model_modified_at
+    global _interval_version, _interval_modified_at
     
     # Si déjà chargé, retourner
     if _model is not None and _preprocessor is not None:
         return _model, _preprocessor
     
-    # Trouver le dernier modèle
-    model_files = list(MODEL_DIR.glob("best_model_*.joblib"))
-    
-    if not model_files:
-        raise FileNotFoundError("Aucun modele trouve dans models/")
-    
-    # Prendre le plus récent
-    latest_model = max(model_files, key=os.path.getctime)
-    
-    # Charger le modèle
-    _model = joblib.load(latest_model)
-    print(f" Modele charge : {latest_model.name}")
-    
-    # Charger le preprocessor
-    preprocessor_path = MODEL_DIR / "preprocessor.joblib"
-    _preprocessor = joblib.load(preprocessor_path)
-    print(f" Preprocessor charge")
+    start = time.perf_counter()
+    artifacts = load_artifacts(MODEL_DIR)
+    _model = artifacts["model"]
+    _preprocessor = artifacts["preprocessor"]
+    _interval_model = artifacts["interval_model"]
+    _fast_model = artifacts["fast_model"]
+    _model_version = artifacts["version"]
+    _model_modified_at = artifacts["modified_at"]
+    _interval_version = artifacts["interval_version"]
+    _interval_modified_at = artifacts["interval_modified_at"]
+    MODEL_LOAD_SECONDS.set(time.perf_counter() - start)
     
     return _model, _preprocessor
 
@@ -56,4 +161,168 @@ def get_model():
 def get_preprocessor():
     """Dependency pour obtenir le preprocessor."""
     _, preprocessor = load_model_and_preprocessor()
-    return preprocessor
\ No newline at end of file
+    return preprocessor
+
+def get_interval_model():
+    """Dependency pour obtenir les tetes quantiles (None si absentes)."""
+    load_model_and_preprocessor()
+    return _interval_model
+
+def get_fast_model():
+    """Dependency pour obtenir le modele rapide du mode cascade (None si absent)."""
+    load_model_and_preprocessor()
+    return _fast_model
+
+def get_model_version() -> str:
+    """Version des artefacts charges (voir artifact_version)."""
+    load_model_and_preprocessor()
+    return _model_version
+
+def get_model_modified_at() -> float:
+    """Date de modification (timestamp) des artefacts charges."""
+    load_model_and_preprocessor()
+    return _model_modified_at
+
+def get_prediction_version() -> str:
+    """
+    Version de tout ce dont depend une prediction servie : modele et
+    preprocessor, tetes quantiles (bornes, confiance) et modeles regionaux.
+    """
+    load_model_and_preprocessor()
+    pool = get_region_pool()
+    return f"{_model_version}-{_interval_version or 'no-heads'}-{_region_pool_version if pool else 'no-regions'}"
+
+def get_prediction_modified_at() -> float:
+    """Date de modification la plus recente des artefacts de get_prediction_version()."""
+    load_model_and_preprocessor()
+    pool = get_region_pool()
+    dates = [_model_modified_at, _interval_modified_at, _region_pool_modified_at if pool else None]
+    return max(date for date in dates if date is not None)
+
+def is_model_loaded() -> bool:
+    """Modele et preprocessor deja en memoire (sans tenter de chargement)."""
+    return _model is not None and _preprocessor is not None
+
+def get_model_metadata():
+    """
+    Metadonnees du modele (model_metadata.json), gardees en memoire.
+    
+    Le fichier n'est relu et parse que si sa taille ou sa date de
+    modification change (un os.stat par appel), ou si un autre modele a
+    ete charge entre-temps.
+    
+    Returns:
+        tuple: (metadonnees, signature, date de modification du fichier) ;
+            la signature change avec le fichier ou la version du modele.
+            None si le fichier est absent
+    """
+    global _metadata_cache
+    try:
+        stat = os.stat(METADATA_PATH)
+    except FileNotFoundError:
+        return None
+    key = (str(METADATA_PATH), stat.st_mtime_ns, stat.st_size, _model_version)
+    cached = _metadata_cache
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    
+    with _metadata_lock:
+        if _metadata_cache is None or _metadata_cache[0] != key:
+            with open(METADATA_PATH, 'r') as f:
+                metadata = json.load(f)
+            signature = f"{stat.st_mtime_ns:x}-{stat.st_size:x}-{_model_version or 'unloaded'}"
+            _metadata_cache = (key, (metadata, signature, stat.st_mtime))
+        return _metadata_cache[1]
+
+
+def get_price_grid():
+    """
+    Dependency pour obtenir la grille de prix (memory-map).
+    
+    La grille est reconstruite (une seule fois, sous verrou) si elle est
+    absente ou si elle a ete produite par une autre version du modele.
+    """
+    global _price_grid
+    version = get_model_version()
+    if _price_grid is not None and _price_grid.model_version == version:
+        return _price_grid
+    
+    with _price_grid_lock:
+        if _price_grid is None or _price_grid.model_version != version:
+            model, preprocessor = load_model_and_preprocessor()
+            profiles = None
+            if PRICE_GRID_PROFILES:
+                profiles = json.loads(Path(PRICE_GRID_PROFILES).read_text())
+            _price_grid = ensure_price_grid(
+                model, preprocessor, PRICE_GRID_DIR, version, PRICE_GRID_STEP, profiles
+            )
+            print(f" Grille de prix chargee : {_price_grid.values.shape} (version {version})")
+    return _price_grid
+
+
+def get_region_pool():
+    """
+    Dependency pour obtenir le pool de modeles regionaux.
+    
+    Returns:
+        RegionalModelPool, ou None si desactive ou sans index.json
+    """
+    global _region_pool, _region_pool_loaded, _region_pool_version, _region_pool_modified_at
+    if _region_pool_loaded:
+        return _region_pool
+    
+    with _region_pool_lock:
+        if not _region_pool_loaded:
+            if REGION_MODELS_ENABLED:
+                _region_pool = RegionalModelPool.open(
+                    REGION_MODEL_DIR,
+                    max_models=REGION_POOL_MAX_MODELS,
+                    max_bytes=int(REGION_POOL_MAX_MB * 1024 * 1024),
+                    on_load=lambda zone, seconds: REGION_MODEL_LOADS.inc(),
+                    on_evict=lambda zone: REGION_MODEL_EVICTIONS.inc()
+                )
+                if _region_pool is not None:
+                    index_path = REGION_MODEL_DIR / INDEX_FILENAME
+                    _region_pool_version = f"{_region_pool.version}:{artifact_version(index_path)}"
+                    _region_pool_modified_at = os.path.getmtime(index_path)
+                    print(f" Modeles regionaux : {len(_region_pool.regions)} regions ({REGION_MODEL_DIR})")
+            _region_pool_loaded = True
+    return _region_pool
+
+
+def _publish_drift(report):
+    for name, stats in report["features"].items():
+        DRIFT_PSI.set(stats["psi"], name)
+        DRIFT_KS.set(stats["ks"], name)
+
+def get_drift_monitor():
+    """
+    Dependency pour obtenir le moniteur de derive.
+    
+    Cree une seule fois, sous verrou : appele en meme temps depuis le
+    threadpool (decodage des batchs) et depuis le canal WebSocket.
+    
+    Returns:
+        DriftMonitor, ou None si desactive ou si model_metadata.json n'a
+        pas de baseline ('drift_baseline', voir src/data/drift.py)
+    """
+    global _drift_monitor, _drift_loaded
+    if _drift_loaded:
+        return _drift_monitor
+    
+    with _drift_lock:
+        if not _drift_loaded:
+            baseline = None
+            if DRIFT_ENABLED and METADATA_PATH.exists():
+                with open(METADATA_PATH, 'r') as f:
+                    baseline = json.load(f).get('drift_baseline')
+            if baseline:
+                _drift_monitor = DriftMonitor(baseline, DRIFT_WINDOW_SECONDS, on_report=_publish_drift)
+            _drift_loaded = True
+    return _drift_monitor
+
+def observe_inputs(X):
+    """Met a jour les histogrammes de derive avec une matrice brute (n, 8)."""
+    monitor = get_drift_monitor()
+    if monitor is not None:
+        monitor.observe(X)
@@ -2,160 +2,689 @@
 Endpoints de l'API.
 """
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Header, Request, WebSocket
+from fastapi.exceptions import RequestValidationError
+from starlette.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from typing import List, Literal, Optional, Union
 from datetime import datetime
-import pandas as pd
 import numpy as np
-import json
-from pathlib import Path
-import sys
-import os
 
-# Ajouter le dossier parent au path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-
-from schemas import HouseFeatures, PredictionResponse, ModelInfo, HealthResponse
-from dependencies import get_model, get_preprocessor
+from .schemas import (
+    HouseFeatures, PredictionResponse, BatchPredictionResponse,
+    ColumnarBatchPredictionResponse, ModelInfo, HealthResponse,
+    GridInfo, GridPointResponse, GridTileResponse, ExplainResponse, DriftReport, ShadowReport,
+    WhatIfRequest, WhatIfResponse, PartialDependenceRequest, PartialDependenceResponse
+)
+from .dependencies import (
+    WHATIF_MAX_ROWS, load_model_and_preprocessor, is_model_loaded, get_model_metadata, get_price_grid,
+    get_model_version, get_prediction_version, get_prediction_modified_at, get_drift_monitor, observe_inputs
+)
+from .inference import (
+    FEATURE_NAMES, format_price, houses_to_matrix, predict_matrix, predict_grid, explain_matrix, empty_result,
+    deduplicate_rows, expand_result, dedup_ratio, result_records, result_columns
+)
+from .responses import ORJSONResponse
+from .formats import (
+    ARROW_MEDIA_TYPE, NUMPY_MEDIA_TYPE, BINARY_MEDIA_TYPES, BatchPayload, PayloadError,
+    read_batch_payload, decode_batch, encode_batch
+)
+from .executor import ExecutorSaturated, get_executor
+from .http_cache import (
+    HTTP_CACHE_MAX_AGE, PREDICT_CACHE_MAX_AGE, make_etag, cache_headers, is_not_modified, not_modified_response
+)
+from .shadow import get_shadow
+from .streaming import StreamSession
+from .cascade import CASCADE_ENABLED, predict_matrix_cascade, record_cascade, escalation_ratio
+from .metrics import BATCH_SIZE, BATCH_DEDUP_RATIO
+from src.models.explain import UnsupportedModelError
+from src.models.partial_dependence import (
+    CellsNotSupportedError, sweep_axis, grid_matrix, population_grid_matrix, summarize_population
+)
 
 # Créer le router
 router = APIRouter()
 
-# Chemin vers les métadonnées
-BASE_DIR = Path(__file__).resolve().parent.parent
-METADATA_PATH = BASE_DIR / "models" / "model_metadata.json"
-
 
 @router.get("/health", response_model=HealthResponse, tags=["System"])
-def health_check():
+def health_check(request: Request):
     """
     Vérifie que l'API fonctionne.
+    
+    ETag faible (statut + version du modèle) et Cache-Control no-cache :
+    un client qui renvoie If-None-Match reçoit 304 tant que rien ne change.
     """
-    try:
-        model = get_model()
-        preprocessor = get_preprocessor()
-        model_loaded = model is not None and preprocessor is not None
-    except Exception:
-        model_loaded = False
-    
-    return HealthResponse(
-        status="healthy" if model_loaded else "degraded",
-        model_loaded=model_loaded,
-        timestamp=datetime.now().isoformat()
-    )
+    model_loaded = is_model_loaded()
+    if not model_loaded:
+        try:
+            load_model_and_preprocessor()
+            model_loaded = True
+        except Exception:
+            model_loaded = False
+    
+    status = "healthy" if model_loaded else "degraded"
+    version = get_model_version() if model_loaded else None
+    headers = cache_headers(make_etag("health", status, version, weak=True), "no-cache")
+    if is_not_modified(request.headers, headers["ETag"]):
+        return not_modified_response("/health", headers)
+    return ORJSONResponse({
+        "status": status,
+        "model_loaded": model_loaded,
+        "timestamp": datetime.now().isoformat()
+    }, headers=headers)
 
 
 @router.get("/model-info", response_model=ModelInfo, tags=["Model"])
-def get_model_info():
+def get_model_info(request: Request):
     """
     Retourne les informations sur le modèle.
+    
+    Les métadonnées sont gardées en mémoire et relues seulement si le
+    fichier ou le modèle chargé change ; ETag, Last-Modified et
+    Cache-Control (max-age HTTP_CACHE_MAX_AGE) permettent les 304.
     """
     try:
-        # Charger les métadonnées
-        if not METADATA_PATH.exists():
+        cached = get_model_metadata()
+        if cached is None:
             raise HTTPException(status_code=404, detail="Métadonnées du modèle non trouvées")
+        metadata, signature, modified_at = cached
         
-        with open(METADATA_PATH, 'r') as f:
-            metadata = json.load(f)
-        
-        return ModelInfo(
-            model_name=metadata['model_name'],
-            model_type=metadata['model_type'],
-            version=metadata['training_date'][:10],
-            metrics=metadata['metrics'],
-            n_features=metadata['n_features'],
-            features=metadata['features']
+        headers = cache_headers(
+            make_etag("model-info", signature), f"public, max-age={HTTP_CACHE_MAX_AGE}", modified_at
         )
+        if is_not_modified(request.headers, headers["ETag"], modified_at):
+            return not_modified_response("/model-info", headers)
+        
+        return ORJSONResponse({
+            "model_name": metadata['model_name'],
+            "model_type": metadata['model_type'],
+            "version": metadata['training_date'][:10],
+            "metrics": metadata['metrics'],
+            "n_features": metadata['n_features'],
+            "features": metadata['features']
+        }, headers=headers)
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur lors de la récupération des métadonnées: {str(e)}")
 
 
+def _saturated(error: ExecutorSaturated) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Serveur de prédiction saturé, réessayez plus tard",
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+
+def latency_budget(
+    latency_budget_ms: Optional[float] = Query(
+        None, ge=0, description="Budget de calcul (ms) en mode cascade ; prioritaire sur l'en-tête"
+    ),
+    x_latency_budget_ms: Optional[float] = Header(None, ge=0, alias="X-Latency-Budget-Ms")
+) -> Optional[float]:
+    """Budget de latence de la requête, en secondes (None : pas de budget)."""
+    budget_ms = latency_budget_ms if latency_budget_ms is not None else x_latency_budget_ms
+    return budget_ms / 1000 if budget_ms is not None else None
+
+
+async def _run_prediction(X, budget_seconds):
+    """
+    Prédiction dans l'executor : cascade si CASCADE_ENABLED, sinon modèle complet.
+    
+    Returns:
+        tuple: (résultat, durée d'exécution, compteurs de la cascade ou None)
+    """
+    if not CASCADE_ENABLED:
+        result, seconds = await get_executor().run_timed(predict_matrix, X)
+        return result, seconds, None
+    (result, info), seconds = await get_executor().run_timed(predict_matrix_cascade, X, budget_seconds)
+    record_cascade(info)
+    return result, seconds, info
+
+
 @router.post("/predict", response_model=PredictionResponse, tags=["Prediction"])
-def predict_price(
+async def predict_price(
     house: HouseFeatures,
-    model=Depends(get_model),
-    preprocessor=Depends(get_preprocessor)
+    include_features: bool = Query(True, description="Renvoyer les features dans la réponse"),
+    budget_seconds: Optional[float] = Depends(latency_budget)
 ):
     """
     Prédit le prix d'une maison.
     
+    Le preprocessing et la prédiction s'exécutent dans l'executor
+    d'inférence dédié ; 503 + Retry-After s'il est saturé. En mode
+    cascade, l'en-tête X-Served-By indique le modèle utilisé (fast, full).
+    
     Args:
         house: Caractéristiques de la maison
+        include_features: Renvoyer les features reçues (features_used)
+        budget_seconds: Budget de latence (latency_budget_ms ou X-Latency-Budget-Ms)
     
     Returns:
-        PredictionResponse: Prix prédit et informations
+        PredictionResponse: Prix prédit, intervalle de prédiction et informations
     """
     try:
-        # Convertir en DataFrame
-        input_data = pd.DataFrame([house.model_dump()])
-        
-        # Preprocessing (feature engineering + scaling)
-        processed_data = preprocessor.transform(input_data)
+        X = houses_to_matrix([house])
+        observe_inputs(X)
         
-        # Prédiction
-        prediction = model.predict(processed_data)[0]
+        # Preprocessing + prédiction + intervalle, hors boucle d'événements
+        result, seconds, cascade = await _run_prediction(X, budget_seconds)
+        _offer_shadow(X, result, seconds)
         
-        # Formater le prix
-        price_in_thousands = prediction * 100  # Convertir en milliers
-        formatted_price = f"${price_in_thousands:.2f}k"
-        
-        # Déterminer la confiance (basé sur la plage de prix)
-        if prediction < 1.5:
-            confidence = "high"
-        elif prediction < 4.0:
-            confidence = "medium"
-        else:
-            confidence = "low"
+        prediction = result_records(result)[0]
+        if include_features:
+            prediction["features_used"] = house.model_dump()
         
-        return PredictionResponse(
-            predicted_price=float(prediction),
-            predicted_price_formatted=formatted_price,
-            confidence=confidence,
-            features_used=house.model_dump()
-        )
+        # Réponse déjà typée : pas de re-validation par le response_model
+        response = ORJSONResponse(prediction)
+        if cascade is not None:
+            response.headers["X-Served-By"] = "full" if cascade["full"] else "fast"
+        return response
     
+    except ExecutorSaturated as e:
+        raise _saturated(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur lors de la prédiction: {str(e)}")
 
 
-@router.post("/predict-batch", tags=["Prediction"])
-def predict_batch(houses: list[HouseFeatures], model=Depends(get_model), preprocessor=Depends(get_preprocessor)):
+@router.get("/predict", response_model=PredictionResponse, tags=["Prediction"])
+async def predict_price_cached(
+    request: Request,
+    house: HouseFeatures = Depends(),
+    include_features: bool = Query(True, description="Renvoyer les features dans la réponse")
+):
+    """
+    Prédit le prix d'une maison passée en paramètres de requête
+    (?MedInc=8.3&HouseAge=41&...), réponse cacheable.
+    
+    La prédiction du modèle complet est déterministe : l'ETag est le hash
+    des 8 features (float64) et de la version de tous les artefacts qui
+    font la réponse (modèle, preprocessor, têtes quantiles, modèles
+    régionaux), Last-Modified leur date la plus récente. Si le client
+    renvoie cet ETag (If-None-Match), la réponse est un 304 sans appel au
+    modèle. Cache-Control : max-age PREDICT_CACHE_MAX_AGE. Le mode cascade
+    ne s'applique pas (son modèle rapide et ses audits tirés au sort
+    rendraient la réponse non déterministe).
+    
+    Returns:
+        PredictionResponse: Comme POST /predict
+    """
+    X = houses_to_matrix([house])
+    headers = cache_headers(
+        make_etag("predict", get_prediction_version(), X.tobytes(), include_features),
+        f"public, max-age={PREDICT_CACHE_MAX_AGE}",
+        get_prediction_modified_at()
+    )
+    if is_not_modified(request.headers, headers["ETag"]):
+        return not_modified_response("/predict", headers)
+    
+    try:
+        observe_inputs(X)
+        result, seconds = await get_executor().run_timed(predict_matrix, X)
+        _offer_shadow(X, result, seconds)
+    except ExecutorSaturated as e:
+        raise _saturated(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur lors de la prédiction: {str(e)}")
+    
+    prediction = result_records(result)[0]
+    if include_features:
+        prediction["features_used"] = house.model_dump()
+    return ORJSONResponse(prediction, headers=headers)
+
+
+def _offer_shadow(X, result, seconds):
+    # Tirage + mise en file seulement : le candidat est évalué en arrière-plan
+    shadow = get_shadow()
+    if shadow is not None:
+        shadow.offer(X, result["predicted_price"], seconds)
+
+
+def _decode_to_matrix(payload: BatchPayload):
+    X, houses = decode_batch(payload)
+    if houses is not None:
+        X = houses_to_matrix(houses)
+    observe_inputs(X)
+    return X, *deduplicate_rows(X)
+
+
+@router.websocket("/ws/predict")
+async def predict_stream(
+    websocket: WebSocket,
+    budget_seconds: Optional[float] = Depends(latency_budget)
+):
+    """
+    Prédictions en continu sur une connexion persistante.
+    
+    Messages {"id", "features"} en JSON (texte) ou msgpack (binaire) ;
+    les messages proches sont regroupés en un appel vectorisé et les
+    réponses reviennent dans le désordre, associées par id (voir
+    api/streaming.py). Le budget de latence, s'il est donné à
+    l'ouverture, vaut pour toute la connexion.
+    """
+    await websocket.accept()
+
+    async def predict(X):
+        result, seconds, _ = await _run_prediction(X, budget_seconds)
+        _offer_shadow(X, result, seconds)
+        return result
+
+    # Derive observee sur toutes les lignes, comme /predict-batch
+    await StreamSession(websocket, predict, observe=observe_inputs).run()
+
+
+_BINARY_BODY = {"schema": {"type": "string", "format": "binary"}}
+
+
+@router.post(
+    "/predict-batch",
+    response_model=Union[BatchPredictionResponse, ColumnarBatchPredictionResponse],
+    tags=["Prediction"],
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {"type": "array", "items": {"$ref": "#/components/schemas/HouseFeatures"}}
+                },
+                ARROW_MEDIA_TYPE: _BINARY_BODY,
+                NUMPY_MEDIA_TYPE: _BINARY_BODY
+            }
+        }
+    }
+)
+async def predict_batch(
+    payload: BatchPayload = Depends(read_batch_payload),
+    include_features: bool = Query(True, description="Renvoyer les features dans la réponse (JSON)"),
+    format: Literal["records", "columnar"] = Query(
+        "records", description="records : une entrée par maison ; columnar : un tableau par champ (JSON)"
+    ),
+    budget_seconds: Optional[float] = Depends(latency_budget)
+):
     """
     Prédit les prix pour plusieurs maisons.
     
+    Le batch entier passe en une seule fois dans le preprocessing et le
+    modèle (intervalles compris) ; les lignes identiques ne sont prédites
+    qu'une fois (dedup_ratio dans la réponse). Formats de requête acceptés :
+    - JSON : liste de HouseFeatures (validée en une passe)
+    - Arrow IPC stream (application/vnd.apache.arrow.stream)
+    - Matrice float64 little-endian (application/octet-stream, en-tête X-Columns)
+    
+    Les formats binaires sont validés colonne par colonne et la réponse
+    reprend le format de la requête. Le décodage s'exécute dans le
+    threadpool, la prédiction dans l'executor d'inférence dédié
+    (503 + Retry-After s'il est saturé). En mode cascade, l'en-tête
+    X-Cascade-Escalation donne la part des lignes servies par le modèle complet.
+    
     Args:
-        houses: Liste de caractéristiques de maisons
+        payload: Corps brut de la requête
+        include_features: Renvoyer les features reçues (JSON)
+        format: 'records' (liste d'objets) ou 'columnar' (tableaux de prix)
+        budget_seconds: Budget de latence (latency_budget_ms ou X-Latency-Budget-Ms)
     
     Returns:
-        list: Liste de prédictions
+        BatchPredictionResponse | ColumnarBatchPredictionResponse | binaire
     """
     try:
-        predictions = []
+        X, X_unique, inverse = await run_in_threadpool(_decode_to_matrix, payload)
+    except PayloadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+        )
+    
+    n_houses = len(X)
+    ratio = dedup_ratio(n_houses, len(X_unique))
+    BATCH_SIZE.observe(n_houses)
+    BATCH_DEDUP_RATIO.observe(ratio)
+    try:
+        # Un seul passage preprocessing + modèle pour les lignes distinctes
+        cascade = None
+        if n_houses == 0:
+            result = empty_result()
+        else:
+            result, seconds, cascade = await _run_prediction(X_unique, budget_seconds)
+            _offer_shadow(X_unique, result, seconds)
+            result = expand_result(result, inverse)
         
-        for house in houses:
-            # Convertir en DataFrame
-            input_data = pd.DataFrame([house.model_dump()])
-            
-            # Preprocessing
-            processed_data = preprocessor.transform(input_data)
-            
-            # Prédiction
-            prediction = model.predict(processed_data)[0]
-            
-            # Formater
-            price_in_thousands = prediction * 100
-            formatted_price = f"${price_in_thousands:.2f}k"
-            
-            predictions.append({
-                "predicted_price": float(prediction),
-                "predicted_price_formatted": formatted_price,
-                "features": house.model_dump()
+        if payload.media_type in BINARY_MEDIA_TYPES:
+            response = encode_batch(payload.media_type, result)
+            response.headers["X-Dedup-Ratio"] = f"{ratio:.4f}"
+        elif format == "columnar":
+            body = {"count": n_houses, "dedup_ratio": ratio, **result_columns(result)}
+            if include_features:
+                body["features"] = {name: X[:, i].tolist() for i, name in enumerate(FEATURE_NAMES)}
+            response = ORJSONResponse(body)
+        else:
+            features = [dict(zip(FEATURE_NAMES, row)) for row in X.tolist()] if include_features else None
+            response = ORJSONResponse({
+                "count": n_houses,
+                "dedup_ratio": ratio,
+                "predictions": result_records(result, features)
             })
         
-        return {
-            "count": len(predictions),
-            "predictions": predictions
-        }
+        if cascade is not None:
+            response.headers["X-Cascade-Escalation"] = f"{escalation_ratio(cascade):.4f}"
+        return response
+    
+    except ExecutorSaturated as e:
+        raise _saturated(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur lors de la prédiction batch: {str(e)}")
+
+
+@router.post("/explain", response_model=ExplainResponse, tags=["Prediction"])
+async def explain(
+    houses: List[HouseFeatures],
+    mode: Literal["auto", "exact", "approx"] = Query(
+        "auto", description="exact : TreeSHAP ; approx : Saabas (coût borné) ; auto : exact si le modèle est petit"
+    )
+):
+    """
+    Contributions de chacune des 13 features du modèle (8 brutes + 5
+    construites) au prix prédit, pour un batch de maisons.
+    
+    expected_value + somme des contributions = prix prédit. Les lignes
+    identiques ne sont calculées qu'une fois ; en mode exact, les
+    contributions déjà calculées sont gardées en cache pour la version
+    courante du modèle.
+    
+    Args:
+        houses: Liste de HouseFeatures
+        mode: 'auto', 'exact' ou 'approx'
+    
+    Returns:
+        ExplainResponse: Contributions par maison
+    """
+    if not houses:
+        raise HTTPException(status_code=422, detail="Le batch doit contenir au moins une maison")
     
+    X, inverse = deduplicate_rows(houses_to_matrix(houses))
+    try:
+        result = await get_executor().run(explain_matrix, X, mode)
+    except ExecutorSaturated as e:
+        raise _saturated(e)
+    except UnsupportedModelError as e:
+        raise HTTPException(status_code=501, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erreur lors de la prédiction batch: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Erreur lors de l'explication: {str(e)}")
+    
+    names = result["feature_names"]
+    contributions = result["contributions"]
+    prices = result["predicted_price"]
+    if inverse is not None:
+        contributions, prices = contributions[inverse], prices[inverse]
+    
+    return ORJSONResponse({
+        "count": len(houses),
+        "mode": result["mode"],
+        "model_version": get_model_version(),
+        "expected_value": result["expected_value"],
+        "feature_names": names,
+        "explanations": [
+            {"predicted_price": price, "contributions": dict(zip(names, row))}
+            for price, row in zip(prices.tolist(), contributions.tolist())
+        ]
+    })
+
+
+def _sweep_grid(sweep):
+    """Colonnes balayées et valeurs de chaque axe."""
+    columns = [FEATURE_NAMES.index(s.feature) for s in sweep]
+    axes = [sweep_axis(s.start, s.stop, s.num, s.values) for s in sweep]
+    return columns, axes
+
+
+def _check_grid_rows(n_rows: int):
+    if n_rows > WHATIF_MAX_ROWS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Grille trop grande : {n_rows} lignes (maximum {WHATIF_MAX_ROWS})"
+        )
+
+
+async def _run_grid(X, method):
+    try:
+        return await get_executor().run(predict_grid, X, method)
+    except ExecutorSaturated as e:
+        raise _saturated(e)
+    except CellsNotSupportedError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur lors de la prédiction de la grille: {str(e)}")
+
+
+def _shaped(values, shape):
+    return values.reshape(shape).tolist() if values is not None else None
+
+
+@router.post("/what-if", response_model=WhatIfResponse, tags=["Prediction"])
+async def what_if(
+    request: WhatIfRequest,
+    method: Literal["auto", "cells", "brute"] = Query(
+        "auto", description="cells : une prédiction par cellule de seuils des arbres ; brute : chaque point"
+    )
+):
+    """
+    Courbe (une feature) ou surface (deux features) de prix autour d'une maison.
+    
+    Toute la grille (plus la maison de base) est construite en une matrice
+    et prédite en une seule passe preprocessing + modèle ; pour un modèle à
+    base d'arbres, les points qui tombent entre les mêmes seuils de split
+    ne sont prédits qu'une fois (résultat identique).
+    
+    Args:
+        request: Maison de base et features balayées (1 ou 2)
+        method: 'auto', 'cells' ou 'brute'
+    
+    Returns:
+        WhatIfResponse: Prix par point, une ligne par valeur de la première feature
+    """
+    columns, axes = _sweep_grid(request.sweep)
+    base = houses_to_matrix([request.base])
+    grid = grid_matrix(base[0], columns, axes)
+    _check_grid_rows(len(grid) + 1)
+    
+    result, info = await _run_grid(np.vstack([base, grid]), method)
+    shape = tuple(len(axis) for axis in axes)
+    prices = result["predicted_price"]
+    lower, upper = result["lower_bound"], result["upper_bound"]
+    return ORJSONResponse({
+        "features": [s.feature for s in request.sweep],
+        "axes": [axis.tolist() for axis in axes],
+        "base_price": float(prices[0]),
+        "predicted_price": _shaped(prices[1:], shape),
+        "lower_bound": _shaped(lower[1:] if lower is not None else None, shape),
+        "upper_bound": _shaped(upper[1:] if upper is not None else None, shape),
+        "grid_points": len(grid),
+        "evaluated_rows": info["evaluated_rows"],
+        "method": info["method"],
+        "model_version": get_model_version()
+    })
+
+
+@router.post("/partial-dependence", response_model=PartialDependenceResponse, tags=["Prediction"])
+async def partial_dependence(
+    request: PartialDependenceRequest,
+    method: Literal["auto", "cells", "brute"] = Query("auto", description="Voir /what-if")
+):
+    """
+    Dépendance partielle : prix moyen d'un échantillon de maisons quand
+    une ou deux features sont fixées à chaque point de la grille.
+    
+    Au plus sample_size maisons sont tirées sans remise dans la population
+    (seed pour un résultat reproductible) ; l'échantillon répété pour
+    chaque point forme une seule matrice prédite en une passe. Les
+    centiles 10 et 90 des courbes individuelles (ICE) montrent la
+    dispersion autour de la moyenne.
+    
+    Returns:
+        PartialDependenceResponse: Moyenne et centiles par point
+    """
+    columns, axes = _sweep_grid(request.sweep)
+    population = houses_to_matrix(request.houses)
+    if len(population) > request.sample_size:
+        rng = np.random.default_rng(request.seed)
+        population = population[np.sort(rng.choice(len(population), request.sample_size, replace=False))]
+    n_points = int(np.prod([len(axis) for axis in axes]))
+    _check_grid_rows(n_points * len(population))
+    
+    X = population_grid_matrix(population, columns, axes)
+    result, info = await _run_grid(X, method)
+    average, (p10, p90) = summarize_population(result["predicted_price"], n_points)
+    shape = tuple(len(axis) for axis in axes)
+    return ORJSONResponse({
+        "features": [s.feature for s in request.sweep],
+        "axes": [axis.tolist() for axis in axes],
+        "average": _shaped(average, shape),
+        "ice_p10": _shaped(p10, shape),
+        "ice_p90": _shaped(p90, shape),
+        "sample_size": len(population),
+        "grid_points": n_points,
+        "evaluated_rows": info["evaluated_rows"],
+        "method": info["method"],
+        "model_version": get_model_version()
+    })
+
+
+@router.get("/drift", response_model=DriftReport, tags=["Model"])
+def drift_report():
+    """
+    Dérive des entrées de prédiction par rapport à la baseline d'entraînement.
+    
+    PSI et KS par feature (8 brutes + 5 construites) pour la fenêtre en
+    cours, la dernière fenêtre terminée et le cumul depuis le démarrage
+    du processus. Seuls des compteurs par bin sont conservés.
+    """
+    monitor = get_drift_monitor()
+    if monitor is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Suivi de dérive inactif : pas de 'drift_baseline' dans model_metadata.json (python src/data/drift.py)"
+        )
+    return ORJSONResponse(monitor.report())
+
+
+@router.get("/shadow", response_model=ShadowReport, tags=["Model"])
+def shadow_report():
+    """
+    Comparaison du modèle candidat (shadow) au modèle de production.
+    
+    Une fraction SHADOW_SAMPLE_RATE des lignes prédites est rejouée sur
+    le candidat (SHADOW_MODEL_DIR) en arrière-plan, par batchs. Renvoie
+    les écarts de prédiction agrégés (moyenne, MAE, RMSE, max, part des
+    écarts relatifs > 10 %) et la latence de chaque modèle.
+    """
+    shadow = get_shadow()
+    if shadow is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Évaluation shadow inactive : définir SHADOW_MODEL_DIR"
+        )
+    return ORJSONResponse(shadow.report())
+
+
+def _grid_or_500():
+    try:
+        return get_price_grid()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Grille de prix indisponible: {str(e)}")
+
+
+def _check_profile(grid, profile: str):
+    if profile not in grid.profiles:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Profil inconnu : {profile} (disponibles : {', '.join(grid.profiles)})"
+        )
+
+
+def _grid_cache_headers(grid, *params) -> dict:
+    """
+    En-têtes de cache d'une réponse /grid : la grille change avec le modèle
+    et avec sa configuration (axes, pas, profils), même à version égale.
+    """
+    return cache_headers(
+        make_etag("grid", grid.model_version, grid.signature, *params), f"public, max-age={HTTP_CACHE_MAX_AGE}"
+    )
+
+
+@router.get("/grid", response_model=GridInfo, tags=["Grid"])
+def grid_info(request: Request):
+    """
+    Décrit la grille de prix précalculée (axes, profils, version du modèle).
+    """
+    grid = _grid_or_500()
+    headers = _grid_cache_headers(grid)
+    if is_not_modified(request.headers, headers["ETag"]):
+        return not_modified_response("/grid", headers)
+    return ORJSONResponse({
+        "model_version": grid.model_version,
+        "step": grid.step,
+        "latitude_range": [grid.lat0, float(grid.latitudes[-1])],
+        "longitude_range": [grid.lon0, float(grid.longitudes[-1])],
+        "shape": list(grid.values.shape),
+        "profiles": grid.profile_features
+    }, headers=headers)
+
+
+@router.get("/grid/point", response_model=GridPointResponse, tags=["Grid"])
+def grid_point(
+    request: Request,
+    lat: float = Query(..., ge=32, le=42, description="Latitude"),
+    lon: float = Query(..., ge=-125, le=-114, description="Longitude"),
+    profile: str = Query("median", description="Profil de logement")
+):
+    """
+    Prix d'un profil type en un point, interpolé (bilinéaire) dans la grille.
+    
+    Aucun appel au modèle : lecture de 4 cellules du tableau memory-mappé.
+    """
+    grid = _grid_or_500()
+    _check_profile(grid, profile)
+    headers = _grid_cache_headers(grid, profile, lat, lon)
+    if is_not_modified(request.headers, headers["ETag"]):
+        return not_modified_response("/grid/point", headers)
+    price = grid.interpolate(profile, lat, lon)
+    return ORJSONResponse({
+        "profile": profile,
+        "latitude": lat,
+        "longitude": lon,
+        "predicted_price": price,
+        "predicted_price_formatted": format_price(price),
+        "model_version": grid.model_version
+    }, headers=headers)
+
+
+@router.get("/grid/tile", response_model=GridTileResponse, tags=["Grid"])
+def grid_tile(
+    request: Request,
+    lat_min: float = Query(..., ge=32, le=42),
+    lat_max: float = Query(..., ge=32, le=42),
+    lon_min: float = Query(..., ge=-125, le=-114),
+    lon_max: float = Query(..., ge=-125, le=-114),
+    profile: str = Query("median", description="Profil de logement")
+):
+    """
+    Prix d'un profil type sur toutes les cellules de la grille comprises
+    dans la boîte [lat_min, lat_max] x [lon_min, lon_max].
+    """
+    if lat_min > lat_max or lon_min > lon_max:
+        raise HTTPException(status_code=422, detail="Boîte invalide : min doit être <= max")
+    grid = _grid_or_500()
+    _check_profile(grid, profile)
+    headers = _grid_cache_headers(grid, profile, lat_min, lat_max, lon_min, lon_max)
+    if is_not_modified(request.headers, headers["ETag"]):
+        return not_modified_response("/grid/tile", headers)
+    latitudes, longitudes, prices = grid.tile(profile, lat_min, lat_max, lon_min, lon_max)
+    return ORJSONResponse({
+        "profile": profile,
+        "model_version": grid.model_version,
+        "latitudes": latitudes.tolist(),
+        "longitudes": longitudes.tolist(),
+        "prices": prices.tolist()
+    }, headers=headers)
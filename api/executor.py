@@ -0,0 +1,183 @@
+"""
+Executor dedie a l'inference.
+
+Les endpoints de prediction sont async : la boucle d'evenements ne fait
+que lire et valider les requetes, le preprocessing + predict part dans
+un pool dedie (distinct du threadpool Starlette partage).
+
+Configuration (variables d'environnement) :
+- INFERENCE_EXECUTOR : 'thread' (defaut, NumPy/sklearn relachent le GIL)
+  ou 'process' (chemins Python purs ; chaque processus charge le modele)
+- INFERENCE_WORKERS : taille du pool (defaut : nombre de CPU)
+- INFERENCE_MAX_PENDING : travaux admis (en file + en cours) au-dela
+  desquels les requetes recoivent 503 + Retry-After
+- INFERENCE_RETRY_AFTER : valeur de l'en-tete Retry-After (secondes)
+"""
+
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from .metrics import Counter, Gauge
+from .profiling import profiled_call, request_tag
+
+EXECUTOR_KIND = os.getenv("INFERENCE_EXECUTOR", "thread").lower()
+EXECUTOR_WORKERS = int(os.getenv("INFERENCE_WORKERS", str(os.cpu_count() or 1)))
+EXECUTOR_MAX_PENDING = int(os.getenv("INFERENCE_MAX_PENDING", str(4 * EXECUTOR_WORKERS)))
+RETRY_AFTER_SECONDS = int(os.getenv("INFERENCE_RETRY_AFTER", "1"))
+
+EXECUTOR_PENDING = Gauge(
+    "inference_executor_pending",
+    "Travaux d'inference admis (en file + en cours)",
+    labelnames=("executor",)
+)
+EXECUTOR_WORKERS_GAUGE = Gauge(
+    "inference_executor_workers",
+    "Taille du pool d'inference",
+    labelnames=("executor",)
+)
+EXECUTOR_BUSY_SECONDS = Counter(
+    "inference_executor_busy_seconds_total",
+    "Temps cumule passe a executer des travaux d'inference",
+    labelnames=("executor",)
+)
+EXECUTOR_UTILIZATION = Gauge(
+    "inference_executor_utilization",
+    "Fraction de la capacite du pool occupee depuis le demarrage",
+    labelnames=("executor",)
+)
+EXECUTOR_REJECTED = Counter(
+    "inference_executor_rejected_total",
+    "Requetes refusees (503) car le pool est sature",
+    labelnames=("executor",)
+)
+
+
+class ExecutorSaturated(Exception):
+    """Plus de place dans la file de l'executor (converti en 503)."""
+
+    def __init__(self, retry_after: int = RETRY_AFTER_SECONDS):
+        super().__init__("Executor d'inference sature")
+        self.retry_after = retry_after
+
+
+def _timed_call(fn, args):
+    """Execute fn dans le worker et renvoie (resultat, duree d'execution)."""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def _init_process_worker():
+    """Initialisation d'un processus du pool : chargement du modele."""
+    from .dependencies import load_model_and_preprocessor
+    load_model_and_preprocessor()
+
+
+class InferenceExecutor:
+    """
+    Pool borne avec controle d'admission.
+
+    Attributes:
+        name (str): Label 'executor' des metriques
+        kind (str): 'thread' ou 'process'
+        workers (int): Taille du pool
+        max_pending (int): Travaux admis au maximum
+    """
+
+    def __init__(self, name="inference", kind=EXECUTOR_KIND, workers=EXECUTOR_WORKERS,
+                 max_pending=EXECUTOR_MAX_PENDING):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"INFERENCE_EXECUTOR inconnu : {kind}")
+        self.name = name
+        self.kind = kind
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.busy_seconds = 0.0
+        self._started = time.monotonic()
+
+        if kind == "process":
+            self._pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_process_worker
+            )
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+
+        EXECUTOR_WORKERS_GAUGE.set(workers, name)
+        EXECUTOR_PENDING.set(0, name)
+
+    async def run(self, fn, *args):
+        """
+        Execute fn(*args) dans le pool.
+
+        Voir run_timed() pour les conditions d'appel.
+        """
+        result, _ = await self.run_timed(fn, *args)
+        return result
+
+    async def run_timed(self, fn, *args):
+        """
+        Execute fn(*args) dans le pool et renvoie (resultat, duree d'execution).
+
+        La duree exclut l'attente dans la file du pool.
+
+        Les fonctions doivent etre definies au niveau module (picklables)
+        pour le mode 'process'.
+
+        Raises:
+            ExecutorSaturated: si max_pending travaux sont deja admis
+        """
+        if self.pending >= self.max_pending:
+            EXECUTOR_REJECTED.inc(self.name)
+            raise ExecutorSaturated()
+
+        # Compteur modifie uniquement depuis la boucle d'evenements
+        self.pending += 1
+        EXECUTOR_PENDING.set(self.pending, self.name)
+        try:
+            loop = asyncio.get_running_loop()
+            tag = request_tag()
+            if tag is not None and self.kind == "thread":
+                # Requete profilee : piles du worker echantillonnees pendant le travail
+                result, busy = await loop.run_in_executor(self._pool, profiled_call, tag, _timed_call, fn, args)
+            else:
+                result, busy = await loop.run_in_executor(self._pool, _timed_call, fn, args)
+        finally:
+            self.pending -= 1
+            EXECUTOR_PENDING.set(self.pending, self.name)
+
+        self.busy_seconds += busy
+        EXECUTOR_BUSY_SECONDS.inc(self.name, amount=busy)
+        EXECUTOR_UTILIZATION.set(self.utilization(), self.name)
+        return result, busy
+
+    def utilization(self) -> float:
+        """Temps occupe / capacite totale du pool depuis le demarrage."""
+        elapsed = time.monotonic() - self._started
+        return self.busy_seconds / max(elapsed * self.workers, 1e-9)
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+_executor = None
+
+
+def get_executor() -> InferenceExecutor:
+    """Executor du processus courant, cree au premier appel (apres un eventuel fork)."""
+    global _executor
+    if _executor is None:
+        _executor = InferenceExecutor()
+    return _executor
+
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
@@ -0,0 +1,239 @@
+"""
+Formats de requete / reponse de /predict-batch.
+
+En plus du JSON (liste de HouseFeatures), /predict-batch accepte :
+- Apache Arrow IPC (stream) : Content-Type application/vnd.apache.arrow.stream,
+  une colonne entiere ou flottante par feature, noms uniques (pyarrow requis)
+- Matrice brute : Content-Type application/octet-stream, float64 little-endian
+  en ordre ligne, colonnes declarees par l'en-tete X-Columns
+  (par defaut l'ordre de get_feature_names())
+
+Les bornes ge/le de HouseFeatures sont verifiees colonne par colonne en
+NumPy, sans creer d'objet Python par ligne. La reponse reprend le format
+de la requete.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+from fastapi import Request
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+
+from .schemas import HouseFeatures
+
+JSON_MEDIA_TYPE = "application/json"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+NUMPY_MEDIA_TYPE = "application/octet-stream"
+BINARY_MEDIA_TYPES = (ARROW_MEDIA_TYPE, NUMPY_MEDIA_TYPE)
+
+FEATURE_NAMES = list(HouseFeatures.model_fields)
+RESULT_COLUMNS = ["predicted_price", "lower_bound", "upper_bound"]
+
+# Nombre maximum d'erreurs de validation detaillees dans une reponse 422
+MAX_REPORTED_ERRORS = 20
+
+HOUSES_ADAPTER = TypeAdapter(list[HouseFeatures])
+
+
+class PayloadError(Exception):
+    """Corps de requete illisible ou invalide (converti en reponse HTTP)."""
+
+    def __init__(self, status_code: int, detail):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _feature_bounds():
+    """Bornes (lower, upper) par feature, lues dans les contraintes de HouseFeatures."""
+    lower = np.full(len(FEATURE_NAMES), -np.inf)
+    upper = np.full(len(FEATURE_NAMES), np.inf)
+    for i, name in enumerate(FEATURE_NAMES):
+        for constraint in HouseFeatures.model_fields[name].metadata:
+            if getattr(constraint, "ge", None) is not None:
+                lower[i] = constraint.ge
+            if getattr(constraint, "le", None) is not None:
+                upper[i] = constraint.le
+    return lower, upper
+
+
+FEATURE_LOWER, FEATURE_UPPER = _feature_bounds()
+
+
+@dataclass
+class BatchPayload:
+    """Corps brut de /predict-batch et en-tetes utiles au decodage."""
+
+    media_type: str
+    body: bytes
+    columns: Optional[str] = None
+
+
+async def read_batch_payload(request: Request) -> BatchPayload:
+    """
+    Dependency : lit le corps sans le decoder.
+
+    Le decodage (CPU) se fait dans l'endpoint, hors de la boucle d'evenements.
+    """
+    media_type = request.headers.get("content-type", JSON_MEDIA_TYPE).split(";")[0].strip().lower()
+    return BatchPayload(
+        media_type=media_type,
+        body=await request.body(),
+        columns=request.headers.get("x-columns")
+    )
+
+
+def validate_matrix(X: np.ndarray):
+    """
+    Verifie les contraintes de HouseFeatures sur toute la matrice, par colonne.
+
+    Args:
+        X: Matrice (n, 8) dans l'ordre FEATURE_NAMES
+
+    Raises:
+        PayloadError: 422 avec le detail des premieres violations
+    """
+    invalid = ~np.isfinite(X) | (X < FEATURE_LOWER) | (X > FEATURE_UPPER)
+    if not invalid.any():
+        return
+
+    errors = []
+    rows, cols = np.nonzero(invalid)
+    for row, col in zip(rows[:MAX_REPORTED_ERRORS].tolist(), cols[:MAX_REPORTED_ERRORS].tolist()):
+        value = float(X[row, col])
+        errors.append({
+            "loc": ["body", row, FEATURE_NAMES[col]],
+            "msg": f"Valeur hors bornes [{FEATURE_LOWER[col]}, {FEATURE_UPPER[col]}]",
+            # NaN / inf ne sont pas representables en JSON
+            "input": value if np.isfinite(value) else str(value)
+        })
+    raise PayloadError(422, {"invalid_values": int(invalid.sum()), "errors": errors})
+
+
+def _declared_columns(columns: Optional[str]) -> list:
+    if not columns:
+        return FEATURE_NAMES
+    names = [name.strip() for name in columns.split(",")]
+    if sorted(names) != sorted(FEATURE_NAMES):
+        raise PayloadError(400, f"X-Columns doit contenir exactement : {', '.join(FEATURE_NAMES)}")
+    return names
+
+
+def decode_numpy(body: bytes, columns: Optional[str] = None) -> np.ndarray:
+    """
+    Decode une matrice float64 little-endian (ordre ligne).
+
+    Sans reordonnancement de colonnes, la matrice est une vue sur le
+    buffer de la requete (aucune copie).
+    """
+    names = _declared_columns(columns)
+    itemsize = np.dtype("<f8").itemsize
+    if len(body) % (itemsize * len(names)) != 0:
+        raise PayloadError(400, f"Taille du corps incompatible avec une matrice float64 a {len(names)} colonnes")
+
+    X = np.frombuffer(body, dtype="<f8").reshape(-1, len(names))
+    if names != FEATURE_NAMES:
+        X = X[:, [names.index(name) for name in FEATURE_NAMES]]
+    return X
+
+
+def decode_arrow(body: bytes) -> np.ndarray:
+    """
+    Decode un stream Arrow IPC en matrice (n, 8) dans l'ordre FEATURE_NAMES.
+
+    Chaque colonne est lue sans copie (to_numpy) puis ecrite une seule fois
+    dans la matrice d'inference. Seules les colonnes entieres ou flottantes
+    sont acceptees (ni booleen, ni texte, ni date).
+
+    Raises:
+        PayloadError: 400 si le stream est illisible, une colonne manquante
+            ou en double ; 422 si une colonne est nulle ou non numerique
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise PayloadError(415, "Format Arrow indisponible : pyarrow n'est pas installe")
+
+    try:
+        table = pa.ipc.open_stream(body).read_all()
+    except pa.ArrowException as e:
+        raise PayloadError(400, f"Stream Arrow invalide : {e}")
+
+    names = table.column_names
+    duplicated = sorted({name for name in names if names.count(name) > 1})
+    if duplicated:
+        raise PayloadError(400, f"Colonnes en double : {duplicated}")
+    missing = set(FEATURE_NAMES) - set(names)
+    if missing:
+        raise PayloadError(400, f"Colonnes manquantes : {sorted(missing)}")
+
+    X = np.empty((table.num_rows, len(FEATURE_NAMES)))
+    for i, name in enumerate(FEATURE_NAMES):
+        column = table.column(name)
+        if not (pa.types.is_floating(column.type) or pa.types.is_integer(column.type)):
+            raise PayloadError(422, f"Colonne {name} de type {column.type} : entier ou flottant attendu")
+        if column.null_count:
+            raise PayloadError(422, f"Valeurs nulles dans la colonne {name}")
+        try:
+            X[:, i] = column.to_numpy()
+        except (pa.ArrowException, TypeError, ValueError) as e:
+            raise PayloadError(422, f"Colonne {name} illisible : {e}")
+    return X
+
+
+def decode_batch(payload: BatchPayload):
+    """
+    Decode le corps de /predict-batch.
+
+    Returns:
+        tuple: (X, houses) ; X est la matrice (n, 8) pour les formats
+            binaires, houses la liste de HouseFeatures pour le JSON
+    """
+    if payload.media_type == NUMPY_MEDIA_TYPE:
+        X = decode_numpy(payload.body, payload.columns)
+    elif payload.media_type == ARROW_MEDIA_TYPE:
+        X = decode_arrow(payload.body)
+    elif payload.media_type in (JSON_MEDIA_TYPE, ""):
+        return None, HOUSES_ADAPTER.validate_json(payload.body or b"[]")
+    else:
+        raise PayloadError(415, f"Content-Type non supporte : {payload.media_type}")
+
+    validate_matrix(X)
+    return X, None
+
+
+def encode_numpy(result: dict) -> Response:
+    """Reponse matrice float64 little-endian (n, k), colonnes dans X-Columns."""
+    columns = [name for name in RESULT_COLUMNS if result[name] is not None]
+    matrix = np.column_stack([result[name] for name in columns]).astype("<f8", copy=False)
+    return Response(
+        content=np.ascontiguousarray(matrix).tobytes(),
+        media_type=NUMPY_MEDIA_TYPE,
+        headers={"X-Columns": ",".join(columns), "X-Rows": str(len(matrix))}
+    )
+
+
+def encode_arrow(result: dict) -> Response:
+    """Reponse Arrow IPC stream (une colonne par champ du resultat)."""
+    import pyarrow as pa
+
+    arrays, names = [], []
+    for name in RESULT_COLUMNS + ["confidence"]:
+        if result.get(name) is not None:
+            arrays.append(pa.array(result[name]))
+            names.append(name)
+    table = pa.Table.from_arrays(arrays, names=names)
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return Response(content=sink.getvalue().to_pybytes(), media_type=ARROW_MEDIA_TYPE)
+
+
+def encode_batch(media_type: str, result: dict) -> Response:
+    """Encode un resultat de predict_frame() dans le format binaire de la requete."""
+    if media_type == ARROW_MEDIA_TYPE:
+        return encode_arrow(result)
+    return encode_numpy(result)
@@ -0,0 +1,106 @@
+"""
+Cache HTTP des reponses GET : ETag, Last-Modified, Cache-Control et 304.
+
+Les endpoints GET interroges en boucle (load balancer, tableaux de bord)
+renvoient un validateur (ETag, et Last-Modified quand une date a un
+sens) ; un client qui le renvoie (If-None-Match / If-Modified-Since)
+recoit un 304 sans corps, calcule sans serialiser la reponse ni, pour
+GET /predict, appeler le modele.
+
+- /model-info : ETag fort derive du fichier de metadonnees et de la
+  version du modele charge, Last-Modified = date du fichier
+- /health : ETag faible (statut + version ; l'horodatage du corps n'en
+  fait pas partie), Cache-Control no-cache : toujours revalide
+- GET /predict : ETag fort = hash des 8 features et de la version du
+  modele, la prediction etant deterministe pour un modele donne
+
+Configuration (variables d'environnement) :
+- HTTP_CACHE_MAX_AGE : max-age (s) de /model-info (defaut 60)
+- PREDICT_CACHE_MAX_AGE : max-age (s) de GET /predict (defaut 300)
+"""
+
+import hashlib
+import os
+from email.utils import formatdate, parsedate_to_datetime
+
+from fastapi import Response
+
+from .metrics import Counter
+
+HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "60"))
+PREDICT_CACHE_MAX_AGE = int(os.getenv("PREDICT_CACHE_MAX_AGE", "300"))
+
+NOT_MODIFIED = Counter(
+    "http_not_modified_total",
+    "Reponses 304 (validateur du client encore valide), par route",
+    labelnames=("route",)
+)
+
+
+def make_etag(*parts, weak: bool = False) -> str:
+    """
+    ETag entre guillemets a partir de parties str ou bytes.
+
+    Example:
+        >>> make_etag("model-info", signature)
+        '"4f1c2a9e0b7d3e6a51c2"'
+    """
+    digest = hashlib.blake2b(digest_size=10)
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode())
+        digest.update(b"\0")
+    tag = f'"{digest.hexdigest()}"'
+    return f"W/{tag}" if weak else tag
+
+
+def http_date(timestamp: float) -> str:
+    """Date HTTP (RFC 7231), ex. 'Sun, 06 Nov 1994 08:49:37 GMT'."""
+    return formatdate(timestamp, usegmt=True)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # Comparaison faible (RFC 7232 3.2) : W/ ignore des deux cotes
+    if header.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def is_not_modified(request_headers, etag: str, last_modified: float = None) -> bool:
+    """
+    Le client a-t-il deja cette representation ?
+
+    If-None-Match est prioritaire ; If-Modified-Since n'est utilise qu'en
+    son absence (a la seconde pres, resolution des dates HTTP).
+    """
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(last_modified) <= since
+    return False
+
+
+def cache_headers(etag: str, cache_control: str, last_modified: float = None) -> dict:
+    """En-tetes de validation et de cache d'une reponse (200 ou 304)."""
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def not_modified_response(route: str, headers: dict) -> Response:
+    """Reponse 304 sans corps, avec les memes en-tetes de cache que la 200."""
+    NOT_MODIFIED.inc(route)
+    return Response(status_code=304, headers=headers)
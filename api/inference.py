@@ -0,0 +1,282 @@
+"""
+Chemin de prediction vectorise partage par les endpoints.
+"""
+
+import numpy as np
+
+from .dependencies import load_model_and_preprocessor, get_interval_model, get_region_pool
+from .schemas import HouseFeatures
+from .metrics import REGION_ROWS
+from src.models.intervals import predict_with_intervals, prediction_confidence
+from src.models.explain import get_explainer
+from src.models.partial_dependence import CellsNotSupportedError, compress_rows
+from src.models.regional import predict_by_region
+from src.utils.timing import stage
+
+FEATURE_NAMES = list(HouseFeatures.model_fields)
+
+
+def format_price(price: float) -> str:
+    """Formate un prix (en 100k$) en milliers de dollars."""
+    return f"${price * 100:.2f}k"
+
+
+def predict_frame(input_data, model, preprocessor, interval_model=None) -> dict:
+    """
+    Predit un batch complet en une seule passe preprocessing + modele.
+
+    Args:
+        input_data: DataFrame des features brutes (une ligne par maison)
+        model: Modele entraine
+        preprocessor: DataPreprocessor fitte
+        interval_model: QuantileHeads optionnelles
+
+    Returns:
+        dict: Tableaux 'predicted_price', 'lower_bound', 'upper_bound' et
+            'confidence' (bornes a None sans intervalle ; la confiance
+            retombe alors sur les paliers de prix)
+    """
+    processed_data = preprocessor.transform(input_data)
+    prediction, lower, upper = predict_with_intervals(model, processed_data, interval_model)
+
+    return {
+        "predicted_price": prediction,
+        "lower_bound": lower,
+        "upper_bound": upper,
+        "confidence": prediction_confidence(prediction, lower, upper)
+    }
+
+
+def houses_to_matrix(houses) -> np.ndarray:
+    """
+    Construit la matrice (n, 8) des features dans l'ordre FEATURE_NAMES.
+
+    Evite un model_dump() (dict intermediaire) par maison.
+    """
+    with stage("input_conversion"):
+        return np.array(
+            [[getattr(house, name) for name in FEATURE_NAMES] for house in houses],
+            dtype=float
+        ).reshape(-1, len(FEATURE_NAMES))
+
+
+def deduplicate_rows(X: np.ndarray):
+    """
+    Reduit un batch a ses lignes distinctes.
+
+    Chaque ligne (8 float64) est vue comme une cle binaire de 64 octets :
+    deux lignes ne sont fusionnees que si elles sont identiques bit a bit,
+    la prediction des lignes distinctes est donc strictement inchangee.
+
+    Args:
+        X: Matrice (n, 8) validee
+
+    Returns:
+        tuple: (lignes distinctes, indices inverses tels que
+            unique[inverse] == X), inverse vaut None si aucun doublon
+    """
+    if len(X) < 2:
+        return X, None
+    with stage("dedup"):
+        X = np.ascontiguousarray(X)
+        keys = X.view(np.dtype((np.void, X.dtype.itemsize * X.shape[1]))).ravel()
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        if len(first) == len(X):
+            return X, None
+        return X[first], inverse.ravel()
+
+
+def expand_result(result: dict, inverse) -> dict:
+    """Replace les predictions des lignes distinctes aux positions d'origine."""
+    if inverse is None:
+        return result
+    return {key: values[inverse] if values is not None else None for key, values in result.items()}
+
+
+def dedup_ratio(n_rows: int, n_unique: int) -> float:
+    """Part des lignes du batch qui etaient des doublons."""
+    return 1.0 - n_unique / n_rows if n_rows else 0.0
+
+
+def matrix_to_frame(X):
+    """
+    Enveloppe une matrice (n, 8) deja validee dans un DataFrame, sans copie.
+
+    Args:
+        X: ndarray float dans l'ordre FEATURE_NAMES
+    """
+    import pandas as pd
+
+    with stage("dataframe"):
+        return pd.DataFrame(X, columns=FEATURE_NAMES, copy=False)
+
+
+def predict_matrix(X) -> dict:
+    """
+    Travail soumis a l'executor d'inference : preprocessing + prediction.
+
+    Les artefacts sont ceux du processus qui execute le travail (charges
+    une fois par processus), seuls les tableaux NumPy transitent : la
+    fonction fonctionne donc aussi dans un pool de processus.
+
+    Args:
+        X: Matrice (n, 8) validee, dans l'ordre FEATURE_NAMES
+
+    Returns:
+        dict: Resultat de predict_frame()
+    """
+    model, preprocessor = load_model_and_preprocessor()
+    pool = get_region_pool()
+    if pool is None:
+        return predict_frame(matrix_to_frame(X), model, preprocessor, get_interval_model())
+    return predict_frame_by_region(matrix_to_frame(X), X, model, preprocessor, pool, get_interval_model())
+
+
+def predict_frame_by_region(input_data, X, model, preprocessor, pool, interval_model=None) -> dict:
+    """
+    Comme predict_frame(), chaque ligne etant servie par le modele de sa
+    region (un appel par region presente dans le batch).
+
+    Args:
+        input_data: DataFrame des features brutes
+        X: Meme matrice (n, 8) brute (coordonnees pour le routage)
+        pool: RegionalModelPool
+    """
+    processed_data = preprocessor.transform(input_data)
+    result = predict_by_region(processed_data, X[:, 6], X[:, 7], pool, model, interval_model)
+    regional_rows = sum(result.pop("regions").values())
+    REGION_ROWS.inc("regional", amount=regional_rows)
+    REGION_ROWS.inc("global", amount=len(X) - regional_rows)
+
+    result["confidence"] = prediction_confidence(
+        result["predicted_price"], result["lower_bound"], result["upper_bound"]
+    )
+    return result
+
+
+def predict_grid(X, method: str = "auto"):
+    """
+    Travail soumis a l'executor : grille what-if / dependance partielle.
+
+    Un seul preprocessing pour toute la grille ; pour un modele a base
+    d'arbres (method 'auto' ou 'cells'), une seule ligne predite par
+    cellule de seuils distincte (voir src.models.partial_dependence),
+    resultat identique a la prediction de chaque ligne.
+
+    Args:
+        X: Matrice (n, 8) de la grille, dans l'ordre FEATURE_NAMES
+        method: 'auto', 'cells' ou 'brute' (toutes les lignes predites)
+
+    Returns:
+        tuple: (resultat de predict_frame(), infos : 'method' effective
+            et 'evaluated_rows', lignes reellement passees au modele)
+
+    Raises:
+        CellsNotSupportedError: method='cells' avec un modele hors arbres
+    """
+    model, preprocessor = load_model_and_preprocessor()
+    interval_model = get_interval_model()
+    pool = get_region_pool()
+    if pool is not None:
+        # Modeles regionaux : routage ligne a ligne, pas de cellules communes
+        result = predict_frame_by_region(matrix_to_frame(X), X, model, preprocessor, pool, interval_model)
+        return result, {"method": "brute", "evaluated_rows": len(X)}
+
+    processed = preprocessor.transform(matrix_to_frame(X))
+    compressed = compress_rows(processed.to_numpy(), model, interval_model) if method != "brute" else None
+    if compressed is None:
+        if method == "cells":
+            raise CellsNotSupportedError(f"Chemin 'cells' non supporte pour {type(model).__name__} (arbres uniquement)")
+        prediction, lower, upper = predict_with_intervals(model, processed, interval_model)
+        evaluated_rows, method = len(X), "brute"
+    else:
+        first, inverse = compressed
+        prediction, lower, upper = predict_with_intervals(model, processed.iloc[first], interval_model)
+        prediction = prediction[inverse]
+        if lower is not None:
+            lower, upper = lower[inverse], upper[inverse]
+        evaluated_rows, method = len(first), "cells"
+
+    result = {
+        "predicted_price": prediction,
+        "lower_bound": lower,
+        "upper_bound": upper,
+        "confidence": prediction_confidence(prediction, lower, upper)
+    }
+    return result, {"method": method, "evaluated_rows": evaluated_rows}
+
+
+def explain_matrix(X, mode: str = "auto") -> dict:
+    """
+    Travail soumis a l'executor : contributions des features (13 features du modele).
+
+    Args:
+        X: Matrice (n, 8) validee, dans l'ordre FEATURE_NAMES
+        mode: 'exact' (TreeSHAP), 'approx' (Saabas) ou 'auto'
+
+    Returns:
+        dict: 'mode', 'expected_value', 'feature_names', 'contributions' (n, 13)
+            et 'predicted_price' (= expected_value + somme des contributions)
+    """
+    model, preprocessor = load_model_and_preprocessor()
+    explainer = get_explainer(model)
+    mode = explainer.resolve_mode(mode)
+    processed = preprocessor.transform(matrix_to_frame(X))
+    contributions, expected_value = explainer.explain(processed.to_numpy(), mode)
+    return {
+        "mode": mode,
+        "expected_value": expected_value,
+        "feature_names": list(processed.columns),
+        "contributions": contributions,
+        "predicted_price": expected_value + contributions.sum(axis=1)
+    }
+
+
+def empty_result() -> dict:
+    """Resultat d'un batch vide (sans appel au modele)."""
+    return {"predicted_price": np.empty(0), "lower_bound": None, "upper_bound": None, "confidence": None}
+
+
+def _tolist(values):
+    return values.tolist() if values is not None else None
+
+
+def result_records(result: dict, features=None) -> list:
+    """
+    Convertit un resultat de predict_frame() en une liste de dict (format=records).
+
+    Args:
+        result: Sortie de predict_frame()
+        features: Liste optionnelle des features a renvoyer, une par ligne
+
+    Returns:
+        list: Un dict de types Python natifs par maison
+    """
+    prices = result["predicted_price"].tolist()
+    lower = _tolist(result["lower_bound"])
+    upper = _tolist(result["upper_bound"])
+    confidence = _tolist(result["confidence"])
+
+    records = []
+    for i, price in enumerate(prices):
+        record = {
+            "predicted_price": price,
+            "predicted_price_formatted": format_price(price),
+            "lower_bound": lower[i] if lower is not None else None,
+            "upper_bound": upper[i] if upper is not None else None,
+            "confidence": confidence[i] if confidence is not None else None
+        }
+        if features is not None:
+            record["features"] = features[i]
+        records.append(record)
+    return records
+
+
+def result_columns(result: dict) -> dict:
+    """Convertit un resultat de predict_frame() en colonnes (format=columnar)."""
+    return {
+        "predicted_price": result["predicted_price"].tolist(),
+        "lower_bound": _tolist(result["lower_bound"]),
+        "upper_bound": _tolist(result["upper_bound"]),
+        "confidence": _tolist(result["confidence"])
+    }
@@ -2,23 +2,34 @@
 API FastAPI pour la prediction de prix immobiliers.
 """
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-import uvicorn
-import sys
-import os
-
-# Ajouter le dossier parent au path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 # Import des routers (imports relatifs)
-from endpoints import router
+from .endpoints import router
+from .metrics import setup_metrics
+from .profiling import setup_profiling
+from .responses import ORJSONResponse
+from .executor import shutdown_executor
+from .shadow import shutdown_shadow
+
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    # Arrêt propre du pool d'inférence
+    shutdown_executor()
+    shutdown_shadow()
+
 
 # Créer l'application FastAPI
 app = FastAPI(
     title="Real Estate Price Predictor API",
     description="API de prediction de prix immobiliers avec ML",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # CORS (pour permettre les appels depuis un frontend)
@@ -30,6 +41,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Métriques Prometheus (/metrics, latence par route et par étape)
+setup_metrics(app)
+
+# Profilage à la demande (/admin/profile), absent si PROFILING_ENABLED=false
+setup_profiling(app)
+
 # Inclure les routes
 app.include_router(router)
 
@@ -45,4 +62,5 @@ def root():
     }
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    import uvicorn
+    uvicorn.run("api.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -0,0 +1,242 @@
+"""
+Metriques au format Prometheus pour l'API.
+
+Registre minimal (Counter / Gauge / Histogram) sans dependance externe,
+middleware ASGI de latence par route et endpoint /metrics.
+Desactivable avec METRICS_ENABLED=false : le middleware n'est pas
+installe et les timers d'etapes (src.utils.timing) deviennent des no-op.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from src.utils.timing import set_stage_sink
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+BATCH_SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None) -> str:
+    pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        with self._lock:
+            series = list(self._series.items())
+        for labels, value in sorted(series):
+            lines.extend(self._render_series(labels, value))
+        return lines
+
+    def _render_series(self, labels, value) -> list:
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    """Compteur monotone."""
+
+    type_name = "counter"
+
+    def inc(self, *labels, amount: float = 1.0):
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """Valeur instantanee."""
+
+    type_name = "gauge"
+
+    def set(self, value: float, *labels):
+        with self._lock:
+            self._series[labels] = float(value)
+
+
+class Histogram(_Metric):
+    """Histogramme a buckets fixes (rendu cumulatif a l'export)."""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels):
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][idx] += 1
+            series[1] += value
+
+    def _render_series(self, labels, value) -> list:
+        counts, total = value
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+        label_str = _format_labels(self.labelnames, labels)
+        lines.append(f"{self.name}_sum{label_str} {_format_value(total)}")
+        lines.append(f"{self.name}_count{label_str} {cumulative}")
+        return lines
+
+
+REGISTRY = []
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Duree des requetes HTTP par route",
+    labelnames=("method", "route", "status")
+)
+STAGE_LATENCY = Histogram(
+    "prediction_stage_duration_seconds",
+    "Duree des etapes du pipeline de prediction",
+    labelnames=("stage",)
+)
+BATCH_SIZE = Histogram(
+    "predict_batch_size",
+    "Nombre de maisons par requete /predict-batch",
+    buckets=BATCH_SIZE_BUCKETS
+)
+BATCH_DEDUP_RATIO = Histogram(
+    "predict_batch_dedup_ratio",
+    "Part des lignes en doublon par requete /predict-batch",
+    buckets=(0.0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+)
+DRIFT_PSI = Gauge(
+    "feature_drift_psi",
+    "PSI de la derniere fenetre de derive terminee, par feature",
+    labelnames=("feature",)
+)
+DRIFT_KS = Gauge(
+    "feature_drift_ks",
+    "Statistique KS de la derniere fenetre de derive terminee, par feature",
+    labelnames=("feature",)
+)
+REGION_MODEL_LOADS = Counter(
+    "region_model_loads_total",
+    "Chargements de modeles regionaux (pool LRU)"
+)
+REGION_MODEL_EVICTIONS = Counter(
+    "region_model_evictions_total",
+    "Modeles regionaux retires du pool LRU"
+)
+REGION_ROWS = Counter(
+    "region_rows_total",
+    "Lignes predites par modele (regional ou global)",
+    labelnames=("model",)
+)
+MODEL_LOAD_SECONDS = Gauge(
+    "model_load_seconds",
+    "Duree du dernier chargement modele + preprocessor"
+)
+
+
+def render_metrics() -> str:
+    """Exporte le registre au format texte Prometheus."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def _record_stage(name: str, seconds: float):
+    STAGE_LATENCY.observe(seconds, name)
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI mesurant la latence par route.
+
+    Le label 'route' est le chemin declare (ex: /predict), pas l'URL
+    brute, pour garder une cardinalite bornee.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_LATENCY.observe(time.perf_counter() - start, scope["method"], route, str(status[0]))
+
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    """Metriques au format texte Prometheus."""
+    return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE)
+
+
+def setup_metrics(app):
+    """
+    Installe le middleware, les timers d'etapes et l'endpoint /metrics.
+
+    Args:
+        app: Application FastAPI
+    """
+    if not METRICS_ENABLED:
+        set_stage_sink(None)
+        return
+    set_stage_sink(_record_stage)
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(router, tags=["System"])
@@ -0,0 +1,255 @@
+"""
+Profilage a la demande du chemin de prediction (echantillonnage de piles).
+
+Complementaire des metriques : on veut savoir ou part le temps
+(DataPreprocessor.transform, model.predict, ...) dans les requetes
+lentes, sans redeployer. Une requete est profilee si elle est tiree au
+sort (PROFILING_SAMPLE_RATE) ou si elle porte l'en-tete X-Profile egal a
+PROFILING_TOKEN. Pendant que l'executor
+d'inference execute son travail, un thread d'echantillonnage releve la
+pile du worker toutes les PROFILING_INTERVAL_MS (sys._current_frames) ;
+les piles sont agregees au format "folded" (une ligne
+"racine;...;feuille nombre", compatible flamegraph.pl, speedscope,
+inferno) et servies par GET /admin/profile, la racine etant la requete
+(ex: "POST /predict").
+
+Cout : PROFILING_ENABLED=false (defaut) n'installe ni middleware ni
+endpoint et l'executor ne fait qu'un test sur une variable globale. Sans
+PROFILING_TOKEN, le profilage reste desactive : n'importe quel client
+pourrait sinon forcer le profilage et lire /admin/profile. Actif,
+le thread d'echantillonnage dort tant qu'aucune requete profilee n'est en
+cours. Echantillonnage en temps reel du worker : le temps passe dans
+NumPy / sklearn est attribue a la fonction Python appelante. Seul
+l'executor 'thread' est profile (en mode 'process', le travail tourne
+dans un autre processus).
+
+Configuration (variables d'environnement) :
+- PROFILING_ENABLED : active le profilage (defaut false)
+- PROFILING_SAMPLE_RATE : fraction des requetes profilees (defaut 0)
+- PROFILING_INTERVAL_MS : intervalle d'echantillonnage (defaut 5)
+- PROFILING_MAX_STACKS : piles distinctes conservees (defaut 10000)
+- PROFILING_TOKEN : obligatoire, attendu dans X-Profile et X-Admin-Token (/admin/profile)
+"""
+
+import contextvars
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter as StackCounter
+
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_INTERVAL_SECONDS = float(os.getenv("PROFILING_INTERVAL_MS", "5")) / 1000
+PROFILING_MAX_STACKS = int(os.getenv("PROFILING_MAX_STACKS", "10000"))
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN")
+
+PROFILE_HEADER = b"x-profile"
+
+# Profileur actif (None : desactive, aucun cout sur le chemin de prediction)
+_profiler = None
+_request_tag = contextvars.ContextVar("profile_request_tag", default=None)
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    # co_qualname : Python 3.11+
+    return f"{frame.f_globals.get('__name__', '?')}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+class SamplingProfiler:
+    """
+    Echantillonneur de piles des threads enregistres.
+
+    Attributes:
+        interval (float): Secondes entre deux releves
+        max_stacks (int): Piles distinctes au-dela desquelles les nouvelles
+            sont comptees dans 'dropped_samples'
+    """
+
+    def __init__(self, interval: float = PROFILING_INTERVAL_SECONDS, max_stacks: int = PROFILING_MAX_STACKS):
+        self.interval = interval
+        self.max_stacks = max_stacks
+        self._lock = threading.Lock()
+        self._active = {}               # ident du thread -> (etiquette, frame de base)
+        self._wakeup = threading.Event()
+        self._thread = None
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.stacks = StackCounter()
+            self.samples = 0
+            self.dropped_samples = 0
+            self.requests = 0
+            self.started_at = time.time()
+
+    def call(self, tag: str, fn, *args):
+        """Execute fn(*args) dans le thread courant en echantillonnant sa pile."""
+        ident = threading.get_ident()
+        with self._lock:
+            self._active[ident] = (tag, sys._getframe())
+            self.requests += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                del self._active[ident]
+                if not self._active:
+                    self._wakeup.clear()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            time.sleep(self.interval)
+            self.sample()
+
+    def sample(self):
+        """Un releve : une pile par thread enregistre."""
+        frames = sys._current_frames()
+        with self._lock:
+            for ident, (tag, base) in self._active.items():
+                frame = frames.get(ident)
+                names = []
+                # De la feuille jusqu'a call() exclu : pas de frames du pool de threads
+                while frame is not None and frame is not base:
+                    names.append(_frame_name(frame))
+                    frame = frame.f_back
+                names.append(tag)
+                stack = ";".join(reversed(names))
+                if stack in self.stacks or len(self.stacks) < self.max_stacks:
+                    self.stacks[stack] += 1
+                    self.samples += 1
+                else:
+                    self.dropped_samples += 1
+
+    def folded(self) -> str:
+        """Piles au format folded, les plus frequentes d'abord."""
+        with self._lock:
+            items = self.stacks.most_common()
+        return "".join(f"{stack} {count}\n" for stack, count in items)
+
+
+def get_profiler():
+    """Profileur du processus, None si le profilage est desactive."""
+    return _profiler
+
+
+def request_tag():
+    """Etiquette de la requete courante si elle est profilee, sinon None."""
+    if _profiler is None:
+        return None
+    return _request_tag.get()
+
+
+def profiled_call(tag: str, fn, *args):
+    """Point d'entree du pool : fn(*args) sous echantillonnage (no-op si desactive)."""
+    if _profiler is None:
+        return fn(*args)
+    return _profiler.call(tag, fn, *args)
+
+
+class ProfilingMiddleware:
+    """Tire au sort (ou lit X-Profile) et marque les requetes HTTP profilees."""
+
+    def __init__(self, app, sample_rate: float = PROFILING_SAMPLE_RATE, token: str = PROFILING_TOKEN):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.token = token
+
+    def _wanted(self, scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                return _token_matches(value.decode("latin-1"), self.token)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_header(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-profiled", b"1")]
+            await send(message)
+
+        token = _request_tag.set(f"{scope['method']} {scope['path']}")
+        try:
+            await self.app(scope, receive, send_with_header)
+        finally:
+            _request_tag.reset(token)
+
+
+router = APIRouter()
+
+
+def _token_matches(value, token) -> bool:
+    return bool(token) and value is not None and hmac.compare_digest(value.encode(), token.encode())
+
+
+def _check_admin(x_admin_token):
+    if not _token_matches(x_admin_token, PROFILING_TOKEN):
+        raise HTTPException(status_code=403, detail="Jeton d'administration invalide")
+
+
+@router.get("/admin/profile", response_class=PlainTextResponse)
+def profile_report(
+    reset: bool = Query(False, description="Remettre les piles a zero apres lecture"),
+    x_admin_token: str = Header(None, alias="X-Admin-Token")
+):
+    """
+    Piles echantillonnees au format folded (flamegraph.pl, speedscope).
+
+    En-tetes : X-Profile-Requests, X-Profile-Samples, X-Profile-Dropped-Samples,
+    X-Profile-Interval-Ms et X-Profile-Since (horodatage de la derniere remise a zero).
+    """
+    _check_admin(x_admin_token)
+    profiler = _profiler
+    body = profiler.folded()
+    headers = {
+        "X-Profile-Requests": str(profiler.requests),
+        "X-Profile-Samples": str(profiler.samples),
+        "X-Profile-Dropped-Samples": str(profiler.dropped_samples),
+        "X-Profile-Interval-Ms": f"{profiler.interval * 1000:g}",
+        "X-Profile-Since": f"{profiler.started_at:.0f}"
+    }
+    if reset:
+        profiler.reset()
+    return PlainTextResponse(body, headers=headers)
+
+
+@router.delete("/admin/profile", status_code=204)
+def profile_reset(x_admin_token: str = Header(None, alias="X-Admin-Token")):
+    """Remet les piles a zero."""
+    _check_admin(x_admin_token)
+    _profiler.reset()
+
+
+def setup_profiling(app):
+    """
+    Installe le middleware et /admin/profile si PROFILING_ENABLED et PROFILING_TOKEN.
+
+    Args:
+        app: Application FastAPI
+    """
+    global _profiler
+    if not PROFILING_ENABLED:
+        _profiler = None
+        return
+    if not PROFILING_TOKEN:
+        _profiler = None
+        print(" PROFILING_ENABLED ignore : PROFILING_TOKEN doit etre defini")
+        return
+    _profiler = SamplingProfiler()
+    app.add_middleware(ProfilingMiddleware)
+    app.include_router(router, tags=["System"])
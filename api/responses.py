@@ -0,0 +1,29 @@
+"""
+Classes de reponse de l'API.
+"""
+
+from fastapi.responses import JSONResponse
+
+from src.utils.timing import stage
+
+try:
+    import orjson
+except ImportError:  # orjson optionnel : repli sur json de la stdlib
+    orjson = None
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    Reponse JSON serialisee avec orjson (repli sur json si absent).
+
+    Les endpoints de prediction renvoient directement cette reponse avec
+    des dict/list de types natifs : FastAPI ne repasse alors ni par la
+    validation du response_model ni par jsonable_encoder.
+    La serialisation est mesuree (etape 'serialization' des metriques).
+    """
+
+    def render(self, content) -> bytes:
+        with stage("serialization"):
+            if orjson is None:
+                return super().render(content)
+            return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
@@ -2,8 +2,8 @@
 Schemas Pydantic pour validation des donnees.
 """
 
-from pydantic import BaseModel, Field
-from typing import List, Dict, Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Dict, Literal, Optional, Union
 
 class HouseFeatures(BaseModel):
     """Features d'une maison pour prediction."""
@@ -36,9 +36,220 @@ class PredictionResponse(BaseModel):
     
     predicted_price: float = Field(..., description="Prix predit (en 100k$)")
     predicted_price_formatted: str = Field(..., description="Prix formate")
+    lower_bound: Optional[float] = Field(None, description="Borne basse de l'intervalle de prediction (en 100k$)")
+    upper_bound: Optional[float] = Field(None, description="Borne haute de l'intervalle de prediction (en 100k$)")
+    confidence: Optional[str] = Field(None, description="Niveau de confiance (largeur relative de l'intervalle, a defaut palier de prix)")
+    features_used: Optional[Dict[str, float]] = Field(None, description="Features utilisees (omis si include_features=false)")
+
+class BatchPrediction(BaseModel):
+    """Prediction d'une maison dans un batch."""
+    
+    predicted_price: float = Field(..., description="Prix predit (en 100k$)")
+    predicted_price_formatted: str = Field(..., description="Prix formate")
+    lower_bound: Optional[float] = Field(None, description="Borne basse (en 100k$)")
+    upper_bound: Optional[float] = Field(None, description="Borne haute (en 100k$)")
     confidence: Optional[str] = Field(None, description="Niveau de confiance")
-    features_used: Dict[str, float] = Field(..., description="Features utilisees")
+    features: Optional[Dict[str, float]] = Field(None, description="Features recues (omis si include_features=false)")
+
+class BatchPredictionResponse(BaseModel):
+    """Reponse de prediction batch, une entree par maison (format=records)."""
+    
+    count: int
+    dedup_ratio: float = Field(0.0, description="Part des lignes en doublon, predites une seule fois")
+    predictions: List[BatchPrediction]
+
+class ColumnarBatchPredictionResponse(BaseModel):
+    """Reponse de prediction batch en colonnes (format=columnar)."""
+    
+    count: int
+    dedup_ratio: float = Field(0.0, description="Part des lignes en doublon, predites une seule fois")
+    predicted_price: List[float] = Field(..., description="Prix predits (en 100k$), dans l'ordre de la requete")
+    lower_bound: Optional[List[float]] = None
+    upper_bound: Optional[List[float]] = None
+    confidence: Optional[List[str]] = None
+    features: Optional[Dict[str, List[float]]] = Field(None, description="Features recues, par colonne")
+    
+class Explanation(BaseModel):
+    """Contributions des features pour une maison."""
     
+    predicted_price: float = Field(..., description="Prix predit (en 100k$) = expected_value + somme des contributions")
+    contributions: Dict[str, float] = Field(..., description="Contribution de chaque feature du modele (en 100k$)")
+
+class ExplainResponse(BaseModel):
+    """Reponse /explain."""
+    
+    count: int
+    mode: str = Field(..., description="'exact' (TreeSHAP) ou 'approx' (Saabas)")
+    model_version: str
+    expected_value: float = Field(..., description="Prediction moyenne du modele (en 100k$)")
+    feature_names: List[str]
+    explanations: List[Explanation]
+
+class FeatureDrift(BaseModel):
+    """Derive d'une feature."""
+    
+    psi: float = Field(..., description="Population Stability Index")
+    ks: float = Field(..., description="Statistique de Kolmogorov-Smirnov (sur les bins)")
+    status: str = Field(..., description="stable, moderate, significant ou insufficient_data")
+
+class DriftWindow(BaseModel):
+    """Comparaison d'une periode a la baseline."""
+    
+    n_rows: int
+    max_psi: float
+    status: str
+    window_start: Optional[float] = None
+    window_end: Optional[float] = None
+    features: Dict[str, FeatureDrift]
+
+class DriftReport(BaseModel):
+    """Reponse /drift."""
+    
+    window_seconds: float
+    current: DriftWindow
+    last_window: Optional[DriftWindow] = None
+    cumulative: DriftWindow
+
+class ShadowDelta(BaseModel):
+    """Ecarts candidat - production (en 100k$), sur les lignes comparees."""
+    
+    mean: Optional[float] = None
+    mae: Optional[float] = None
+    rmse: Optional[float] = None
+    max_abs: Optional[float] = None
+    mean_relative: Optional[float] = Field(None, description="Moyenne de |ecart| / prix de production")
+    divergent_fraction: Optional[float] = Field(None, description="Part des lignes avec un ecart relatif > 10 %")
+
+class ShadowReport(BaseModel):
+    """Reponse /shadow."""
+    
+    status: str = Field(..., description="loading, running ou failed (candidat non chargeable, evaluation arretee)")
+    production_version: Optional[str] = None
+    candidate_version: Optional[str] = Field(None, description="None tant que le candidat n'est pas charge")
+    candidate_model: Optional[str] = None
+    sample_rate: float
+    pending_rows: int
+    compared_rows: int
+    dropped_rows: int = Field(..., description="Lignes ignorees (file pleine)")
+    errors: int
+    last_error: Optional[str] = None
+    delta: ShadowDelta
+    latency: Dict[str, Dict[str, Optional[float]]] = Field(
+        ..., description="production / shadow : mean_ms, max_ms, per_row_us"
+    )
+
+class GridInfo(BaseModel):
+    """Description de la grille de prix precalculee."""
+    
+    model_version: str
+    step: float = Field(..., description="Pas de la grille (degres)")
+    latitude_range: List[float]
+    longitude_range: List[float]
+    shape: List[int] = Field(..., description="(profils, latitudes, longitudes)")
+    profiles: Dict[str, Dict[str, float]] = Field(..., description="Features hors localisation de chaque profil")
+
+class GridPointResponse(BaseModel):
+    """Prix interpole en un point de la grille."""
+    
+    profile: str
+    latitude: float
+    longitude: float
+    predicted_price: float = Field(..., description="Prix interpole (en 100k$)")
+    predicted_price_formatted: str
+    model_version: str
+
+class GridTileResponse(BaseModel):
+    """Tuile de la grille de prix."""
+    
+    profile: str
+    model_version: str
+    latitudes: List[float]
+    longitudes: List[float]
+    prices: List[List[float]] = Field(..., description="Prix (en 100k$), une ligne par latitude")
+
+FeatureName = Literal[
+    "MedInc", "HouseAge", "AveRooms", "AveBedrms", "Population", "AveOccup", "Latitude", "Longitude"
+]
+
+class FeatureSweep(BaseModel):
+    """Feature balayee : num points de start a stop inclus, ou liste de valeurs."""
+    
+    feature: FeatureName
+    start: Optional[float] = None
+    stop: Optional[float] = None
+    num: int = Field(20, ge=2, le=200, description="Nombre de points (si values absent)")
+    values: Optional[List[float]] = Field(None, min_length=1, max_length=200, description="Valeurs explicites")
+    
+    @model_validator(mode="after")
+    def check_range(self):
+        if self.values is None and (self.start is None or self.stop is None):
+            raise ValueError("start et stop (ou values) sont requis")
+        # Memes bornes que HouseFeatures : la grille reste dans le domaine valide
+        metadata = HouseFeatures.model_fields[self.feature].metadata
+        ge = next((m.ge for m in metadata if hasattr(m, "ge")), None)
+        le = next((m.le for m in metadata if hasattr(m, "le")), None)
+        swept = self.values if self.values is not None else [self.start, self.stop]
+        for value in swept:
+            if (ge is not None and value < ge) or (le is not None and value > le):
+                raise ValueError(f"{self.feature}={value} hors des bornes de HouseFeatures")
+        return self
+
+class WhatIfRequest(BaseModel):
+    """Maison de base et une ou deux features balayees."""
+    
+    base: HouseFeatures
+    sweep: List[FeatureSweep] = Field(..., min_length=1, max_length=2)
+    
+    @model_validator(mode="after")
+    def check_features(self):
+        if len({s.feature for s in self.sweep}) != len(self.sweep):
+            raise ValueError("Une feature ne peut etre balayee qu'une fois")
+        return self
+
+class WhatIfResponse(BaseModel):
+    """Courbe (une feature) ou surface (deux features) de prix."""
+    
+    features: List[str]
+    axes: List[List[float]] = Field(..., description="Valeurs balayees, une liste par feature")
+    base_price: float = Field(..., description="Prix predit pour la maison de base (en 100k$)")
+    predicted_price: Union[List[float], List[List[float]]] = Field(
+        ..., description="Prix (en 100k$) ; surface : une ligne par valeur de la premiere feature"
+    )
+    lower_bound: Optional[Union[List[float], List[List[float]]]] = None
+    upper_bound: Optional[Union[List[float], List[List[float]]]] = None
+    grid_points: int
+    evaluated_rows: int = Field(..., description="Lignes reellement passees au modele")
+    method: str = Field(..., description="'cells' (cellules de seuils des arbres) ou 'brute'")
+    model_version: str
+
+class PartialDependenceRequest(BaseModel):
+    """Dependance partielle sur un echantillon de maisons."""
+    
+    houses: List[HouseFeatures] = Field(..., min_length=1, description="Population de reference")
+    sweep: List[FeatureSweep] = Field(..., min_length=1, max_length=2)
+    sample_size: int = Field(200, ge=1, le=5000, description="Maisons tirees (sans remise) dans la population")
+    seed: Optional[int] = Field(None, description="Graine du tirage (resultat reproductible)")
+    
+    @model_validator(mode="after")
+    def check_features(self):
+        if len({s.feature for s in self.sweep}) != len(self.sweep):
+            raise ValueError("Une feature ne peut etre balayee qu'une fois")
+        return self
+
+class PartialDependenceResponse(BaseModel):
+    """Moyenne et dispersion des courbes individuelles (ICE)."""
+    
+    features: List[str]
+    axes: List[List[float]]
+    average: Union[List[float], List[List[float]]] = Field(..., description="Prix moyen de l'echantillon (en 100k$)")
+    ice_p10: Union[List[float], List[List[float]]] = Field(..., description="10e centile des courbes individuelles")
+    ice_p90: Union[List[float], List[List[float]]] = Field(..., description="90e centile des courbes individuelles")
+    sample_size: int
+    grid_points: int
+    evaluated_rows: int
+    method: str
+    model_version: str
+
 class ModelInfo(BaseModel):
     """Informations sur le modele."""
     
@@ -0,0 +1,197 @@
+"""
+Point d'entree de production multi-processus.
+
+Le processus parent charge le modele et le preprocessor, gele le tas
+Python (gc.freeze) puis forke les workers : les arbres et tableaux
+NumPy sont partages en copy-on-write au lieu d'etre recharges par
+chaque worker. Le socket est ouvert une seule fois dans le parent et
+herite par les workers (uvicorn), chacun epingle sur un CPU.
+
+SIGTERM / SIGINT : le parent relaie SIGTERM aux workers (uvicorn termine
+les requetes en cours), attend --graceful-timeout secondes puis tue les
+retardataires. Un worker qui meurt hors arret est relance.
+
+Usage (depuis la racine du projet):
+    python -m api.serve --workers 4 --port 8000
+"""
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import time
+
+import uvicorn
+
+
+def _available_cpus() -> list:
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def _bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class PreforkServer:
+    """
+    Superviseur pre-fork : un parent, N workers uvicorn sur un socket partage.
+
+    Attributes:
+        app: Application ASGI deja importee (modele precharge)
+        workers (int): Nombre de workers
+        pin_cpus (bool): Epingler chaque worker sur un CPU
+        graceful_timeout (float): Delai avant SIGKILL a l'arret
+    """
+
+    def __init__(self, app, host="0.0.0.0", port=8000, workers=1, pin_cpus=True,
+                 graceful_timeout=30.0, log_level="info"):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.pin_cpus = pin_cpus
+        self.graceful_timeout = graceful_timeout
+        self.log_level = log_level
+        self.children = {}  # pid -> index du worker
+        self.sock = None
+        self._stopping = False
+
+    def _run_worker(self, index: int):
+        """Corps d'un worker (processus enfant) ; ne retourne jamais."""
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+        if self.pin_cpus and hasattr(os, "sched_setaffinity"):
+            cpus = _available_cpus()
+            os.sched_setaffinity(0, {cpus[index % len(cpus)]})
+
+        config = uvicorn.Config(self.app, log_level=self.log_level)
+        server = uvicorn.Server(config)
+        exit_code = 0
+        try:
+            server.run(sockets=[self.sock])
+        except Exception as e:
+            print(f" Worker {index} arrete sur erreur : {e}")
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+
+    def _spawn(self, index: int):
+        pid = os.fork()
+        if pid == 0:
+            self._run_worker(index)
+        self.children[pid] = index
+        print(f" Worker {index} demarre (pid {pid})")
+
+    def _handle_stop(self, signum, frame):
+        self._stopping = True
+
+    def _shutdown(self):
+        print(" Arret des workers...")
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                self.children.pop(pid, None)
+
+        deadline = time.monotonic() + self.graceful_timeout
+        while self.children and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.05)
+
+        for pid in list(self.children):
+            print(f" Worker pid {pid} force (SIGKILL)")
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+            self.children.pop(pid, None)
+
+    def _reap(self) -> list:
+        """Recupere les workers termines ; retourne leurs index."""
+        exited = []
+        while self.children:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.children.clear()
+                break
+            if pid == 0:
+                break
+            index = self.children.pop(pid, None)
+            if index is not None:
+                exited.append(index)
+        return exited
+
+    def run(self):
+        """Ouvre le socket, forke les workers et supervise jusqu'a l'arret."""
+        self.sock = _bind_socket(self.host, self.port)
+
+        # Les objets charges avant le fork ne seront plus parcourus par le GC
+        # des workers : leurs pages restent partagees.
+        gc.collect()
+        gc.freeze()
+
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+
+        print(f" Ecoute sur {self.host}:{self.port} avec {self.workers} worker(s)")
+        for index in range(self.workers):
+            self._spawn(index)
+
+        try:
+            while not self._stopping:
+                for index in self._reap():
+                    if not self._stopping:
+                        print(f" Worker {index} termine, relance")
+                        self._spawn(index)
+                time.sleep(0.2)
+        finally:
+            self._shutdown()
+            self.sock.close()
+            print(" Serveur arrete")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serveur de production multi-processus")
+    parser.add_argument("--host", default=os.getenv("API_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("API_PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("API_WORKERS", str(len(_available_cpus())))))
+    parser.add_argument("--no-pin", action="store_true", help="Ne pas epingler les workers sur un CPU")
+    parser.add_argument("--graceful-timeout", type=float, default=30.0)
+    parser.add_argument("--log-level", default=os.getenv("LOG_LEVEL", "info").lower())
+    args = parser.parse_args(argv)
+
+    # Prechargement dans le parent, avant le fork
+    from .dependencies import load_model_and_preprocessor, get_price_grid
+    load_model_and_preprocessor()
+    try:
+        # Reconstruite ici si le modele a change : les workers partagent le memory-map
+        get_price_grid()
+    except Exception as e:
+        print(f" Grille de prix non prechargee : {e}")
+    from .main import app
+
+    PreforkServer(
+        app,
+        host=args.host,
+        port=args.port,
+        workers=max(1, args.workers),
+        pin_cpus=not args.no_pin,
+        graceful_timeout=args.graceful_timeout,
+        log_level=args.log_level
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
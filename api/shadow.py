@@ -0,0 +1,289 @@
+"""
+Evaluation d'un modele candidat (shadow) sur une fraction du trafic reel.
+
+Le candidat est charge avec le meme mecanisme que le modele de production
+(dependencies.load_artifacts) depuis SHADOW_MODEL_DIR. Sur le chemin de
+la requete, on ne fait qu'un tirage et, pour les lignes retenues, un
+ajout dans une file bornee : le candidat est evalue par un thread de
+fond, par batchs, et la reponse au client ne depend jamais de lui.
+
+Configuration (variables d'environnement) :
+- SHADOW_MODEL_DIR : dossier des artefacts candidats (absent : desactive)
+- SHADOW_SAMPLE_RATE : fraction des lignes evaluees (defaut 0.1)
+- SHADOW_MAX_PENDING_ROWS : lignes en attente au-dela desquelles les
+  nouvelles sont ignorees (comptees dans 'dropped_rows')
+- SHADOW_BATCH_ROWS / SHADOW_FLUSH_SECONDS : taille cible d'un batch et
+  attente maximale avant d'evaluer un batch incomplet
+"""
+
+import os
+import random
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from .dependencies import load_artifacts, get_model_version
+from .inference import matrix_to_frame, predict_frame
+from .metrics import Counter, Histogram
+from src.utils.timing import set_thread_stage_sink
+
+SHADOW_MODEL_DIR = os.getenv("SHADOW_MODEL_DIR")
+SHADOW_SAMPLE_RATE = float(os.getenv("SHADOW_SAMPLE_RATE", "0.1"))
+SHADOW_MAX_PENDING_ROWS = int(os.getenv("SHADOW_MAX_PENDING_ROWS", "10000"))
+SHADOW_BATCH_ROWS = int(os.getenv("SHADOW_BATCH_ROWS", "1024"))
+SHADOW_FLUSH_SECONDS = float(os.getenv("SHADOW_FLUSH_SECONDS", "0.5"))
+
+# Ecart relatif au-dela duquel une prediction est comptee comme "divergente"
+DIVERGENCE_THRESHOLD = 0.1
+
+SHADOW_ROWS = Counter(
+    "shadow_rows_total",
+    "Lignes envoyees au modele candidat, par issue (scored, dropped, error)",
+    labelnames=("outcome",)
+)
+SHADOW_ABS_DELTA = Histogram(
+    "shadow_abs_delta",
+    "Ecart absolu candidat - production (en 100k$)",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+
+
+class ShadowStats:
+    """Agregats en memoire des ecarts et latences (aucune prediction stockee)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.compared_rows = 0
+        self.sum_delta = 0.0
+        self.sum_abs_delta = 0.0
+        self.sum_sq_delta = 0.0
+        self.max_abs_delta = 0.0
+        self.sum_rel_delta = 0.0
+        self.divergent_rows = 0
+        self.production_calls = 0
+        self.production_rows = 0
+        self.production_seconds = 0.0
+        self.production_max_seconds = 0.0
+        self.shadow_batches = 0
+        self.shadow_seconds = 0.0
+        self.shadow_max_seconds = 0.0
+        self.dropped_rows = 0
+        self.errors = 0
+        self.last_error = None
+
+    def record_production(self, n_rows: int, seconds: float):
+        with self._lock:
+            self.production_calls += 1
+            self.production_rows += n_rows
+            self.production_seconds += seconds
+            self.production_max_seconds = max(self.production_max_seconds, seconds)
+
+    def record_shadow(self, candidate: np.ndarray, production: np.ndarray, seconds: float):
+        delta = candidate - production
+        abs_delta = np.abs(delta)
+        relative = abs_delta / np.maximum(np.abs(production), 1e-9)
+        with self._lock:
+            self.compared_rows += len(delta)
+            self.sum_delta += float(delta.sum())
+            self.sum_abs_delta += float(abs_delta.sum())
+            self.sum_sq_delta += float(np.dot(delta, delta))
+            self.max_abs_delta = max(self.max_abs_delta, float(abs_delta.max(initial=0.0)))
+            self.sum_rel_delta += float(relative.sum())
+            self.divergent_rows += int((relative > DIVERGENCE_THRESHOLD).sum())
+            self.shadow_batches += 1
+            self.shadow_seconds += seconds
+            self.shadow_max_seconds = max(self.shadow_max_seconds, seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            n = self.compared_rows
+            return {
+                "compared_rows": n,
+                "dropped_rows": self.dropped_rows,
+                "errors": self.errors,
+                "last_error": self.last_error,
+                "delta": {
+                    "mean": self.sum_delta / n if n else None,
+                    "mae": self.sum_abs_delta / n if n else None,
+                    "rmse": (self.sum_sq_delta / n) ** 0.5 if n else None,
+                    "max_abs": self.max_abs_delta if n else None,
+                    "mean_relative": self.sum_rel_delta / n if n else None,
+                    "divergent_fraction": self.divergent_rows / n if n else None,
+                },
+                "latency": {
+                    "production": {
+                        "calls": self.production_calls,
+                        "mean_ms": 1000 * self.production_seconds / self.production_calls if self.production_calls else None,
+                        "max_ms": 1000 * self.production_max_seconds,
+                        "per_row_us": 1e6 * self.production_seconds / self.production_rows if self.production_rows else None,
+                    },
+                    "shadow": {
+                        "batches": self.shadow_batches,
+                        "mean_ms": 1000 * self.shadow_seconds / self.shadow_batches if self.shadow_batches else None,
+                        "max_ms": 1000 * self.shadow_max_seconds,
+                        "per_row_us": 1e6 * self.shadow_seconds / n if n else None,
+                    },
+                },
+            }
+
+
+class ShadowEvaluator:
+    """
+    File bornee + thread de fond evaluant le candidat par batchs.
+
+    Attributes:
+        model_dir (str): Artefacts du candidat
+        sample_rate (float): Fraction des lignes evaluees
+        stats (ShadowStats): Agregats exposes par /shadow
+        status (str): 'loading', 'running' ou 'failed' (candidat non
+            chargeable : plus aucune ligne n'est tiree ni mise en file)
+    """
+
+    def __init__(self, model_dir, sample_rate=SHADOW_SAMPLE_RATE, max_pending_rows=SHADOW_MAX_PENDING_ROWS,
+                 batch_rows=SHADOW_BATCH_ROWS, flush_seconds=SHADOW_FLUSH_SECONDS):
+        self.model_dir = model_dir
+        self.sample_rate = sample_rate
+        self.max_pending_rows = max_pending_rows
+        self.batch_rows = batch_rows
+        self.flush_seconds = flush_seconds
+        self.stats = ShadowStats()
+        self.candidate_version = None
+        self.candidate_file = None
+        self.status = "loading"
+
+        self._queue = deque()
+        self._pending_rows = 0
+        self._condition = threading.Condition()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="shadow-evaluator", daemon=True)
+        self._thread.start()
+
+    def offer(self, X: np.ndarray, production_price: np.ndarray, production_seconds: float):
+        """
+        Appele apres la reponse de production : tirage puis mise en file.
+
+        Args:
+            X: Matrice (n, 8) des lignes predites
+            production_price: Predictions du modele de production
+            production_seconds: Duree de la prediction de production
+        """
+        if self.status == "failed":
+            return
+        n_rows = len(X)
+        self.stats.record_production(n_rows, production_seconds)
+
+        if n_rows == 1:
+            if random.random() >= self.sample_rate:
+                return
+        else:
+            keep = np.random.random(n_rows) < self.sample_rate
+            if not keep.any():
+                return
+            X, production_price = X[keep], production_price[keep]
+
+        with self._condition:
+            if self._pending_rows + len(X) > self.max_pending_rows:
+                self.stats.dropped_rows += len(X)
+                SHADOW_ROWS.inc("dropped", amount=len(X))
+                return
+            self._queue.append((X, production_price))
+            self._pending_rows += len(X)
+            if self._pending_rows >= self.batch_rows:
+                self._condition.notify()
+
+    def _next_batch(self):
+        with self._condition:
+            deadline = time.monotonic() + self.flush_seconds
+            while not self._stopping and self._pending_rows < self.batch_rows:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 and self._pending_rows:
+                    break
+                self._condition.wait(timeout=max(remaining, 0.05))
+                if remaining <= 0:
+                    deadline = time.monotonic() + self.flush_seconds
+            items = list(self._queue)
+            self._queue.clear()
+            self._pending_rows = 0
+        return items
+
+    def _run(self):
+        # Les etapes du candidat ne doivent pas se meler aux histogrammes
+        # prediction_stage_duration_seconds de la production
+        set_thread_stage_sink(None)
+        try:
+            artifacts = load_artifacts(self.model_dir, label="Modele candidat")
+        except Exception as e:
+            self.stats.last_error = f"Chargement du candidat : {e}"
+            self.stats.errors += 1
+            with self._condition:
+                # Plus de tirage : sinon la file se remplit et tout est compte en 'dropped'
+                self.status = "failed"
+                self._queue.clear()
+                self._pending_rows = 0
+            return
+        self.candidate_version = artifacts["version"]
+        self.candidate_file = artifacts["model_file"]
+        self.status = "running"
+
+        while not self._stopping:
+            items = self._next_batch()
+            if not items:
+                continue
+            X = np.concatenate([x for x, _ in items])
+            production = np.concatenate([p for _, p in items])
+            start = time.perf_counter()
+            try:
+                result = predict_frame(
+                    matrix_to_frame(X), artifacts["model"], artifacts["preprocessor"], artifacts["interval_model"]
+                )
+            except Exception as e:
+                self.stats.errors += 1
+                self.stats.last_error = str(e)
+                SHADOW_ROWS.inc("error", amount=len(X))
+                continue
+            self.stats.record_shadow(result["predicted_price"], production, time.perf_counter() - start)
+            SHADOW_ROWS.inc("scored", amount=len(X))
+            for value in np.abs(result["predicted_price"] - production):
+                SHADOW_ABS_DELTA.observe(value)
+
+    def report(self) -> dict:
+        return {
+            "status": self.status,
+            "production_version": get_model_version(),
+            "candidate_version": self.candidate_version,
+            "candidate_model": self.candidate_file,
+            "sample_rate": self.sample_rate,
+            "pending_rows": self._pending_rows,
+            **self.stats.snapshot()
+        }
+
+    def shutdown(self):
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        self._thread.join(timeout=5)
+
+
+_shadow = None
+_shadow_lock = threading.Lock()
+
+
+def get_shadow():
+    """Evaluateur shadow du processus, None si SHADOW_MODEL_DIR n'est pas defini."""
+    global _shadow
+    if SHADOW_MODEL_DIR is None or SHADOW_SAMPLE_RATE <= 0:
+        return None
+    if _shadow is None:
+        with _shadow_lock:
+            if _shadow is None:
+                _shadow = ShadowEvaluator(SHADOW_MODEL_DIR)
+    return _shadow
+
+
+def shutdown_shadow():
+    global _shadow
+    if _shadow is not None:
+        _shadow.shutdown()
+        _shadow = None
@@ -0,0 +1,234 @@
+"""
+Canal de prediction en continu sur WebSocket (/ws/predict).
+
+Un client garde une connexion ouverte et envoie un message par maison :
+    {"id": 17, "features": {"MedInc": 8.3, ...}}
+en texte JSON ou en binaire msgpack (optionnel, importe au premier
+message binaire). Les messages recus pendant une courte fenetre sont
+regroupes en une seule matrice et predits en un appel vectorise (lignes
+identiques dedoublonnees ; pas d'attente si aucun batch n'est en cours) ;
+chaque resultat repart des qu'il est pret, dans le format du message
+d'origine :
+    {"id": 17, "predicted_price": 4.52, "predicted_price_formatted": ..., ...}
+    {"id": 18, "error": "validation", "detail": [...]}
+L'ordre des reponses n'est pas garanti : le client les associe par id.
+
+Contre-pression par connexion : au-dela de STREAM_MAX_PENDING messages
+sans reponse, le serveur cesse de lire la socket (les envois du client
+finissent par bloquer, sans perte ni erreur).
+
+Configuration (variables d'environnement) :
+- STREAM_WINDOW_MS : fenetre de regroupement quand un batch est deja en cours (defaut 2)
+- STREAM_MAX_BATCH : lignes au plus par appel au modele (defaut 256)
+- STREAM_MAX_PENDING : messages sans reponse par connexion (defaut 512)
+- STREAM_MAX_INFLIGHT : batchs en cours de prediction par connexion (defaut 2)
+"""
+
+import asyncio
+import json
+import os
+
+import numpy as np
+from pydantic import ValidationError
+from starlette.websockets import WebSocketDisconnect
+
+from .executor import ExecutorSaturated
+from .inference import FEATURE_NAMES, deduplicate_rows, expand_result, result_records
+from .metrics import Counter, Gauge, Histogram
+from .responses import orjson
+from .schemas import HouseFeatures
+
+STREAM_WINDOW_SECONDS = float(os.getenv("STREAM_WINDOW_MS", "2")) / 1000
+STREAM_MAX_BATCH = int(os.getenv("STREAM_MAX_BATCH", "256"))
+STREAM_MAX_PENDING = int(os.getenv("STREAM_MAX_PENDING", "512"))
+STREAM_MAX_INFLIGHT = int(os.getenv("STREAM_MAX_INFLIGHT", "2"))
+
+STREAM_CONNECTIONS = Gauge(
+    "stream_connections",
+    "Connexions WebSocket de prediction ouvertes"
+)
+STREAM_MESSAGES = Counter(
+    "stream_messages_total",
+    "Messages recus sur /ws/predict, par issue (predicted, invalid, overloaded, error)",
+    labelnames=("outcome",)
+)
+STREAM_BATCH_SIZE = Histogram(
+    "stream_batch_size",
+    "Messages regroupes par appel au modele",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+)
+
+_open_connections = 0
+
+
+class MessageError(Exception):
+    """Message illisible ou invalide (renvoye au client, la connexion reste ouverte)."""
+
+    def __init__(self, request_id, error: str, detail):
+        super().__init__(error)
+        self.request_id = request_id
+        self.error = error
+        self.detail = detail
+
+
+def _msgpack():
+    try:
+        import msgpack
+    except ImportError:
+        raise MessageError(None, "unsupported", "msgpack non installe : envoyer du JSON (texte)")
+    return msgpack
+
+
+def decode_message(message: dict):
+    """
+    Decode un message WebSocket en (id, ligne de features, format).
+
+    Raises:
+        MessageError: message illisible ou features invalides
+    """
+    if message.get("text") is not None:
+        fmt, raw = "json", message["text"]
+        loads = orjson.loads if orjson is not None else json.loads
+    else:
+        fmt, raw = "msgpack", message.get("bytes") or b""
+        loads = _msgpack().unpackb
+    try:
+        payload = loads(raw)
+    except Exception as e:
+        raise MessageError(None, "decode", str(e))
+    if not isinstance(payload, dict) or not isinstance(payload.get("features"), dict):
+        raise MessageError(
+            payload.get("id") if isinstance(payload, dict) else None,
+            "decode", "Objet {\"id\": ..., \"features\": {...}} attendu"
+        )
+    request_id = payload.get("id")
+    try:
+        house = HouseFeatures.model_validate(payload["features"])
+    except ValidationError as e:
+        raise MessageError(request_id, "validation", e.errors(include_url=False, include_context=False))
+    return request_id, [getattr(house, name) for name in FEATURE_NAMES], fmt
+
+
+def encode_message(body: dict, fmt: str) -> dict:
+    """Message ASGI a envoyer, dans le format du message recu."""
+    if fmt == "msgpack":
+        return {"type": "websocket.send", "bytes": _msgpack().packb(body)}
+    if orjson is None:
+        return {"type": "websocket.send", "text": json.dumps(body, separators=(",", ":"))}
+    return {"type": "websocket.send", "text": orjson.dumps(body).decode()}
+
+
+class StreamSession:
+    """
+    Une connexion /ws/predict : lecture, regroupement et envoi des reponses.
+
+    Args:
+        websocket: WebSocket deja acceptee
+        predict: Coroutine predict(X) -> resultat de predict_frame() pour
+            une matrice (n, 8) ; peut lever ExecutorSaturated
+        observe: Fonction observe(X) appelee sur toutes les lignes du batch,
+            avant dedoublonnage (statistiques de derive)
+    """
+
+    def __init__(self, websocket, predict, observe=None, window=STREAM_WINDOW_SECONDS, max_batch=STREAM_MAX_BATCH,
+                 max_pending=STREAM_MAX_PENDING, max_inflight=STREAM_MAX_INFLIGHT):
+        self.websocket = websocket
+        self.predict = predict
+        self.observe = observe
+        self.window = window
+        self.max_batch = max_batch
+        self._slots = asyncio.Semaphore(max_pending)
+        self._inflight = asyncio.Semaphore(max_inflight)
+        self._send_lock = asyncio.Lock()
+        self._queue = []
+        self._ready = asyncio.Event()
+        self._tasks = set()
+
+    async def run(self):
+        """Traite la connexion jusqu'a sa fermeture par le client."""
+        global _open_connections
+        _open_connections += 1
+        STREAM_CONNECTIONS.set(_open_connections)
+        batcher = asyncio.create_task(self._batcher())
+        try:
+            await self._reader()
+        except WebSocketDisconnect:
+            pass
+        finally:
+            batcher.cancel()
+            for task in list(self._tasks):
+                task.cancel()
+            await asyncio.gather(batcher, *self._tasks, return_exceptions=True)
+            _open_connections -= 1
+            STREAM_CONNECTIONS.set(_open_connections)
+
+    async def _reader(self):
+        while True:
+            # Contre-pression : pas de lecture tant que max_pending messages sont sans reponse
+            await self._slots.acquire()
+            message = await self.websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            try:
+                request_id, row, fmt = decode_message(message)
+            except MessageError as e:
+                STREAM_MESSAGES.inc("invalid")
+                fmt = "json" if message.get("text") is not None or e.error == "unsupported" else "msgpack"
+                await self._send([({"id": e.request_id, "error": e.error, "detail": e.detail}, fmt)])
+                continue
+            self._queue.append((request_id, row, fmt))
+            self._ready.set()
+
+    async def _batcher(self):
+        while True:
+            await self._ready.wait()
+            # Les messages continuent d'arriver pendant l'attente d'une place
+            await self._inflight.acquire()
+            if self._tasks and len(self._queue) < self.max_batch:
+                # Fenetre de regroupement, seulement si un batch est deja en cours :
+                # un message isole part sans attente
+                await asyncio.sleep(self.window)
+            batch = self._queue[:self.max_batch]
+            del self._queue[:self.max_batch]
+            if not self._queue:
+                self._ready.clear()
+            task = asyncio.create_task(self._predict_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _predict_batch(self, batch):
+        try:
+            STREAM_BATCH_SIZE.observe(len(batch))
+            X = np.array([row for _, row, _ in batch], dtype=float)
+            if self.observe is not None:
+                self.observe(X)
+            X_unique, inverse = deduplicate_rows(X)
+            try:
+                result = expand_result(await self.predict(X_unique), inverse)
+            except ExecutorSaturated as e:
+                STREAM_MESSAGES.inc("overloaded", amount=len(batch))
+                bodies = [{"id": request_id, "error": "overloaded", "retry_after": e.retry_after}
+                          for request_id, _, _ in batch]
+            except Exception as e:
+                STREAM_MESSAGES.inc("error", amount=len(batch))
+                bodies = [{"id": request_id, "error": "prediction", "detail": str(e)}
+                          for request_id, _, _ in batch]
+            else:
+                STREAM_MESSAGES.inc("predicted", amount=len(batch))
+                bodies = [{"id": request_id, **record}
+                          for (request_id, _, _), record in zip(batch, result_records(result))]
+            await self._send([(body, fmt) for body, (_, _, fmt) in zip(bodies, batch)])
+        finally:
+            self._inflight.release()
+
+    async def _send(self, replies):
+        try:
+            async with self._send_lock:
+                for body, fmt in replies:
+                    await self.websocket.send(encode_message(body, fmt))
+        except Exception:
+            # Client parti : le lecteur recoit la deconnexion et termine la session
+            pass
+        finally:
+            for _ in replies:
+                self._slots.release()
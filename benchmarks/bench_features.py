@@ -0,0 +1,91 @@
+"""
+Benchmark des features construites : version pandas contre noyau fusionne.
+
+Pour chaque taille (1 a 10M lignes par defaut) et chaque backend
+disponible (numpy, numexpr, numba), mesure le temps du noyau avec une
+sortie preallouee, celui de add_engineered_features() (DataFrame complet)
+et celui de l'implementation pandas de reference, puis verifie que les
+resultats sont egaux.
+
+Usage:
+    python benchmarks/bench_features.py --output bench_results/features.json
+    python benchmarks/bench_features.py --max-rows 1000000 --backends numpy
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from common import make_housing_frame, write_results
+from src.data.load_data import get_feature_names
+from src.features.engineering import (
+    add_engineered_features, add_engineered_features_pandas, get_engineered_feature_names
+)
+from src.features.kernel import available_backends, compute_engineered_features
+
+SIZES = [1, 10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+
+
+def _best_time(fn, min_seconds: float, max_repeats: int = 10_000) -> float:
+    """Meilleur temps d'un appel, repete jusqu'a min_seconds cumulees."""
+    fn()  # echauffement (compilation numba, caches)
+    best, total, repeats = float("inf"), 0.0, 0
+    while total < min_seconds and repeats < max_repeats:
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best, total, repeats = min(best, elapsed), total + elapsed, repeats + 1
+    return best
+
+
+def _matrix(n_rows: int) -> np.ndarray:
+    # Donnees synthetiques repetees au-dela de 1M lignes (generation plus rapide)
+    base = make_housing_frame(min(n_rows, 1_000_000), seed=7, with_target=False).to_numpy()
+    return np.ascontiguousarray(np.resize(base, (n_rows, base.shape[1])))
+
+
+def bench_size(n_rows: int, backends, min_seconds: float) -> dict:
+    X = _matrix(n_rows)
+    frame = pd.DataFrame(X, columns=get_feature_names(), copy=False)
+    out = np.empty((n_rows, 5))
+
+    result = {"n_rows": n_rows}
+    reference = add_engineered_features_pandas(frame)[get_engineered_feature_names()].to_numpy()
+    result["pandas_ms"] = 1000 * _best_time(lambda: add_engineered_features_pandas(frame), min_seconds)
+    result["dataframe_ms"] = 1000 * _best_time(lambda: add_engineered_features(frame), min_seconds)
+
+    for backend in backends:
+        elapsed = _best_time(lambda: compute_engineered_features(X, out=out, backend=backend), min_seconds)
+        result[f"{backend}_ms"] = 1000 * elapsed
+        result[f"{backend}_rows_per_s"] = n_rows / elapsed
+        result[f"{backend}_equal"] = bool(np.allclose(out, reference, rtol=1e-15, atol=0, equal_nan=True))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du noyau de features construites")
+    parser.add_argument("--max-rows", type=int, default=SIZES[-1])
+    parser.add_argument("--backends", nargs="+", default=None, help="Defaut : tous les backends disponibles")
+    parser.add_argument("--min-seconds", type=float, default=0.2, help="Temps cumule minimal par mesure")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    backends = args.backends or available_backends()
+    results = []
+    print(f"{'lignes':>10} {'pandas':>10} {'DataFrame':>10} " + " ".join(f"{b:>10}" for b in backends) + "  (ms)")
+    for n_rows in (n for n in SIZES if n <= args.max_rows):
+        row = bench_size(n_rows, backends, args.min_seconds)
+        results.append(row)
+        timings = " ".join(f"{row[f'{b}_ms']:>10.3f}" for b in backends)
+        equal = all(row[f"{b}_equal"] for b in backends)
+        print(f"{n_rows:>10} {row['pandas_ms']:>10.3f} {row['dataframe_ms']:>10.3f} {timings}"
+              f"  {'ok' if equal else 'DIFFERENT'}")
+
+    if args.output:
+        write_results({"backends": backends, "results": results}, args.output)
+
+
+if __name__ == "__main__":
+    main()
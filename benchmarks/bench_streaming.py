@@ -0,0 +1,175 @@
+"""
+Benchmark du canal WebSocket /ws/predict contre des appels /predict repetes.
+
+Meme flux de maisons (une prediction par message, comme un curseur que
+l'on deplace) envoye de deux facons, avec au plus `concurrency` requetes
+sans reponse :
+- /predict : une requete HTTP par maison (connexions keep-alive)
+- /ws/predict : une seule connexion, messages regroupes cote serveur
+
+Transports :
+- 'inprocess' (defaut) : application appelee en processus (httpx.ASGITransport
+  et WebSocket du TestClient Starlette), sans reseau
+- 'tcp' : serveur api.serve local ; le client WebSocket demande le paquet
+  websockets (inclus dans uvicorn[standard])
+
+Usage:
+    python benchmarks/bench_streaming.py --messages 5000 --concurrency 1 8 32
+    python benchmarks/bench_streaming.py --transport tcp --output bench_results/streaming.json
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import orjson
+
+from common import BASE_DIR, build_artifacts, load_app, make_housing_frame, percentiles_ms, write_results
+
+
+async def _drive_http(client, rows: list, concurrency: int) -> dict:
+    latencies, errors = [], 0
+    source = iter(rows)
+
+    async def worker():
+        nonlocal errors
+        for row in source:
+            start = time.perf_counter()
+            response = await client.post("/predict", json=row, params={"include_features": "false"})
+            latencies.append(time.perf_counter() - start)
+            errors += response.status_code != 200
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    # Debit des reponses reussies : un 503 (executor sature) n'est pas une prediction
+    return {'messages': len(latencies), 'errors': errors,
+            'qps': round((len(latencies) - errors) / elapsed, 2), **percentiles_ms(latencies)}
+
+
+async def _drive_ws(send, receive, rows: list, concurrency: int) -> dict:
+    """Garde `concurrency` messages en vol sur une connexion ; latence par id."""
+    messages = [orjson.dumps({"id": i, "features": row}).decode() for i, row in enumerate(rows)]
+    sent_at, latencies, errors = {}, [], 0
+
+    async def send_next(i):
+        sent_at[i] = time.perf_counter()
+        await send(messages[i])
+
+    start = time.perf_counter()
+    next_id = min(concurrency, len(messages))
+    for i in range(next_id):
+        await send_next(i)
+    for _ in range(len(messages)):
+        body = orjson.loads(await receive())
+        latencies.append(time.perf_counter() - sent_at.pop(body["id"]))
+        errors += "error" in body
+        if next_id < len(messages):
+            await send_next(next_id)
+            next_id += 1
+    elapsed = time.perf_counter() - start
+    return {'messages': len(latencies), 'errors': errors,
+            'qps': round((len(latencies) - errors) / elapsed, 2), **percentiles_ms(latencies)}
+
+
+def run_inprocess(model_dir, rows: list, concurrency: int) -> dict:
+    from starlette.testclient import TestClient
+
+    app = load_app(model_dir)
+
+    async def http():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            await _drive_http(client, rows[:50], 1)  # echauffement
+            return await _drive_http(client, rows, concurrency)
+
+    with TestClient(app) as client, client.websocket_connect("/ws/predict") as ws:
+        async def send(text):
+            ws.send_text(text)
+
+        async def receive():
+            return ws.receive_text()
+
+        asyncio.run(_drive_ws(send, receive, rows[:50], 1))
+        ws_stats = asyncio.run(_drive_ws(send, receive, rows, concurrency))
+    return {'http': asyncio.run(http()), 'websocket': ws_stats}
+
+
+def run_tcp(model_dir, rows: list, concurrency: int, port: int) -> dict:
+    try:
+        import websockets
+    except ImportError:
+        raise SystemExit("Le transport tcp demande le paquet websockets (pip install 'uvicorn[standard]')")
+    from bench_workers import _wait_ready
+
+    process = subprocess.Popen(
+        [sys.executable, "-m", "api.serve", "--workers", "1", "--port", str(port),
+         "--host", "127.0.0.1", "--log-level", "warning"],
+        env=dict(os.environ, MODEL_DIR=str(model_dir)),
+        cwd=BASE_DIR
+    )
+    base_url = f"127.0.0.1:{port}"
+    try:
+        _wait_ready(f"http://{base_url}")
+
+        async def http():
+            limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+            async with httpx.AsyncClient(base_url=f"http://{base_url}", limits=limits, timeout=30.0) as client:
+                await _drive_http(client, rows[:50], 1)
+                return await _drive_http(client, rows, concurrency)
+
+        async def stream():
+            async with websockets.connect(f"ws://{base_url}/ws/predict") as ws:
+                await _drive_ws(ws.send, ws.recv, rows[:50], 1)
+                return await _drive_ws(ws.send, ws.recv, rows, concurrency)
+
+        return {'http': asyncio.run(http()), 'websocket': asyncio.run(stream())}
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait(timeout=60)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="WebSocket /ws/predict contre /predict repete")
+    parser.add_argument("--transport", choices=("inprocess", "tcp"), default="inprocess")
+    parser.add_argument("--messages", type=int, default=2000, help="Predictions par mesure")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32],
+                        help="Requetes sans reponse au plus")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--model-dir", default=None, help="Artefacts a servir (defaut: modele synthetique)")
+    parser.add_argument("--output", default=None, help="Fichier JSON de resultats")
+    args = parser.parse_args(argv)
+
+    model_dir = args.model_dir
+    if model_dir is None:
+        model_dir = tempfile.mkdtemp(prefix="bench_models_")
+        build_artifacts(model_dir)
+
+    rows = make_housing_frame(args.messages, seed=3, with_target=False).to_dict('records')
+    results = []
+    print(f"{'en vol':>7} {'mode':>10} {'pred/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'erreurs':>8}")
+    for concurrency in args.concurrency:
+        if args.transport == "tcp":
+            run = run_tcp(model_dir, rows, concurrency, args.port)
+        else:
+            run = run_inprocess(model_dir, rows, concurrency)
+        for mode in ('http', 'websocket'):
+            stats = run[mode]
+            print(f"{concurrency:>7} {mode:>10} {stats['qps']:>10.1f} {stats['p50_ms']:>8} "
+                  f"{stats['p99_ms']:>8} {stats['errors']:>8}")
+        results.append({'concurrency': concurrency, **run})
+
+    if args.output:
+        write_results({'transport': args.transport, 'messages': args.messages, 'runs': results}, args.output)
+        print(f" Resultats sauvegardes : {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""
+Benchmark du serveur pre-fork : QPS en fonction du nombre de workers et RSS par worker.
+
+Lance api.serve pour chaque nombre de workers, envoie de la charge
+/predict en HTTP (TCP local) puis releve, pour chaque worker, la RSS et
+la PSS (memoire partagee repartie entre processus, /proc/<pid>/smaps_rollup) :
+une PSS nettement inferieure a la RSS indique que le modele est bien
+partage en copy-on-write.
+
+Usage:
+    python benchmarks/bench_workers.py --workers 1 2 4 --duration 10 --output bench_results/workers.json
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from common import BASE_DIR, build_artifacts, make_housing_frame, percentiles_ms, write_results
+
+
+def _children(pid: int) -> list:
+    path = Path(f"/proc/{pid}/task/{pid}/children")
+    if not path.exists():
+        return []
+    return [int(child) for child in path.read_text().split()]
+
+
+def _memory_kb(pid: int) -> dict:
+    """RSS et PSS d'un processus (Linux), en Ko."""
+    memory = {}
+    for filename, keys in (("status", ("VmRSS",)), ("smaps_rollup", ("Pss",))):
+        try:
+            for line in Path(f"/proc/{pid}/{filename}").read_text().splitlines():
+                key = line.split(":")[0]
+                if key in keys:
+                    memory[key.lower()] = int(line.split()[1])
+        except OSError:
+            pass
+    return memory
+
+
+def _wait_ready(base_url: str, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Serveur non pret apres {timeout}s")
+
+
+async def _drive(base_url: str, payloads: list, duration: float, concurrency: int) -> dict:
+    latencies, errors = [], 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        deadline = time.perf_counter() + duration
+
+        async def worker(offset: int):
+            nonlocal errors
+            i = offset
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                response = await client.post("/predict", json=payloads[i % len(payloads)])
+                latencies.append(time.perf_counter() - start)
+                errors += response.status_code != 200
+                i += concurrency
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(k) for k in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return {'requests': len(latencies), 'errors': errors, 'qps': round(len(latencies) / elapsed, 2),
+            **percentiles_ms(latencies)}
+
+
+def run_one(n_workers: int, port: int, model_dir: str, payloads: list, duration: float, concurrency: int) -> dict:
+    env = dict(os.environ, MODEL_DIR=str(model_dir))
+    process = subprocess.Popen(
+        [sys.executable, "-m", "api.serve",
+         "--workers", str(n_workers), "--port", str(port), "--host", "127.0.0.1", "--log-level", "warning"],
+        env=env,
+        cwd=BASE_DIR
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        _wait_ready(base_url)
+        # Echauffement
+        asyncio.run(_drive(base_url, payloads, 1.0, concurrency))
+        stats = asyncio.run(_drive(base_url, payloads, duration, concurrency))
+        stats['workers'] = n_workers
+        stats['parent_memory_kb'] = _memory_kb(process.pid)
+        stats['worker_memory_kb'] = [_memory_kb(pid) for pid in _children(process.pid)]
+        return stats
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait(timeout=60)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="QPS et memoire du serveur pre-fork selon le nombre de workers")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--duration", type=float, default=10.0, help="Duree de mesure par configuration (s)")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--model-dir", default=None, help="Artefacts a servir (defaut: modele synthetique)")
+    parser.add_argument("--output", default=None, help="Fichier JSON de resultats")
+    args = parser.parse_args(argv)
+
+    model_dir = args.model_dir
+    if model_dir is None:
+        model_dir = tempfile.mkdtemp(prefix="bench_models_")
+        build_artifacts(model_dir)
+
+    payloads = make_housing_frame(500, seed=1, with_target=False).to_dict('records')
+    results = []
+    for n_workers in args.workers:
+        stats = run_one(n_workers, args.port, model_dir, payloads, args.duration, args.concurrency)
+        rss = [m.get('vmrss', 0) for m in stats['worker_memory_kb']]
+        pss = [m.get('pss', 0) for m in stats['worker_memory_kb']]
+        print(f" {n_workers} worker(s) : {stats['qps']:.1f} req/s, p99 {stats['p99_ms']} ms, "
+              f"RSS/worker {sum(rss) / max(len(rss), 1) / 1024:.1f} Mo, PSS/worker {sum(pss) / max(len(pss), 1) / 1024:.1f} Mo")
+        results.append(stats)
+
+    if args.output:
+        write_results({'concurrency': args.concurrency, 'duration_s': args.duration, 'runs': results}, args.output)
+        print(f" Resultats sauvegardes : {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""
+Outils partages par les benchmarks : donnees synthetiques et artefacts.
+
+Les benchmarks doivent etre reproductibles sans reseau ni MongoDB : on
+genere des donnees au format California Housing avec une graine fixe et
+on entraine un modele de meme forme que celui du notebook 04_modeling.
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from src.data.load_data import get_feature_names, get_target_name
+from src.data.preprocess import DataPreprocessor
+
+BATCH_SIZES = [1, 100, 10_000, 100_000]
+
+
+def make_housing_frame(n_rows: int, seed: int = 42, with_target: bool = True) -> pd.DataFrame:
+    """
+    Genere un DataFrame synthetique au schema California Housing.
+
+    Args:
+        n_rows: Nombre de lignes
+        seed: Graine aleatoire
+        with_target: Ajouter la colonne MedHouseVal
+
+    Returns:
+        DataFrame avec les 8 features brutes (+ cible)
+    """
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'MedInc': rng.gamma(4.0, 1.0, n_rows).clip(0.5, 15.0),
+        'HouseAge': rng.uniform(1, 52, n_rows).round(),
+        'AveRooms': rng.normal(5.4, 1.2, n_rows).clip(1.0, None),
+        'AveBedrms': rng.normal(1.1, 0.1, n_rows).clip(0.5, None),
+        'Population': rng.gamma(2.0, 700.0, n_rows).round(),
+        'AveOccup': rng.normal(3.0, 0.6, n_rows).clip(0.8, None),
+        'Latitude': rng.uniform(32.5, 41.9, n_rows),
+        'Longitude': rng.uniform(-124.3, -114.4, n_rows),
+    })[get_feature_names()]
+    if with_target:
+        noise = rng.normal(0, 0.4, n_rows)
+        df[get_target_name()] = (0.4 * df['MedInc'] + 0.3 * np.abs(df['Latitude'] - 36) + noise).clip(0.15, 5.0)
+    return df
+
+
+def build_artifacts(model_dir, n_rows: int = 20_000, seed: int = 42):
+    """
+    Entraine preprocessor + GradientBoosting et les sauvegarde comme le notebook.
+
+    Args:
+        model_dir: Dossier de sortie (best_model_*.joblib, preprocessor.joblib,
+            model_metadata.json)
+        n_rows: Taille du jeu d'entrainement synthetique
+        seed: Graine aleatoire
+
+    Returns:
+        tuple: (model, preprocessor)
+    """
+    from sklearn.ensemble import GradientBoostingRegressor
+
+    model_dir = Path(model_dir)
+    model_dir.mkdir(parents=True, exist_ok=True)
+
+    preprocessor = DataPreprocessor()
+    X_train, X_test, y_train, y_test = preprocessor.fit_transform(make_housing_frame(n_rows, seed))
+
+    # Memes hyperparametres que le modele de production
+    model = GradientBoostingRegressor(
+        n_estimators=100, learning_rate=0.1, max_depth=5,
+        min_samples_split=5, min_samples_leaf=2, random_state=42
+    )
+    model.fit(X_train, y_train)
+
+    joblib.dump(model, model_dir / "best_model_benchmark.joblib")
+    joblib.dump(preprocessor, model_dir / "preprocessor.joblib")
+    metadata = {
+        'model_name': 'Gradient Boosting (benchmark)',
+        'model_type': type(model).__name__,
+        'training_date': '2000-01-01T00:00:00',
+        'metrics': {'test_r2': float(model.score(X_test, y_test))},
+        'training_samples': int(len(X_train)),
+        'test_samples': int(len(X_test)),
+        'features': preprocessor.get_feature_names(),
+        'n_features': len(preprocessor.get_feature_names())
+    }
+    with open(model_dir / "model_metadata.json", 'w') as f:
+        json.dump(metadata, f, indent=2)
+
+    return model, preprocessor
+
+
+def load_app(model_dir):
+    """
+    Importe l'application FastAPI en pointant le chargement sur model_dir.
+
+    Returns:
+        FastAPI: Application prete a etre servie en ASGI
+    """
+    from api import dependencies
+    dependencies.MODEL_DIR = Path(model_dir)
+    dependencies.METADATA_PATH = dependencies.MODEL_DIR / "model_metadata.json"
+    dependencies.load_model_and_preprocessor()
+
+    from api.main import app
+    return app
+
+
+def percentiles_ms(latencies) -> dict:
+    """p50/p95/p99 et moyenne d'une liste de latences en secondes."""
+    values = np.asarray(latencies, dtype=float) * 1000
+    if values.size == 0:
+        return {'p50_ms': None, 'p95_ms': None, 'p99_ms': None, 'mean_ms': None}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        'p50_ms': round(float(p50), 3),
+        'p95_ms': round(float(p95), 3),
+        'p99_ms': round(float(p99), 3),
+        'mean_ms': round(float(values.mean()), 3)
+    }
+
+
+def write_results(results: dict, path):
+    """Sauvegarde des resultats JSON (dossiers crees si besoin)."""
+    path = Path(path)
+    os.makedirs(path.parent, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
@@ -0,0 +1,20 @@
+"""Fixtures des benchmarks (artefacts entraines une fois par session)."""
+
+import pytest
+
+from common import build_artifacts
+
+
+@pytest.fixture(scope="session")
+def model_dir(tmp_path_factory):
+    path = tmp_path_factory.mktemp("models")
+    build_artifacts(path)
+    return path
+
+
+@pytest.fixture(scope="session")
+def artifacts(model_dir):
+    import joblib
+    model = joblib.load(next(model_dir.glob("best_model_*.joblib")))
+    preprocessor = joblib.load(model_dir / "preprocessor.joblib")
+    return model, preprocessor
@@ -0,0 +1,186 @@
+"""
+Generateur de charge ASGI en processus pour /predict et /predict-batch.
+
+L'application est appelee directement via httpx.ASGITransport : pas de
+serveur ni de reseau, donc des chiffres reproductibles d'une machine a
+l'autre pour comparer deux commits.
+
+Les requetes viennent d'un fichier JSON Lines (une requete par ligne) :
+    {"path": "/predict", "json": {"MedInc": 8.3, ...}}
+    {"path": "/predict-batch", "json": [{...}, {...}]}
+
+Usage:
+    python benchmarks/load_test.py --payloads benchmarks/payloads.jsonl \\
+        --requests 2000 --concurrency 16 --output bench_results/run.json
+    python benchmarks/load_test.py --baseline bench_results/run.json --max-regression 0.2
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import httpx
+
+from common import build_artifacts, load_app, make_housing_frame, percentiles_ms, write_results
+
+DEFAULT_PAYLOADS = Path(__file__).resolve().parent / "payloads.jsonl"
+
+
+def load_payloads(path) -> list:
+    """Lit un fichier JSON Lines de requetes {path, json}."""
+    payloads = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                payloads.append(json.loads(line))
+    if not payloads:
+        raise ValueError(f"Aucune requete dans {path}")
+    return payloads
+
+
+def synthetic_payloads(n_single: int = 100, batch_sizes=(10, 100), seed: int = 0) -> list:
+    """Genere des requetes /predict et /predict-batch a partir de donnees synthetiques."""
+    rows = make_housing_frame(n_single + sum(batch_sizes), seed=seed, with_target=False).to_dict('records')
+    payloads = [{"path": "/predict", "json": row} for row in rows[:n_single]]
+    offset = n_single
+    for size in batch_sizes:
+        payloads.append({"path": "/predict-batch", "json": rows[offset:offset + size]})
+        offset += size
+    return payloads
+
+
+async def run_load(app, payloads: list, n_requests: int, concurrency: int) -> dict:
+    """
+    Envoie n_requests requetes avec `concurrency` clients simultanes.
+
+    Returns:
+        dict: Statistiques par endpoint et globales
+    """
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    source = itertools.islice(itertools.cycle(payloads), n_requests)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+
+        async def worker():
+            for payload in source:
+                start = time.perf_counter()
+                response = await client.post(payload["path"], json=payload["json"])
+                latencies[payload["path"]].append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    errors[payload["path"]] += 1
+
+        # Echauffement : chargement du modele hors mesure
+        await client.post(payloads[0]["path"], json=payloads[0]["json"])
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    endpoints = {}
+    for path, values in sorted(latencies.items()):
+        endpoints[path] = {
+            'count': len(values),
+            'errors': errors[path],
+            'qps': round(len(values) / elapsed, 2),
+            **percentiles_ms(values)
+        }
+    all_values = [v for values in latencies.values() for v in values]
+    return {
+        'elapsed_s': round(elapsed, 3),
+        'total': {
+            'count': len(all_values),
+            'errors': sum(errors.values()),
+            'qps': round(len(all_values) / elapsed, 2),
+            **percentiles_ms(all_values)
+        },
+        'endpoints': endpoints
+    }
+
+
+def find_regressions(current: dict, baseline: dict, max_regression: float) -> list:
+    """
+    Compare deux executions : p95/p99 qui montent ou QPS qui baisse au-dela du seuil.
+
+    Args:
+        current: Resultats de l'execution courante
+        baseline: Resultats de reference
+        max_regression: Degradation relative toleree (0.2 = 20%)
+
+    Returns:
+        list: Messages decrivant chaque regression
+    """
+    regressions = []
+    for path, base in baseline.get('endpoints', {}).items():
+        stats = current['endpoints'].get(path)
+        if stats is None:
+            continue
+        for key in ('p95_ms', 'p99_ms'):
+            if base[key] and stats[key] > base[key] * (1 + max_regression):
+                regressions.append(f"{path} {key}: {base[key]} -> {stats[key]}")
+        if base['qps'] and stats['qps'] < base['qps'] * (1 - max_regression):
+            regressions.append(f"{path} qps: {base['qps']} -> {stats['qps']}")
+        if stats['errors'] > base.get('errors', 0):
+            regressions.append(f"{path} errors: {base.get('errors', 0)} -> {stats['errors']}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Test de charge ASGI de l'API de prediction")
+    parser.add_argument("--payloads", default=None, help="Fichier JSON Lines de requetes (defaut: payloads.jsonl)")
+    parser.add_argument("--synthetic", action="store_true", help="Generer les requetes au lieu de lire un fichier")
+    parser.add_argument("--requests", type=int, default=2000, help="Nombre total de requetes")
+    parser.add_argument("--concurrency", type=int, default=16, help="Clients simultanes")
+    parser.add_argument("--model-dir", default=None, help="Artefacts a servir (defaut: modele synthetique)")
+    parser.add_argument("--output", default=None, help="Fichier JSON de resultats")
+    parser.add_argument("--baseline", default=None, help="Resultats de reference a comparer")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Degradation toleree (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    if args.synthetic:
+        payloads = synthetic_payloads()
+    else:
+        payloads = load_payloads(args.payloads or DEFAULT_PAYLOADS)
+
+    model_dir = args.model_dir
+    if model_dir is None:
+        model_dir = tempfile.mkdtemp(prefix="bench_models_")
+        build_artifacts(model_dir)
+
+    app = load_app(model_dir)
+    results = asyncio.run(run_load(app, payloads, args.requests, args.concurrency))
+    results['config'] = {
+        'requests': args.requests,
+        'concurrency': args.concurrency,
+        'payloads': 'synthetic' if args.synthetic else str(args.payloads or DEFAULT_PAYLOADS),
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S")
+    }
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        write_results(results, args.output)
+        print(f" Resultats sauvegardes : {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = find_regressions(results, baseline, args.max_regression)
+        if regressions:
+            print(" REGRESSIONS :")
+            for message in regressions:
+                print(f"  - {message}")
+            return 1
+        print(" Pas de regression")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""
+Micro-benchmarks du chemin de prediction (pytest-benchmark).
+
+Lancement et comparaison avec une execution precedente :
+    pytest benchmarks/ --benchmark-autosave
+    pytest benchmarks/ --benchmark-compare --benchmark-compare-fail=mean:20%
+"""
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from common import BATCH_SIZES, make_housing_frame
+from src.data.preprocess import OutlierHandler
+from src.features.engineering import add_engineered_features, add_engineered_features_pandas
+from src.features.kernel import compute_engineered_features
+
+CAPPED_COLUMNS = ['AveRooms', 'AveBedrms', 'Population', 'AveOccup']
+
+
+@pytest.fixture(params=BATCH_SIZES, ids=lambda n: f"rows={n}")
+def raw_frame(request):
+    return make_housing_frame(request.param, seed=7, with_target=False)
+
+
+def _tag(benchmark, df):
+    benchmark.extra_info['n_rows'] = len(df)
+
+
+def test_add_engineered_features(benchmark, raw_frame):
+    _tag(benchmark, raw_frame)
+    benchmark(add_engineered_features, raw_frame)
+
+
+def test_add_engineered_features_pandas(benchmark, raw_frame):
+    _tag(benchmark, raw_frame)
+    benchmark(add_engineered_features_pandas, raw_frame)
+
+
+def test_feature_kernel(benchmark, raw_frame):
+    _tag(benchmark, raw_frame)
+    X = raw_frame.to_numpy()
+    benchmark(compute_engineered_features, X, out=X[:, :5].copy())
+
+
+def test_cap_outliers(benchmark, raw_frame):
+    _tag(benchmark, raw_frame)
+    df = add_engineered_features(raw_frame)
+    benchmark(OutlierHandler().cap_outliers, df, columns=CAPPED_COLUMNS)
+
+
+def test_apply_bounds(benchmark, artifacts, raw_frame):
+    _tag(benchmark, raw_frame)
+    _, preprocessor = artifacts
+    df = add_engineered_features(raw_frame)
+    benchmark(preprocessor.outlier_handler.apply_bounds, df)
+
+
+def test_preprocessor_transform(benchmark, artifacts, raw_frame):
+    _tag(benchmark, raw_frame)
+    _, preprocessor = artifacts
+    benchmark(preprocessor.transform, raw_frame)
+
+
+def test_model_predict(benchmark, artifacts, raw_frame):
+    _tag(benchmark, raw_frame)
+    model, preprocessor = artifacts
+    X = preprocessor.transform(raw_frame)
+    benchmark(model.predict, X)
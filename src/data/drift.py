@@ -0,0 +1,257 @@
+"""
+Suivi de la derive des donnees (data drift) sur les entrees en production.
+
+Baseline : pour chaque feature (8 brutes + 5 construites, avant capping
+et scaling), des bornes de bins aux quantiles du jeu d'entrainement et
+la proportion d'echantillons par bin. Elle est stockee dans
+model_metadata.json (cle 'drift_baseline').
+
+En production, DriftMonitor ne garde qu'un compteur par bin et par
+feature : une mise a jour calcule le bin de chaque feature, sans stocker
+aucune entree brute. La distribution observee est comparee a la baseline
+par PSI (Population Stability Index) et par la statistique de
+Kolmogorov-Smirnov calculee sur les bins.
+
+Les comparaisons sont faites par fenetres de temps : a la fin de chaque
+fenetre, son rapport est conserve (last_window) et ses compteurs sont
+ajoutes au cumul depuis le demarrage. Une fenetre expiree est fermee au
+prochain observe() ou report(), meme sans trafic entre les deux.
+
+Valeurs non finies : NaN et +inf tombent dans le dernier bin, -inf dans
+le premier (comme searchsorted(side='right')), quelle que soit la taille
+du batch.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+from src.data.load_data import get_feature_names
+from src.features.engineering import get_engineered_feature_names, engineered_feature_array
+
+N_BINS = 20
+# PSI < 0.1 : stable ; < 0.25 : derive moderee ; au-dela : derive significative
+PSI_THRESHOLDS = (0.1, 0.25)
+MIN_ROWS = 100
+EPSILON = 1e-6
+# En dessous, comparaison vectorisee a toutes les bornes ; au-dela, un searchsorted par feature
+SMALL_BATCH = 256
+
+MONITORED_FEATURES = get_feature_names() + get_engineered_feature_names()
+
+
+def build_baseline(frame, n_bins: int = N_BINS) -> dict:
+    """
+    Calcule la baseline a partir des donnees d'entrainement.
+
+    Args:
+        frame: DataFrame avec les features brutes et construites
+            (sortie de add_engineered_features(), avant capping)
+        n_bins: Nombre de bins (quantiles) par feature
+
+    Returns:
+        dict: Baseline serialisable en JSON
+    """
+    features = {}
+    for name in MONITORED_FEATURES:
+        values = frame[name].to_numpy(dtype=float)
+        values = values[np.isfinite(values)]
+        edges = np.unique(np.quantile(values, np.linspace(0, 1, n_bins + 1)[1:-1]))
+        counts = np.bincount(np.searchsorted(edges, values, side='right'), minlength=len(edges) + 1)
+        features[name] = {
+            "edges": edges.tolist(),
+            "proportions": (counts / counts.sum()).tolist()
+        }
+    return {"n_samples": int(len(frame)), "n_bins": n_bins, "features": features}
+
+
+def _psi(observed: np.ndarray, expected: np.ndarray) -> float:
+    p = np.maximum(observed, EPSILON)
+    q = np.maximum(expected, EPSILON)
+    return float(np.sum((p - q) * np.log(p / q)))
+
+
+def _status(psi: float) -> str:
+    if psi < PSI_THRESHOLDS[0]:
+        return "stable"
+    if psi < PSI_THRESHOLDS[1]:
+        return "moderate"
+    return "significant"
+
+
+class DriftMonitor:
+    """
+    Histogrammes en continu des entrees, compares a la baseline d'entrainement.
+
+    Attributes:
+        features (list): Features suivies (presentes dans la baseline)
+        window_seconds (float): Duree d'une fenetre de comparaison
+        on_report (callable): Appele avec chaque rapport de fenetre terminee
+
+    Example:
+        >>> monitor = DriftMonitor(metadata['drift_baseline'])
+        >>> monitor.observe(X_raw)  # matrice (n, 8)
+        >>> monitor.report()['current']['features']['MedInc']['psi']
+    """
+
+    def __init__(self, baseline: dict, window_seconds: float = 3600.0, on_report=None):
+        self.features = [name for name in MONITORED_FEATURES if name in baseline['features']]
+        self._columns = np.array([MONITORED_FEATURES.index(name) for name in self.features], dtype=np.intp)
+        self._edges = [np.asarray(baseline['features'][name]['edges']) for name in self.features]
+        self._expected = [np.asarray(baseline['features'][name]['proportions']) for name in self.features]
+
+        # Bornes alignees dans une matrice (features, bornes) ; le masque
+        # exclut les colonnes de remplissage des features a moins de bornes
+        width = max((len(edges) for edges in self._edges), default=0)
+        self._n_edges = np.array([len(edges) for edges in self._edges], dtype=np.intp)
+        self._edge_matrix = np.zeros((len(self.features), width))
+        self._edge_mask = np.arange(width) < self._n_edges[:, None]
+        for k, edges in enumerate(self._edges):
+            self._edge_matrix[k, :len(edges)] = edges
+
+        sizes = [len(edges) + 1 for edges in self._edges]
+        self._offsets = np.concatenate([[0], np.cumsum(sizes)])
+        self._n_bins = int(self._offsets[-1])
+
+        self.window_seconds = window_seconds
+        self.on_report = on_report
+        self._lock = threading.Lock()
+        self._window = np.zeros(self._n_bins, dtype=np.int64)
+        self._cumulative = np.zeros(self._n_bins, dtype=np.int64)
+        self._window_rows = 0
+        self._cumulative_rows = 0
+        self._window_start = time.time()
+        self.last_window = None
+
+    def observe(self, X_raw):
+        """
+        Ajoute un batch d'entrees (matrice brute (n, 8) dans l'ordre de get_feature_names()).
+
+        Cout : un calcul de bin par feature et un increment de compteur,
+        quel que soit le nombre d'entrees deja observees.
+        """
+        X_raw = np.asarray(X_raw, dtype=float)
+        n_rows = len(X_raw)
+        if n_rows == 0:
+            return
+        X = np.empty((n_rows, len(MONITORED_FEATURES)))
+        X[:, :X_raw.shape[1]] = X_raw
+        X[:, X_raw.shape[1]:] = engineered_feature_array(X_raw)
+        X = X[:, self._columns]
+
+        if n_rows <= SMALL_BATCH:
+            # Equivalent a searchsorted(side='right') : nombre de bornes <= x
+            bins = ((X[:, :, None] >= self._edge_matrix) & self._edge_mask).sum(axis=2)
+            # NaN (toujours compte 0 ci-dessus) -> dernier bin, comme searchsorted
+            nan_rows, nan_columns = np.nonzero(np.isnan(X))
+            bins[nan_rows, nan_columns] = self._n_edges[nan_columns]
+        else:
+            bins = np.empty((n_rows, len(self.features)), dtype=np.intp)
+            for k, edges in enumerate(self._edges):
+                bins[:, k] = np.searchsorted(edges, X[:, k], side='right')
+        bins = (bins + self._offsets[:-1]).ravel()
+
+        with self._lock:
+            if n_rows <= SMALL_BATCH:
+                np.add.at(self._window, bins, 1)
+            else:
+                self._window += np.bincount(bins, minlength=self._n_bins)
+            self._window_rows += n_rows
+            report = self._close_if_expired()
+        self._publish(report)
+
+    def _close_if_expired(self):
+        """Ferme la fenetre si elle a expire (appele sous le verrou)."""
+        if time.time() - self._window_start >= self.window_seconds:
+            return self._close_window()
+        return None
+
+    def _publish(self, report):
+        if report is not None and self.on_report is not None:
+            self.on_report(report)
+
+    def _close_window(self) -> dict:
+        report = self._compare(self._window, self._window_rows)
+        report["window_start"] = self._window_start
+        report["window_end"] = time.time()
+        self.last_window = report
+        self._cumulative += self._window
+        self._cumulative_rows += self._window_rows
+        self._window[:] = 0
+        self._window_rows = 0
+        self._window_start = time.time()
+        return report
+
+    def _compare(self, counts: np.ndarray, n_rows: int) -> dict:
+        features = {}
+        for k, name in enumerate(self.features):
+            observed = counts[self._offsets[k]:self._offsets[k + 1]]
+            expected = self._expected[k]
+            proportions = observed / n_rows if n_rows else np.zeros_like(expected)
+            psi = _psi(proportions, expected)
+            ks = float(np.max(np.abs(np.cumsum(proportions) - np.cumsum(expected))))
+            features[name] = {
+                "psi": psi,
+                "ks": ks,
+                "status": _status(psi) if n_rows >= MIN_ROWS else "insufficient_data"
+            }
+        worst = max(features.values(), key=lambda f: f["psi"]) if features else None
+        return {
+            "n_rows": int(n_rows),
+            "max_psi": worst["psi"] if worst else 0.0,
+            "status": worst["status"] if worst else "insufficient_data",
+            "features": features
+        }
+
+    def report(self) -> dict:
+        """
+        Rapport de derive : fenetre en cours, derniere fenetre terminee et cumul.
+
+        Une fenetre expiree est d'abord fermee : sans trafic, le rapport
+        (et les gauges alimentees par on_report) restent a jour.
+        """
+        with self._lock:
+            closed = self._close_if_expired()
+            window, window_rows = self._window.copy(), self._window_rows
+            cumulative = self._cumulative + window
+            cumulative_rows = self._cumulative_rows + window_rows
+            window_start = self._window_start
+            last_window = self.last_window
+        self._publish(closed)
+        current = self._compare(window, window_rows)
+        current["window_start"] = window_start
+        return {
+            "window_seconds": self.window_seconds,
+            "current": current,
+            "last_window": last_window,
+            "cumulative": self._compare(cumulative, cumulative_rows)
+        }
+
+
+if __name__ == "__main__":
+    import json
+    import os
+    import sys
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+    from sklearn.model_selection import train_test_split
+    from src.data.load_data import load_california_housing_data
+    from src.features.engineering import add_engineered_features
+
+    print("Calcul de la baseline de derive")
+    df = load_california_housing_data()
+    # Meme split que DataPreprocessor.fit_transform (random_state=42)
+    train, _ = train_test_split(df, test_size=0.2, random_state=42)
+    baseline = build_baseline(add_engineered_features(train))
+
+    metadata_path = os.path.join(
+        os.getenv("MODEL_DIR", os.path.join(os.path.dirname(__file__), '../../models')),
+        "model_metadata.json"
+    )
+    with open(metadata_path) as f:
+        metadata = json.load(f)
+    metadata['drift_baseline'] = baseline
+    with open(metadata_path, 'w') as f:
+        json.dump(metadata, f, indent=2)
+    print(f"Baseline ({len(baseline['features'])} features) ajoutee a {metadata_path}")
+    print("OK!")
@@ -1,7 +1,6 @@
-from sklearn.datasets import fetch_california_housing
-import pandas as pd
-
 def load_california_housing_data():
+    # Import differe : sklearn.datasets est lourd et inutile a get_feature_names()
+    from sklearn.datasets import fetch_california_housing
     california = fetch_california_housing(as_frame=True)
     return california.frame
 
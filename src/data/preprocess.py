@@ -58,6 +58,7 @@ import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import RobustScaler
 from src.features.engineering import add_engineered_features
+from src.utils.timing import stage
 
 
 class OutlierHandler:
@@ -65,6 +66,7 @@ class OutlierHandler:
         self.method = method
         self.threshold = threshold
         self.cap_percentiles = cap_percentiles
+        self.bounds_ = None
     
     def cap_outliers(self, df, columns, inplace=False):
         if not inplace:
@@ -76,6 +78,52 @@ class OutlierHandler:
                 upper_bound = df[col].quantile(upper_pct / 100)
                 df[col] = df[col].clip(lower=lower_bound, upper=upper_bound)
         return df
+    
+    def fit(self, df, columns):
+        """
+        Memorise les bornes de capping calculees sur les donnees d'entrainement.
+        
+        Args:
+            df: DataFrame d'entrainement
+            columns: Colonnes a capper
+        
+        Returns:
+            self
+        """
+        lower_pct, upper_pct = self.cap_percentiles
+        self.bounds_ = {
+            col: (df[col].quantile(lower_pct / 100), df[col].quantile(upper_pct / 100))
+            for col in columns if col in df.columns
+        }
+        return self
+    
+    def apply_bounds(self, df, inplace=False):
+        """
+        Cappe avec les bornes memorisees par fit().
+        
+        Contrairement a cap_outliers(), le resultat d'une ligne ne depend pas
+        des autres lignes du DataFrame : un batch donne les memes valeurs
+        que des appels ligne par ligne.
+        
+        Args:
+            df: DataFrame a capper
+            inplace: Modifier df directement
+        
+        Returns:
+            DataFrame cappe
+        """
+        # Preprocessors pickles avant l'ajout de fit() : pas de bornes connues.
+        # Capper une seule ligne avec ses propres quantiles etait l'identite,
+        # on conserve donc ce comportement.
+        bounds = getattr(self, 'bounds_', None)
+        if not bounds:
+            return df
+        if not inplace:
+            df = df.copy()
+        for col, (lower_bound, upper_bound) in bounds.items():
+            if col in df.columns:
+                df[col] = df[col].clip(lower=lower_bound, upper=upper_bound)
+        return df
 
 
 class DataPreprocessor:
@@ -92,7 +140,8 @@ class DataPreprocessor:
         df_processed = add_engineered_features(df, inplace=False)
         
         print("Gestion outliers...")
-        df_processed = self.outlier_handler.cap_outliers(df_processed, columns=self.cols_to_cap)
+        self.outlier_handler.fit(df_processed, columns=self.cols_to_cap)
+        df_processed = self.outlier_handler.apply_bounds(df_processed, inplace=True)
         
         print("Separation features/target...")
         X = df_processed.drop(columns=[self.target_name])
@@ -126,10 +175,12 @@ class DataPreprocessor:
             raise RuntimeError("Le preprocessor doit etre fitte avec fit_transform() d'abord")
         
         # Feature engineering
-        df_processed = add_engineered_features(df, inplace=False)
+        with stage("feature_engineering"):
+            df_processed = add_engineered_features(df, inplace=False)
         
-        # Cap outliers
-        df_processed = self.outlier_handler.cap_outliers(df_processed, columns=self.cols_to_cap)
+        # Cap outliers (bornes d'entrainement, independant de la taille du batch)
+        with stage("cap_outliers"):
+            df_processed = self.outlier_handler.apply_bounds(df_processed, inplace=True)
         
         # Supprimer target si presente
         if self.target_name in df_processed.columns:
@@ -144,11 +195,12 @@ class DataPreprocessor:
         df_processed = df_processed[self.feature_names]
         
         # Scaling
-        df_scaled = pd.DataFrame(
-            self.scaler.transform(df_processed),
-            columns=self.feature_names,
-            index=df_processed.index
-        )
+        with stage("scaling"):
+            df_scaled = pd.DataFrame(
+                self.scaler.transform(df_processed),
+                columns=self.feature_names,
+                index=df_processed.index
+            )
         
         return df_scaled
     
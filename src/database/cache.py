@@ -0,0 +1,242 @@
+"""
+Cache des résultats des requêtes analytiques (queries.py).
+
+Les tableaux de bord posent en boucle les mêmes questions paramétrées :
+chaque résultat est gardé `ttl` secondes, dans un LRU borné à
+`max_entries` entrées. La clé est (collection, fonction, arguments
+normalisés) : find_expensive_properties(c, 5) et
+find_expensive_properties(c, price_threshold=5.0, limit=10) partagent la
+même entrée.
+
+Les appels concurrents identiques sont regroupés (single-flight) : un
+défaut de cache ne déclenche qu'une requête MongoDB, les autres appelants
+attendent son résultat (ou son exception, qui n'est pas mise en cache).
+Un code qui écrit dans la collection appelle invalidate() ; un résultat
+dont le chargement a commencé avant l'invalidation est rendu à ses
+appelants mais n'est pas stocké.
+
+Configuration (variables d'environnement) :
+- QUERY_CACHE_TTL : durée de vie d'un résultat en secondes (défaut 30)
+- QUERY_CACHE_MAX_ENTRIES : nombre maximum de résultats gardés (défaut 1024)
+
+Example:
+    >>> from src.database.cache import get_top_expensive_zones, query_cache
+    >>> zones = get_top_expensive_zones(collection, top_n=5)   # MongoDB
+    >>> zones = get_top_expensive_zones(collection, 5)         # cache
+    >>> query_cache.invalidate(collection)                      # après une écriture
+    >>> query_cache.stats()['hit_rate']
+"""
+import copy
+import functools
+import inspect
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from src.database import queries
+
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "30"))
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "1024"))
+
+
+def collection_key(collection) -> str:
+    """Identifiant d'une collection : 'base.collection'."""
+    return collection.full_name
+
+
+def _normalize(value):
+    """Valeur hashable, 5 et 5.0 confondus (mêmes requêtes MongoDB)."""
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _normalize(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize(v) for v in value)
+    return value
+
+
+class _Flight:
+    """Chargement en cours d'une clé, partagé par les appelants concurrents."""
+
+    def __init__(self, generation: int):
+        self.generation = generation
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class QueryCache:
+    """
+    Cache TTL + LRU avec regroupement des défauts concurrents.
+
+    Attributes:
+        ttl (float): Durée de vie d'un résultat (secondes)
+        max_entries (int): Résultats gardés au plus (les moins récemment lus sont évincés)
+    """
+
+    def __init__(self, ttl: float = QUERY_CACHE_TTL, max_entries: int = QUERY_CACHE_MAX_ENTRIES,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()    # clé -> (expiration, résultat)
+        self._inflight = {}              # clé -> _Flight
+        self._generations = {}           # collection -> compteur d'invalidations
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.coalesced = 0
+            self.expirations = 0
+            self.evictions = 0
+            self.invalidations = 0
+            self.errors = 0
+
+    def get_or_load(self, key: tuple, loader: Callable[[], Any]):
+        """
+        Résultat en cache pour `key`, sinon loader() (une seule fois pour
+        les appelants concurrents de la même clé).
+
+        Args:
+            key: (collection, fonction, arguments normalisés)
+            loader: Fonction sans argument qui interroge MongoDB
+
+        Returns:
+            Copie du résultat (les appelants peuvent la modifier sans
+            altérer le cache)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return copy.deepcopy(entry[1])
+                del self._entries[key]
+                self.expirations += 1
+
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                self.misses += 1
+                flight = _Flight(self._generations.get(key[0], 0))
+                self._inflight[key] = flight
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return copy.deepcopy(flight.result)
+
+        try:
+            flight.result = loader()
+        except BaseException as e:
+            flight.error = e
+            with self._lock:
+                self.errors += 1
+                del self._inflight[key]
+            flight.done.set()
+            raise
+
+        with self._lock:
+            del self._inflight[key]
+            # Pas de stockage si la collection a été invalidée pendant la requête
+            if self._generations.get(key[0], 0) == flight.generation:
+                self._entries[key] = (self._clock() + self.ttl, flight.result)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        flight.done.set()
+        return copy.deepcopy(flight.result)
+
+    def invalidate(self, collection=None, function: Optional[str] = None) -> int:
+        """
+        Hook des écrivains : oublie les résultats d'une collection (tous
+        si None), éventuellement d'une seule fonction.
+
+        Args:
+            collection: Collection pymongo ou 'base.collection'
+            function: Nom d'une fonction de queries.py
+
+        Returns:
+            int: Nombre de résultats supprimés
+        """
+        name = None
+        if collection is not None:
+            name = collection if isinstance(collection, str) else collection_key(collection)
+        with self._lock:
+            stale = [
+                key for key in self._entries
+                if (name is None or key[0] == name) and (function is None or key[1] == function)
+            ]
+            for key in stale:
+                del self._entries[key]
+            # Les chargements en cours ne seront pas stockés
+            for key in self._inflight:
+                if name is None or key[0] == name:
+                    self._generations[key[0]] = self._generations.get(key[0], 0) + 1
+            self.invalidations += 1
+            return len(stale)
+
+    def clear(self):
+        """Vide le cache (statistiques conservées)."""
+        self.invalidate()
+
+    def stats(self) -> Dict[str, Any]:
+        """Compteurs et taux de succès (hits / lectures)."""
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "errors": self.errors,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+    def wrap(self, function: Callable) -> Callable:
+        """
+        Version mise en cache d'une fonction f(collection, ...) de queries.py.
+
+        La fonction d'origine reste accessible via `.uncached`.
+        """
+        signature = inspect.signature(function)
+
+        @functools.wraps(function)
+        def cached(collection, *args, **kwargs):
+            bound = signature.bind(collection, *args, **kwargs)
+            bound.apply_defaults()
+            arguments = tuple(
+                (name, _normalize(value)) for name, value in bound.arguments.items() if name != "collection"
+            )
+            key = (collection_key(collection), function.__name__, arguments)
+            return self.get_or_load(key, lambda: function(collection, *args, **kwargs))
+
+        cached.uncached = function
+        cached.cache = self
+        return cached
+
+
+# Cache partagé du processus et versions mises en cache des requêtes des tableaux de bord
+query_cache = QueryCache()
+
+find_expensive_properties = query_cache.wrap(queries.find_expensive_properties)
+get_properties_by_price_category = query_cache.wrap(queries.get_properties_by_price_category)
+get_average_price_by_category = query_cache.wrap(queries.get_average_price_by_category)
+get_top_expensive_zones = query_cache.wrap(queries.get_top_expensive_zones)
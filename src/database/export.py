@@ -0,0 +1,332 @@
+"""
+Export parallèle d'une collection MongoDB vers Parquet pour l'entraînement.
+
+La collection est découpée en plages contiguës d'une clé indexée (`_id`
+par défaut) : les bornes sont des quantiles d'un échantillon ($sample),
+chaque plage est lue par un curseur indépendant (projection sur les
+champs utiles, gros batchs) et écrite dans son propre fichier Parquet :
+
+    <output_dir>/part-00000.parquet, part-00001.parquet, ...
+
+Les documents ne passent jamais par un DataFrame : chaque bloc de
+documents est converti champ par champ en tableaux float64 (champ
+absent ou null -> NaN), puis en colonnes Arrow. Le dossier se relit
+d'un bloc avec read_parquet_export() ou pandas.read_parquet(output_dir).
+
+Les partitions sont lues en parallèle par des threads (un seul
+MongoClient, pymongo est thread-safe) ou par des processus
+(executor='process' : chaque processus ouvre sa propre
+MongoDBConnection, donc MONGODB_URL doit être défini).
+
+Example:
+    >>> mongo = MongoDBConnection()
+    >>> summary = export_collection(mongo.get_collection('properties'), 'data/processed/properties')
+    >>> df = read_parquet_export('data/processed/properties')
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+from operator import itemgetter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from pymongo.collection import Collection
+
+from src.data.load_data import get_feature_names, get_target_name
+
+DEFAULT_FIELDS = get_feature_names() + [get_target_name()]
+PART_PATTERN = "part-{:05d}.parquet"
+# Documents convertis et écrits par row group Parquet
+CHUNK_ROWS = 65_536
+SAMPLE_PER_PARTITION = 64
+
+
+def partition_bounds(
+    collection: Collection,
+    partitions: int,
+    key: str = "_id",
+    query: Optional[Dict[str, Any]] = None,
+    sample_per_partition: int = SAMPLE_PER_PARTITION
+) -> List[tuple]:
+    """
+    Bornes de plages de `key` de tailles voisines.
+
+    Les bornes sont les quantiles d'un échantillon de
+    partitions * sample_per_partition clés : pas de scan complet. Les
+    plages sont disjointes et couvrent toutes les valeurs de `key` d'un
+    même type BSON (la clé doit être présente et d'un seul type, ce qui
+    est toujours le cas de `_id`).
+
+    Args:
+        collection: Collection MongoDB
+        partitions: Nombre de plages souhaité
+        key: Champ indexé servant au découpage
+        query: Filtre optionnel
+        sample_per_partition: Clés échantillonnées par plage
+
+    Returns:
+        list: (borne basse incluse, borne haute exclue) par plage, None
+            pour une plage ouverte ; moins que `partitions` plages si la
+            clé a peu de valeurs distinctes
+    """
+    if partitions <= 1:
+        return [(None, None)]
+
+    pipeline = [{"$match": query}] if query else []
+    pipeline += [
+        {"$sample": {"size": partitions * sample_per_partition}},
+        {"$project": {"_id": 0, "k": f"${key}"}}
+    ]
+    keys = sorted(doc["k"] for doc in collection.aggregate(pipeline) if doc.get("k") is not None)
+    bounds = []
+    for i in range(1, partitions):
+        if keys:
+            bound = keys[i * len(keys) // partitions]
+            if not bounds or bound > bounds[-1]:
+                bounds.append(bound)
+    return list(zip([None] + bounds, bounds + [None]))
+
+
+def range_query(key: str, lower=None, upper=None, query: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Filtre find() d'une plage [lower, upper) de `key`, combiné à `query`."""
+    query = query or {}
+    condition = {}
+    if lower is not None:
+        condition["$gte"] = lower
+    if upper is not None:
+        condition["$lt"] = upper
+    if not condition:
+        return query
+    if not query:
+        return {key: condition}
+    return {"$and": [query, {key: condition}]}
+
+
+def plan_partitions(
+    collection: Collection,
+    partitions: int,
+    key: str = "_id",
+    query: Optional[Dict[str, Any]] = None,
+    sample_per_partition: int = SAMPLE_PER_PARTITION
+) -> List[Dict[str, Any]]:
+    """
+    Découpe la collection en plages de `key` (voir partition_bounds()).
+
+    Returns:
+        list: Un filtre find() par plage
+    """
+    return [
+        range_query(key, lower, upper, query)
+        for lower, upper in partition_bounds(collection, partitions, key, query, sample_per_partition)
+    ]
+
+
+def documents_to_columns(documents: List[Dict[str, Any]], fields: List[str]) -> List[np.ndarray]:
+    """
+    Convertit des documents en un tableau float64 par champ.
+
+    Une passe itemgetter -> np.fromiter par champ (pas de DataFrame ni de
+    liste de lignes intermédiaire) ; si un champ est absent ou null dans
+    le bloc, repli sur une conversion qui le remplace par NaN.
+
+    Raises:
+        ValueError: si un champ n'est pas numérique
+    """
+    try:
+        return [np.fromiter(map(itemgetter(field), documents), np.float64, len(documents)) for field in fields]
+    except (KeyError, TypeError):
+        try:
+            return [np.array([doc.get(field) for doc in documents], dtype=np.float64) for field in fields]
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Champ non numérique parmi {fields} : {e}")
+    except ValueError as e:
+        raise ValueError(f"Champ non numérique parmi {fields} : {e}")
+
+
+def documents_to_table(documents: List[Dict[str, Any]], fields: List[str]):
+    """Convertit des documents en table Arrow de colonnes float64 (voir documents_to_columns())."""
+    import pyarrow as pa
+
+    columns = documents_to_columns(documents, fields)
+    return pa.Table.from_arrays([pa.array(column) for column in columns], names=list(fields))
+
+
+def export_partition(
+    collection: Collection,
+    partition_query: Dict[str, Any],
+    fields: List[str],
+    path,
+    batch_size: int = 10_000,
+    chunk_rows: int = CHUNK_ROWS
+) -> Dict[str, Any]:
+    """
+    Lit une plage et l'écrit dans un fichier Parquet (un row group par bloc).
+
+    Le fichier est écrit sous un nom temporaire puis renommé : un fichier
+    part-*.parquet présent est toujours complet.
+
+    Returns:
+        dict: rows, seconds et path de la partition
+    """
+    import pyarrow.parquet as pq
+
+    start = time.perf_counter()
+    path = Path(path)
+    tmp_path = path.with_suffix(".parquet.tmp")
+    projection = {field: 1 for field in fields}
+    projection["_id"] = 0
+    cursor = collection.find(partition_query, projection, batch_size=batch_size)
+
+    rows = 0
+    writer = None
+    try:
+        while True:
+            documents = list(islice(cursor, chunk_rows))
+            if not documents and writer is not None:
+                break
+            table = documents_to_table(documents, fields)
+            if writer is None:
+                writer = pq.ParquetWriter(tmp_path, table.schema)
+            writer.write_table(table)
+            rows += len(documents)
+            if not documents:
+                break
+    finally:
+        cursor.close()
+        if writer is not None:
+            writer.close()
+    os.replace(tmp_path, path)
+    return {"path": str(path), "rows": rows, "seconds": time.perf_counter() - start}
+
+
+def _export_partition_in_process(database_name, collection_name, partition_query, fields, path,
+                                 batch_size, chunk_rows):
+    """Point d'entrée d'un processus du pool : connexion propre au processus, sur la base source."""
+    from src.database.mongodb import MongoDBConnection
+
+    mongo = MongoDBConnection()
+    mongo.db_name = database_name
+    try:
+        return export_partition(
+            mongo.get_collection(collection_name), partition_query, fields, path, batch_size, chunk_rows
+        )
+    finally:
+        mongo.close()
+
+
+def export_collection(
+    collection: Collection,
+    output_dir,
+    fields: Optional[List[str]] = None,
+    query: Optional[Dict[str, Any]] = None,
+    key: str = "_id",
+    partitions: int = 8,
+    workers: Optional[int] = None,
+    batch_size: int = 10_000,
+    chunk_rows: int = CHUNK_ROWS,
+    executor: str = "thread"
+) -> Dict[str, Any]:
+    """
+    Exporte une collection en Parquet partitionné, plages lues en parallèle.
+
+    Les anciens part-*.parquet du dossier sont supprimés avant l'export.
+
+    Args:
+        collection: Collection MongoDB source
+        output_dir: Dossier de sortie
+        fields: Champs numériques exportés (défaut : features + cible)
+        query: Filtre optionnel
+        key: Champ indexé de découpage (défaut `_id`)
+        partitions: Nombre de plages
+        workers: Lectures simultanées (défaut : une par plage)
+        batch_size: Taille des batchs du curseur MongoDB
+        chunk_rows: Documents par row group Parquet
+        executor: 'thread' ou 'process'
+
+    Returns:
+        dict: rows, expected_rows, seconds, docs_per_second, partitions (détail)
+    """
+    if executor not in ("thread", "process"):
+        raise ValueError(f"executor inconnu : {executor}")
+    fields = list(fields or DEFAULT_FIELDS)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for old in output_dir.glob("part-*.parquet"):
+        old.unlink()
+
+    start = time.perf_counter()
+    ranges = plan_partitions(collection, partitions, key=key, query=query)
+    paths = [output_dir / PART_PATTERN.format(i) for i in range(len(ranges))]
+    workers = min(workers or len(ranges), len(ranges))
+
+    if executor == "process":
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_export_partition_in_process, collection.database.name, collection.name,
+                            r, fields, str(p), batch_size, chunk_rows)
+                for r, p in zip(ranges, paths)
+            ]
+            results = [future.result() for future in futures]
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mongo-export") as pool:
+            futures = [
+                pool.submit(export_partition, collection, r, fields, p, batch_size, chunk_rows)
+                for r, p in zip(ranges, paths)
+            ]
+            results = [future.result() for future in futures]
+
+    seconds = time.perf_counter() - start
+    rows = sum(result["rows"] for result in results)
+    expected_rows = collection.count_documents(query or {})
+    if rows != expected_rows:
+        # Documents sans `key` ou d'un autre type BSON : hors de toutes les plages
+        print(f" Attention : {rows} documents exportés sur {expected_rows} (clé '{key}' absente ou de type mixte ?)")
+    return {
+        "rows": rows,
+        "expected_rows": expected_rows,
+        "seconds": seconds,
+        "docs_per_second": rows / seconds if seconds > 0 else 0.0,
+        "partitions": results
+    }
+
+
+def read_parquet_export(path, columns: Optional[List[str]] = None):
+    """
+    Relit un export (dossier de part-*.parquet) en un DataFrame.
+
+    Le résultat a les colonnes attendues par DataPreprocessor.fit_transform().
+    """
+    import pyarrow.parquet as pq
+
+    files = sorted(Path(path).glob("part-*.parquet"))
+    if not files:
+        raise FileNotFoundError(f"Aucun fichier part-*.parquet dans {path}")
+    return pq.ParquetDataset([str(f) for f in files]).read(columns=columns).to_pandas()
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+    from src.database.mongodb import MongoDBConnection
+
+    parser = argparse.ArgumentParser(description="Exporte une collection MongoDB en Parquet partitionné")
+    parser.add_argument("--collection", default="properties")
+    parser.add_argument("--output", default=os.path.join(os.path.dirname(__file__), '../../data/processed/properties'))
+    parser.add_argument("--partitions", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--key", default="_id", help="Champ indexé de découpage")
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--executor", choices=("thread", "process"), default="thread")
+    args = parser.parse_args()
+
+    mongo = MongoDBConnection()
+    summary = export_collection(
+        mongo.get_collection(args.collection), args.output, key=args.key, partitions=args.partitions,
+        workers=args.workers, batch_size=args.batch_size, executor=args.executor
+    )
+    mongo.close()
+    print(f" {summary['rows']:,} documents en {summary['seconds']:.1f}s "
+          f"({summary['docs_per_second']:,.0f} docs/s, {len(summary['partitions'])} partitions)")
@@ -168,6 +168,9 @@ class MongoDBConnection:
         try:
             self.db.drop_collection(collection_name)
             print(f" Collection '{collection_name}' supprimée")
+            # Résultats de requêtes en cache devenus faux (src/database/cache.py)
+            from src.database.cache import query_cache
+            query_cache.invalidate(f"{self.db.name}.{collection_name}")
             return True
         except Exception as e:
             print(f" Erreur lors de la suppression : {e}")
@@ -0,0 +1,428 @@
+"""
+Re-scoring incrémental des prix prédits stockés dans `properties`.
+
+Chaque document scoré porte trois champs : `predicted_price`,
+`model_version` (training_date de model_metadata.json) et `scored_at`.
+Le service ne re-prédit que ce qui a changé :
+
+- Données modifiées : change stream (full_document='updateLookup') filtré
+  sur les insertions, remplacements et mises à jour d'une feature, ou, sans
+  replica set, scrutation du champ `updated_at` (index {updated_at, _id}).
+  Les événements sont regroupés en micro-batchs (batch_size documents ou
+  max_wait secondes) ; la position (resume token ou dernier
+  updated_at/_id) est enregistrée après chaque batch écrit.
+- Modèle changé : quand la version de model_metadata.json diffère de
+  celle du dernier re-score complet, toute la collection est re-scorée en
+  parallèle par plages de `_id` (partition_bounds() de export.py), page par
+  page ; chaque plage enregistre son dernier `_id` traité, un re-score
+  interrompu reprend là où il s'était arrêté. Au démarrage d'un re-score
+  complet, la position de scrutation passe au dernier (updated_at, _id) :
+  la scrutation ne re-prédit pas ce que le re-score complet couvre déjà.
+
+Les écritures sont des bulk_write(UpdateOne, ordered=False) qui ne
+touchent que les champs de score, donc ne redéclenchent ni le change
+stream ni la scrutation ; un document modifié entre sa lecture et
+l'écriture (updated_at différent) n'est pas écrasé avec un prix périmé.
+L'état du service est un document par collection dans `rescore_state`.
+
+Example:
+    >>> mongo = MongoDBConnection()
+    >>> rescorer = Rescorer(mongo.get_collection('properties'), mongo.get_collection('rescore_state'))
+    >>> rescorer.run()          # re-score complet si besoin, puis incrémental
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from pymongo import UpdateOne
+from pymongo.collection import Collection
+from pymongo.errors import OperationFailure
+
+from src.data.load_data import get_feature_names
+from src.database.export import documents_to_columns, partition_bounds, range_query
+
+PRICE_FIELD = "predicted_price"
+VERSION_FIELD = "model_version"
+SCORED_AT_FIELD = "scored_at"
+UPDATED_AT_FIELD = "updated_at"
+
+MODEL_DIR = Path(os.getenv("MODEL_DIR", Path(__file__).resolve().parent.parent.parent / "models"))
+
+
+def read_model_version(metadata_path) -> str:
+    """Version du modèle déployé : training_date de model_metadata.json."""
+    with open(metadata_path) as f:
+        return json.load(f)["training_date"]
+
+
+class Scorer:
+    """
+    Modèle + preprocessor d'une version donnée.
+
+    Attributes:
+        version (str): Version écrite dans `model_version`
+    """
+
+    def __init__(self, model, preprocessor, version: str):
+        self.model = model
+        self.preprocessor = preprocessor
+        self.version = version
+
+    @classmethod
+    def from_model_dir(cls, model_dir=MODEL_DIR):
+        """Charge le dernier modèle, le preprocessor et la version d'un dossier de modèle."""
+        import joblib
+        from src.models.artifacts import latest_model_path
+
+        model_dir = Path(model_dir)
+        return cls(
+            joblib.load(latest_model_path(model_dir)),
+            joblib.load(model_dir / "preprocessor.joblib"),
+            read_model_version(model_dir / "model_metadata.json")
+        )
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Prix prédits pour une matrice (n, 8) dans l'ordre get_feature_names()."""
+        import pandas as pd
+
+        frame = pd.DataFrame(X, columns=get_feature_names(), copy=False)
+        return np.asarray(self.model.predict(self.preprocessor.transform(frame)), dtype=float)
+
+
+class Rescorer:
+    """
+    Service de re-scoring d'une collection.
+
+    Args:
+        collection: Collection des propriétés
+        state_collection: Collection de l'état du service (positions, re-score complet)
+        load_scorer: Fonction sans argument renvoyant un Scorer (défaut :
+            Scorer.from_model_dir(model_dir))
+        model_dir: Dossier du modèle (model_metadata.json y est surveillé)
+        batch_size: Documents par prédiction et par bulk_write
+        max_wait: Attente maximale (s) avant d'écrire un micro-batch incomplet
+        partitions: Plages du re-score complet
+        workers: Plages traitées simultanément (défaut : partitions)
+    """
+
+    def __init__(self, collection: Collection, state_collection: Collection,
+                 load_scorer: Optional[Callable[[], Scorer]] = None, model_dir=MODEL_DIR,
+                 batch_size: int = 500, max_wait: float = 1.0, partitions: int = 8,
+                 workers: Optional[int] = None):
+        self.collection = collection
+        self.state_collection = state_collection
+        self.model_dir = Path(model_dir)
+        self.load_scorer = load_scorer or (lambda: Scorer.from_model_dir(self.model_dir))
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.partitions = partitions
+        self.workers = workers or partitions
+        self.features = get_feature_names()
+        self.projection = {field: 1 for field in self.features + [UPDATED_AT_FIELD]}
+        self.scorer = self.load_scorer()
+        self._state_id = collection.name
+
+    # --- Etat -------------------------------------------------------------
+
+    def state(self) -> Dict[str, Any]:
+        return self.state_collection.find_one({"_id": self._state_id}) or {"_id": self._state_id}
+
+    def _save_state(self, update: Dict[str, Any], inc: Optional[Dict[str, Any]] = None):
+        operations = {"$set": update}
+        if inc:
+            operations["$inc"] = inc
+        self.state_collection.update_one({"_id": self._state_id}, operations, upsert=True)
+
+    def ensure_indexes(self):
+        """Index de la scrutation par updated_at (sans effet s'il existe)."""
+        self.collection.create_index([(UPDATED_AT_FIELD, 1), ("_id", 1)])
+
+    # --- Prediction et ecriture --------------------------------------------
+
+    def rescore_documents(self, documents: List[Dict[str, Any]], scorer: Optional[Scorer] = None) -> Dict[str, int]:
+        """
+        Re-prédit des documents et écrit les prix en un bulk_write.
+
+        Les documents dont une feature est absente, non numérique ou non
+        finie ne sont pas scorés (comptés dans 'invalid').
+
+        Returns:
+            dict: scored, invalid
+        """
+        if not documents:
+            return {"scored": 0, "invalid": 0}
+        scorer = scorer or self.scorer
+        X = self._feature_matrix(documents)
+        valid = np.isfinite(X).all(axis=1)
+        prices = np.full(len(documents), np.nan)
+        if valid.any():
+            prices[valid] = scorer.predict(X[valid])
+
+        now = datetime.now(timezone.utc)
+        operations = []
+        for document, price, ok in zip(documents, prices.tolist(), valid.tolist()):
+            if not ok:
+                continue
+            selector = {"_id": document["_id"]}
+            if UPDATED_AT_FIELD in document:
+                # Document modifie depuis sa lecture : le prochain batch incremental le traitera
+                selector[UPDATED_AT_FIELD] = document[UPDATED_AT_FIELD]
+            operations.append(UpdateOne(selector, {"$set": {
+                PRICE_FIELD: price, VERSION_FIELD: scorer.version, SCORED_AT_FIELD: now
+            }}))
+        if operations:
+            self.collection.bulk_write(operations, ordered=False)
+        return {"scored": len(operations), "invalid": len(documents) - len(operations)}
+
+    def _feature_matrix(self, documents: List[Dict[str, Any]]) -> np.ndarray:
+        """Matrice (n, 8) des features ; NaN sur toute la ligne d'un document non numérique."""
+        try:
+            return np.column_stack(documents_to_columns(documents, self.features))
+        except ValueError:
+            # Un seul document invalide ne doit pas bloquer le micro-batch (ni
+            # la boucle poll/watch, qui relirait le même batch au redémarrage)
+            X = np.full((len(documents), len(self.features)), np.nan)
+            for i, document in enumerate(documents):
+                try:
+                    X[i] = np.array([document.get(field) for field in self.features], dtype=np.float64)
+                except (TypeError, ValueError):
+                    pass
+            return X
+
+    # --- Re-score complet --------------------------------------------------
+
+    def full_rescore(self) -> Dict[str, Any]:
+        """
+        Re-score complet avec le modèle courant, reprenant un re-score interrompu.
+
+        Le plan (bornes des plages) est enregistré au démarrage ; une
+        reprise pour la même version réutilise le plan et le dernier `_id`
+        de chaque plage. Au démarrage, la position de scrutation avance au
+        dernier document modifié : les modifications antérieures sont
+        couvertes par le re-score complet.
+
+        Returns:
+            dict: model_version, scored, invalid, seconds
+        """
+        scorer = self.scorer
+        full = self.state().get("full")
+        if not full or full.get("model_version") != scorer.version:
+            self._advance_poll_position()
+            full = {
+                "model_version": scorer.version,
+                "started_at": datetime.now(timezone.utc),
+                "done": False,
+                "partitions": [
+                    {"lower": lower, "upper": upper, "last_id": None, "scored": 0, "invalid": 0, "done": False}
+                    for lower, upper in partition_bounds(self.collection, self.partitions)
+                ]
+            }
+            self._save_state({"full": full})
+        elif full.get("done"):
+            return {"model_version": scorer.version, "scored": 0, "invalid": 0, "seconds": 0.0}
+
+        start = time.perf_counter()
+        pending = [i for i, part in enumerate(full["partitions"]) if not part["done"]]
+        with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(pending))),
+                                thread_name_prefix="rescore") as pool:
+            counts = list(pool.map(lambda i: self._rescore_partition(scorer, i, full["partitions"][i]), pending))
+
+        self._save_state({"full.done": True, "full.finished_at": datetime.now(timezone.utc)})
+        return {
+            "model_version": scorer.version,
+            "scored": sum(c["scored"] for c in counts),
+            "invalid": sum(c["invalid"] for c in counts),
+            "seconds": time.perf_counter() - start
+        }
+
+    def _advance_poll_position(self):
+        last = self.collection.find_one(
+            {UPDATED_AT_FIELD: {"$exists": True}}, {UPDATED_AT_FIELD: 1},
+            sort=[(UPDATED_AT_FIELD, -1), ("_id", -1)]
+        )
+        if last is not None:
+            self._save_state({"poll_position": {"updated_at": last[UPDATED_AT_FIELD], "_id": last["_id"]}})
+
+    def _rescore_partition(self, scorer: Scorer, index: int, part: Dict[str, Any]) -> Dict[str, int]:
+        # Pagination par _id : chaque page est une requete independante, donc reprenable
+        total = {"scored": 0, "invalid": 0}
+        last_id = part["last_id"]
+        prefix = f"full.partitions.{index}"
+        while True:
+            query = range_query("_id", part["lower"], part["upper"])
+            if last_id is not None:
+                query = {"$and": [query, {"_id": {"$gt": last_id}}]} if query else {"_id": {"$gt": last_id}}
+            documents = list(self.collection.find(query, self.projection).sort("_id", 1).limit(self.batch_size))
+            if not documents:
+                break
+            counts = self.rescore_documents(documents, scorer)
+            last_id = documents[-1]["_id"]
+            self._save_state({f"{prefix}.last_id": last_id},
+                             inc={f"{prefix}.scored": counts["scored"], f"{prefix}.invalid": counts["invalid"]})
+            total["scored"] += counts["scored"]
+            total["invalid"] += counts["invalid"]
+        self._save_state({f"{prefix}.done": True})
+        return total
+
+    def sync_model(self) -> Optional[Dict[str, Any]]:
+        """
+        Recharge le modèle si model_metadata.json a changé et termine le re-score complet.
+
+        Returns:
+            dict: résumé du re-score complet, None s'il n'y avait rien à faire
+        """
+        metadata_path = self.model_dir / "model_metadata.json"
+        if metadata_path.exists() and read_model_version(metadata_path) != self.scorer.version:
+            self.scorer = self.load_scorer()
+        full = self.state().get("full")
+        if full and full.get("model_version") == self.scorer.version and full.get("done"):
+            return None
+        return self.full_rescore()
+
+    # --- Incremental ---------------------------------------------------------
+
+    def change_pipeline(self) -> List[Dict[str, Any]]:
+        """Filtre du change stream : insertions, remplacements et mises à jour d'une feature."""
+        touched = [{f"updateDescription.updatedFields.{field}": {"$exists": True}} for field in self.features]
+        touched.append({"updateDescription.removedFields": {"$in": self.features}})
+        return [{"$match": {"$or": [
+            {"operationType": {"$in": ["insert", "replace"]}},
+            {"operationType": "update", "$or": touched}
+        ]}}]
+
+    def poll_once(self) -> Dict[str, int]:
+        """
+        Re-score le prochain micro-batch de documents modifiés (scrutation de updated_at).
+
+        Returns:
+            dict: scored, invalid
+        """
+        position = self.state().get("poll_position")
+        if position is None:
+            query = {UPDATED_AT_FIELD: {"$exists": True}}
+        else:
+            query = {"$or": [
+                {UPDATED_AT_FIELD: {"$gt": position["updated_at"]}},
+                {UPDATED_AT_FIELD: position["updated_at"], "_id": {"$gt": position["_id"]}}
+            ]}
+        documents = list(
+            self.collection.find(query, self.projection)
+            .sort([(UPDATED_AT_FIELD, 1), ("_id", 1)])
+            .limit(self.batch_size)
+        )
+        counts = self.rescore_documents(documents)
+        if documents:
+            last = documents[-1]
+            self._save_state({"poll_position": {"updated_at": last[UPDATED_AT_FIELD], "_id": last["_id"]}})
+        return counts
+
+    def poll(self, stop_event: threading.Event, interval: float = 1.0, check_interval: float = 60.0):
+        """Scrute updated_at jusqu'à stop_event ; vérifie la version du modèle toutes les check_interval s."""
+        self.ensure_indexes()
+        next_check = time.monotonic() + check_interval
+        while not stop_event.is_set():
+            counts = self.poll_once()
+            if time.monotonic() >= next_check:
+                self.sync_model()
+                next_check = time.monotonic() + check_interval
+            if counts["scored"] + counts["invalid"] < self.batch_size:
+                stop_event.wait(interval)
+
+    def watch(self, stop_event: threading.Event, check_interval: float = 60.0):
+        """
+        Suit le change stream jusqu'à stop_event, en micro-batchs.
+
+        Raises:
+            OperationFailure: change streams indisponibles (pas de replica set)
+        """
+        next_check = time.monotonic() + check_interval
+        with self.collection.watch(
+            self.change_pipeline(), full_document="updateLookup",
+            resume_after=self.state().get("resume_token"), max_await_time_ms=int(self.max_wait * 1000)
+        ) as stream:
+            while not stop_event.is_set():
+                documents, first_at = {}, None
+                while len(documents) < self.batch_size and not stop_event.is_set():
+                    change = stream.try_next()
+                    if change is None:
+                        if documents:
+                            break
+                    else:
+                        document = change.get("fullDocument")
+                        if document is not None:
+                            # Plusieurs evenements pour un document : seul le dernier etat compte
+                            documents[document["_id"]] = document
+                        first_at = first_at or time.monotonic()
+                    if first_at is not None and time.monotonic() - first_at >= self.max_wait:
+                        break
+                    if time.monotonic() >= next_check:
+                        break
+                self.rescore_documents(list(documents.values()))
+                if stream.resume_token is not None:
+                    self._save_state({"resume_token": stream.resume_token})
+                if time.monotonic() >= next_check:
+                    self.sync_model()
+                    next_check = time.monotonic() + check_interval
+
+    def run(self, mode: str = "auto", stop_event: Optional[threading.Event] = None, check_interval: float = 60.0):
+        """
+        Re-score complet si la version du modèle a changé, puis incrémental.
+
+        Args:
+            mode: 'watch' (change stream), 'poll' (updated_at) ou 'auto'
+                (change stream, scrutation si indisponible)
+            stop_event: Arrêt du service (défaut : jamais)
+            check_interval: Intervalle (s) de vérification de model_metadata.json
+        """
+        stop_event = stop_event or threading.Event()
+        summary = self.sync_model()
+        if summary is not None:
+            print(f" Re-score complet ({summary['model_version']}) : {summary['scored']:,} documents "
+                  f"en {summary['seconds']:.1f}s")
+        if mode in ("auto", "watch"):
+            try:
+                return self.watch(stop_event, check_interval=check_interval)
+            except (OperationFailure, NotImplementedError) as e:
+                if mode == "watch":
+                    raise
+                print(f" Change streams indisponibles ({e}), scrutation de '{UPDATED_AT_FIELD}'")
+        return self.poll(stop_event, check_interval=check_interval)
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+    from src.database.mongodb import MongoDBConnection
+
+    parser = argparse.ArgumentParser(description="Re-scoring des prix stockés dans MongoDB")
+    parser.add_argument("--collection", default="properties")
+    parser.add_argument("--model-dir", default=str(MODEL_DIR))
+    parser.add_argument("--mode", choices=("auto", "watch", "poll", "full"), default="auto",
+                        help="full : re-score complet (ou reprise) puis arrêt")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--partitions", type=int, default=8)
+    args = parser.parse_args()
+
+    mongo = MongoDBConnection()
+    rescorer = Rescorer(
+        mongo.get_collection(args.collection), mongo.get_collection("rescore_state"),
+        model_dir=args.model_dir, batch_size=args.batch_size, partitions=args.partitions
+    )
+    try:
+        if args.mode == "full":
+            summary = rescorer.full_rescore()
+            print(f" {summary['scored']:,} documents re-scorés ({summary['invalid']} invalides) "
+                  f"en {summary['seconds']:.1f}s")
+        else:
+            rescorer.run(args.mode)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        mongo.close()
@@ -1,7 +1,32 @@
-import pandas as pd
 import numpy as np
 
+from src.data.load_data import get_feature_names
+from src.features.kernel import compute_engineered_features
+
 def add_engineered_features(df, inplace=False):
+    """
+    Ajoute les 5 features construites, calculees par le noyau fusionne
+    (src/features/kernel.py) en une passe sur les 8 colonnes brutes.
+
+    Memes valeurs que add_engineered_features_pandas() (division IEEE :
+    x / 0 = inf, 0 / 0 = NaN), colonnes en float64.
+    """
+    raw, engineered = get_feature_names(), get_engineered_feature_names()
+    if not set(raw).issubset(df.columns):
+        return add_engineered_features_pandas(df, inplace=inplace)
+    values = compute_engineered_features(df[raw].to_numpy(dtype=np.float64))
+    if inplace or set(engineered) & set(df.columns):
+        if not inplace:
+            df = df.copy()
+        for i, name in enumerate(engineered):
+            df[name] = values[:, i]
+        return df
+    # Une seule concatenation plutot que 5 insertions de colonnes
+    import pandas as pd
+    return pd.concat([df, pd.DataFrame(values, columns=engineered, index=df.index, copy=False)], axis=1)
+
+def add_engineered_features_pandas(df, inplace=False):
+    """Implementation de reference en expressions pandas (une colonne a la fois)."""
     if not inplace:
         df = df.copy()
     df['BedroomRatio'] = df['AveBedrms'] / df['AveRooms']
@@ -15,6 +40,10 @@ def add_engineered_features(df, inplace=False):
 def get_engineered_feature_names():
     return ['BedroomRatio', 'RoomsPerPerson', 'PopulationDensity', 'IncomeAge', 'DistanceToSF']
 
+def engineered_feature_array(X):
+    """Meme calcul que add_engineered_features() sur une matrice (n, 8) dans l'ordre de get_feature_names()."""
+    return compute_engineered_features(X)
+
 if __name__ == "__main__":
     import sys
     import os
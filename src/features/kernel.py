@@ -0,0 +1,197 @@
+"""
+Noyau fusionne des features construites.
+
+Calcule les 5 colonnes de get_engineered_feature_names() a partir d'une
+matrice contigue (n, 8) dans l'ordre de get_feature_names(), ecrites
+dans un tableau de sortie (n, 5) preallouable :
+- 'numba' : une seule boucle compilee sur les lignes (sequentielle, compilee
+  au premier get_kernel())
+- 'numexpr' : une expression evaluee par colonne, par blocs, sans temporaire
+- 'numpy' : par blocs de BLOCK_ROWS lignes (tenant en cache), operations
+  ecrites dans la sortie (out=) ; un seul tableau temporaire par bloc
+
+Backend choisi a l'execution : FEATURE_KERNEL_BACKEND (auto, numba,
+numexpr, numpy), 'auto' prenant le premier disponible dans cet ordre.
+numba et numexpr sont optionnels et importes au premier appel ; un
+backend qui ne compile pas (cache numba non inscriptible, ...) est ecarte
+au profit de numpy.
+
+Le noyau numba n'utilise pas parallel=True : transform() est appele en
+meme temps par plusieurs threads de l'executor d'inference, et la couche
+de threads par defaut de numba (workqueue) fait avorter le processus si
+elle est entree depuis plusieurs threads a la fois. Le parallelisme vient
+de l'executor, pas du noyau.
+
+Regle de division (identique pour tous les backends, et pour pandas) :
+IEEE 754. x / 0 = +/-inf, 0 / 0 = NaN, NaN et inf se propagent ;
+aucune exception ni avertissement. Le capping du preprocessor ramene
+ensuite les +/-inf sur ses bornes.
+"""
+
+import os
+
+import numpy as np
+
+N_RAW = 8
+N_ENGINEERED = 5
+BLOCK_ROWS = 16_384
+SF_LAT, SF_LON = 37.7749, -122.4194
+
+BACKENDS = ("numba", "numexpr", "numpy")
+FEATURE_KERNEL_BACKEND = os.getenv("FEATURE_KERNEL_BACKEND", "auto")
+
+_kernels = {}
+
+
+def _numpy_kernel(X, out):
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        tmp = np.empty(min(len(X), BLOCK_ROWS))
+        for start in range(0, len(X), BLOCK_ROWS):
+            x = X[start:start + BLOCK_ROWS]
+            o = out[start:start + BLOCK_ROWS]
+            t = tmp[:len(x)]
+            np.divide(x[:, 3], x[:, 2], out=o[:, 0])
+            np.divide(x[:, 2], x[:, 5], out=o[:, 1])
+            np.divide(x[:, 4], x[:, 5], out=o[:, 2])
+            np.multiply(x[:, 0], x[:, 1], out=o[:, 3])
+            # sqrt(dlat^2 + dlon^2), dans le meme ordre d'operations que pandas
+            np.subtract(x[:, 6], SF_LAT, out=o[:, 4])
+            np.square(o[:, 4], out=o[:, 4])
+            np.subtract(x[:, 7], SF_LON, out=t)
+            np.square(t, out=t)
+            np.add(o[:, 4], t, out=o[:, 4])
+            np.sqrt(o[:, 4], out=o[:, 4])
+    return out
+
+
+def _make_numexpr_kernel():
+    import numexpr
+
+    expressions = [
+        ("b / r", {"b": 3, "r": 2}),
+        ("r / o", {"r": 2, "o": 5}),
+        ("p / o", {"p": 4, "o": 5}),
+        ("m * a", {"m": 0, "a": 1}),
+        (f"sqrt((lat - {SF_LAT!r}) ** 2 + (lon - {SF_LON!r}) ** 2)", {"lat": 6, "lon": 7}),
+    ]
+
+    def kernel(X, out):
+        # Colonnes contigues par bloc : numexpr travaille sur des vecteurs
+        result = np.empty((N_ENGINEERED, min(len(X), BLOCK_ROWS)))
+        for start in range(0, len(X), BLOCK_ROWS):
+            block = np.ascontiguousarray(X[start:start + BLOCK_ROWS].T)
+            r = result[:, :block.shape[1]]
+            for k, (expression, columns) in enumerate(expressions):
+                numexpr.evaluate(
+                    expression, local_dict={name: block[c] for name, c in columns.items()}, out=r[k]
+                )
+            out[start:start + BLOCK_ROWS] = r.T
+        return out
+
+    return kernel
+
+
+def _make_numba_kernel():
+    import numba
+
+    def kernel(X, out):
+        for i in range(X.shape[0]):
+            med_inc, house_age, ave_rooms, ave_bedrms = X[i, 0], X[i, 1], X[i, 2], X[i, 3]
+            population, ave_occup = X[i, 4], X[i, 5]
+            dlat, dlon = X[i, 6] - SF_LAT, X[i, 7] - SF_LON
+            out[i, 0] = ave_bedrms / ave_rooms
+            out[i, 1] = ave_rooms / ave_occup
+            out[i, 2] = population / ave_occup
+            out[i, 3] = med_inc * house_age
+            out[i, 4] = np.sqrt(dlat * dlat + dlon * dlon)
+        return out
+
+    # error_model='numpy' : division IEEE (inf / NaN) au lieu de ZeroDivisionError
+    try:
+        compiled = numba.njit(fastmath=False, error_model='numpy', cache=True)(kernel)
+    except RuntimeError:
+        # Aucun dossier de cache inscriptible (deploiement en lecture seule)
+        compiled = numba.njit(fastmath=False, error_model='numpy')(kernel)
+    # Compilation immediate : une erreur remonte ici (repli dans get_kernel),
+    # et la premiere requete ne paie pas le JIT
+    compiled(np.zeros((1, N_RAW)), np.empty((1, N_ENGINEERED)))
+    return compiled
+
+
+_FACTORIES = {
+    "numba": _make_numba_kernel,
+    "numexpr": _make_numexpr_kernel,
+    "numpy": lambda: _numpy_kernel,
+}
+
+
+def get_kernel(backend: str = None):
+    """
+    Noyau du backend demande (defaut : FEATURE_KERNEL_BACKEND).
+
+    Un backend installe mais qui ne compile pas est remplace par numpy
+    (avertissement affiche une fois).
+
+    Returns:
+        tuple: (nom du backend, fonction kernel(X, out))
+
+    Raises:
+        ValueError: backend inconnu
+        ImportError: backend explicitement demande mais non installe
+    """
+    backend = backend or FEATURE_KERNEL_BACKEND
+    if backend != "auto" and backend not in BACKENDS:
+        raise ValueError(f"Backend de features inconnu : {backend} (auto, {', '.join(BACKENDS)})")
+    candidates = BACKENDS if backend == "auto" else (backend,)
+    for name in candidates:
+        if name not in _kernels:
+            try:
+                _kernels[name] = _FACTORIES[name]()
+            except ImportError:
+                if backend != "auto":
+                    raise
+                _kernels[name] = None
+            except Exception as e:
+                print(f" Attention : backend de features {name} inutilisable ({e}), repli sur numpy")
+                _kernels[name] = None
+        if _kernels[name] is not None:
+            return name, _kernels[name]
+    return "numpy", _numpy_kernel
+
+
+def available_backends() -> list:
+    """Backends importables et compilables dans cet environnement."""
+    available = []
+    for name in BACKENDS:
+        try:
+            if get_kernel(name)[0] == name:
+                available.append(name)
+        except ImportError:
+            pass
+    return available
+
+
+def compute_engineered_features(X, out=None, backend: str = None) -> np.ndarray:
+    """
+    Features construites en une passe sur une matrice brute.
+
+    Args:
+        X: Matrice (n, 8) dans l'ordre de get_feature_names() ; convertie
+            en float64 C-contigu si necessaire
+        out: Tableau (n, 5) float64 optionnel, rempli en place
+        backend: 'auto', 'numba', 'numexpr' ou 'numpy' (defaut : FEATURE_KERNEL_BACKEND)
+
+    Returns:
+        np.ndarray: (n, 5) dans l'ordre de get_engineered_feature_names()
+    """
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    if X.ndim != 2 or X.shape[1] != N_RAW:
+        raise ValueError(f"Matrice (n, {N_RAW}) attendue, recu {X.shape}")
+    if out is None:
+        out = np.empty((len(X), N_ENGINEERED))
+    elif out.shape != (len(X), N_ENGINEERED) or out.dtype != np.float64:
+        raise ValueError(f"Sortie (n, {N_ENGINEERED}) float64 attendue")
+    if len(X) == 0:
+        return out
+    _, kernel = get_kernel(backend)
+    return kernel(X, out)
@@ -0,0 +1,38 @@
+"""
+Localisation et versionnage des artefacts de modele (models/).
+"""
+
+import hashlib
+import os
+from pathlib import Path
+
+
+def latest_model_path(model_dir) -> Path:
+    """
+    Dernier modele entraine (best_model_*.joblib le plus recent).
+
+    Raises:
+        FileNotFoundError: si aucun modele n'est present
+    """
+    model_files = list(Path(model_dir).glob("best_model_*.joblib"))
+    if not model_files:
+        raise FileNotFoundError("Aucun modele trouve dans models/")
+    return max(model_files, key=os.path.getctime)
+
+
+def artifact_version(*paths) -> str:
+    """
+    Identifiant court d'un jeu d'artefacts (nom, taille, date de modification).
+
+    Change des qu'un modele ou preprocessor est re-entraine ou remplace,
+    sans relire les fichiers.
+
+    Example:
+        >>> artifact_version(model_path, model_dir / "preprocessor.joblib")
+        '3f9a1c0b2d4e'
+    """
+    digest = hashlib.sha1()
+    for path in paths:
+        stat = os.stat(path)
+        digest.update(f"{Path(path).name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return digest.hexdigest()[:12]
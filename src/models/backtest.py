@@ -0,0 +1,377 @@
+"""
+Backtesting d'un ou plusieurs modeles candidats sur des snapshots historiques.
+
+Generalise evaluate_model() de 04_modeling.ipynb (un seul split) a une
+suite de fenetres glissantes : les lignes sont rangees par periode (un
+snapshot exporte en Parquet, ou un mois d'un champ date de la collection
+properties) et chaque fenetre entraine sur `train_periods` periodes
+consecutives puis evalue sur les `test_periods` suivantes.
+
+Le travail est fait une fois dans le processus principal : feature
+engineering de toutes les lignes (calcul ligne a ligne, sans fuite entre
+fenetres), tri par periode, ecriture de la matrice et de la cible en
+.npy. Les fenetres tournent en parallele dans un pool de processus qui
+ouvrent ces fichiers en memoire partagee (np.load(mmap_mode='r')) : une
+fenetre n'est qu'une paire de plages de lignes contigues, rien de
+volumineux n'est pickle vers les workers. Dans chaque fenetre, le
+capping et le RobustScaler sont fittes sur les seules lignes
+d'entrainement, comme DataPreprocessor.fit_transform().
+
+Example:
+    >>> data = load_snapshots(sorted(Path('data/processed/snapshots').iterdir()))
+    >>> table = run_backtest(data, default_candidates(), train_periods=12)
+    >>> summarize(table)
+"""
+
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.data.load_data import get_feature_names, get_target_name
+from src.data.preprocess import DataPreprocessor, OutlierHandler
+from src.features.engineering import add_engineered_features, get_engineered_feature_names
+
+PERIOD_COLUMN = "period"
+FEATURES_FILE = "features.npy"
+TARGET_FILE = "target.npy"
+
+# Matrices ouvertes par processus : dossier -> (features, cible)
+_shared = {}
+
+
+def default_candidates() -> dict:
+    """Les trois modeles de 04_modeling.ipynb, memes hyperparametres (n_jobs=1 : un worker par fenetre)."""
+    from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+    from sklearn.linear_model import LinearRegression
+
+    return {
+        "Linear Regression": LinearRegression(),
+        "Random Forest": RandomForestRegressor(
+            n_estimators=100, max_depth=20, min_samples_split=5, min_samples_leaf=2, random_state=42, n_jobs=1
+        ),
+        "Gradient Boosting": GradientBoostingRegressor(
+            n_estimators=100, learning_rate=0.1, max_depth=5, min_samples_split=5, min_samples_leaf=2,
+            random_state=42
+        )
+    }
+
+
+def load_snapshots(paths, labels=None) -> pd.DataFrame:
+    """
+    Concatene des exports Parquet (un dossier par snapshot, voir
+    src/database/export.py), chaque ligne etiquetee par son snapshot.
+
+    Args:
+        paths: Dossiers des snapshots
+        labels: Etiquettes de periode triables (defaut : nom du dossier, ex. '2023-01')
+
+    Returns:
+        DataFrame: features brutes, cible et colonne 'period'
+    """
+    from src.database.export import read_parquet_export
+
+    columns = get_feature_names() + [get_target_name()]
+    labels = labels or [Path(p).name for p in paths]
+    frames = []
+    for path, label in zip(paths, labels):
+        frame = read_parquet_export(path, columns=columns)
+        frame[PERIOD_COLUMN] = label
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+
+def load_collection(collection, time_field: str, freq: str = "M", query=None, batch_size: int = 10_000) -> pd.DataFrame:
+    """
+    Lit la collection (projection sur les champs utiles), periodes = `time_field` tronque a `freq`.
+
+    Args:
+        collection: Collection MongoDB (properties)
+        time_field: Champ date des documents (ex. 'snapshot_date', 'updated_at')
+        freq: Frequence pandas des periodes (defaut 'M' : mensuelle)
+        query: Filtre optionnel
+
+    Returns:
+        DataFrame: features brutes, cible et colonne 'period' ; les documents sans date sont ignores
+    """
+    from src.database.export import documents_to_columns
+
+    fields = get_feature_names() + [get_target_name()]
+    query = dict(query or {})
+    query.setdefault(time_field, {"$ne": None})
+    projection = {field: 1 for field in fields + [time_field]}
+    projection["_id"] = 0
+    documents = list(collection.find(query, projection, batch_size=batch_size))
+    frame = pd.DataFrame(dict(zip(fields, documents_to_columns(documents, fields))))
+    dates = pd.to_datetime([doc[time_field] for doc in documents], utc=True).tz_localize(None)
+    frame[PERIOD_COLUMN] = dates.to_period(freq).astype(str)
+    return frame
+
+
+def make_windows(periods, train_periods: int, test_periods: int = 1, step: int = 1, expanding: bool = False) -> list:
+    """
+    Fenetres glissantes sur une liste de periodes triees.
+
+    Args:
+        periods: Periodes distinctes, dans l'ordre chronologique
+        train_periods: Periodes d'entrainement (minimum si expanding)
+        test_periods: Periodes evaluees apres l'entrainement
+        step: Decalage entre deux fenetres
+        expanding: Entrainer sur tout l'historique disponible
+
+    Returns:
+        list: dict 'name', 'train' et 'test' (indices de periodes [debut, fin))
+    """
+    windows = []
+    for start in range(train_periods, len(periods) - test_periods + 1, step):
+        train = (0 if expanding else start - train_periods, start)
+        test = (start, start + test_periods)
+        windows.append({"name": str(periods[start]), "train": train, "test": test})
+    return windows
+
+
+def engineer_features(frame: pd.DataFrame) -> np.ndarray:
+    """Matrice (n, 13) dans l'ordre de DataPreprocessor.feature_names (8 brutes + 5 construites)."""
+    columns = get_feature_names() + get_engineered_feature_names()
+    return add_engineered_features(frame[get_feature_names()]).reindex(columns=columns).to_numpy(np.float64)
+
+
+def share_matrices(frame: pd.DataFrame, directory):
+    """
+    Trie par periode et ecrit features construites et cible en .npy.
+
+    Returns:
+        tuple: (periodes distinctes triees, premiere ligne de chaque
+            periode + nombre de lignes : les lignes de la periode i sont
+            [offsets[i], offsets[i + 1]))
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    frame = frame.sort_values(PERIOD_COLUMN, kind="stable")
+    periods, counts = np.unique(frame[PERIOD_COLUMN].to_numpy(), return_counts=True)
+    np.save(directory / FEATURES_FILE, engineer_features(frame))
+    np.save(directory / TARGET_FILE, frame[get_target_name()].to_numpy(np.float64))
+    return list(periods), np.concatenate([[0], np.cumsum(counts)])
+
+
+def _open_shared(directory):
+    """Matrices du backtest en lecture seule, projetees en memoire une fois par processus."""
+    directory = str(directory)
+    if directory not in _shared:
+        _shared[directory] = (
+            np.load(os.path.join(directory, FEATURES_FILE), mmap_mode="r"),
+            np.load(os.path.join(directory, TARGET_FILE), mmap_mode="r")
+        )
+    return _shared[directory]
+
+
+def _init_worker(directory):
+    """Initialisation d'un processus du pool : un thread BLAS / OpenMP, matrices ouvertes."""
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(1)
+    except ImportError:
+        pass
+    _open_shared(directory)
+
+
+def _window_preprocessing(X_train, X_test):
+    """Capping et scaling fittes sur l'entrainement de la fenetre (comme DataPreprocessor)."""
+    from sklearn.preprocessing import RobustScaler
+
+    columns = get_feature_names() + get_engineered_feature_names()
+    train = pd.DataFrame(X_train, columns=columns)
+    test = pd.DataFrame(X_test, columns=columns)
+    handler = OutlierHandler().fit(train, columns=DataPreprocessor().cols_to_cap)
+    train, test = handler.apply_bounds(train), handler.apply_bounds(test)
+    scaler = RobustScaler().fit(train)
+    return scaler.transform(train), scaler.transform(test)
+
+
+def regression_metrics(y_true, y_pred, prefix: str) -> dict:
+    """MAE, RMSE et R2 (memes definitions que evaluate_model())."""
+    from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+    return {
+        f"{prefix}_mae": mean_absolute_error(y_true, y_pred),
+        f"{prefix}_rmse": float(np.sqrt(mean_squared_error(y_true, y_pred))),
+        f"{prefix}_r2": r2_score(y_true, y_pred)
+    }
+
+
+def evaluate_window(directory, window: dict, rows: tuple, candidates: dict) -> list:
+    """
+    Point d'entree d'un worker : une fenetre, tous les candidats.
+
+    Args:
+        directory: Dossier des matrices partagees
+        window: Fenetre de make_windows()
+        rows: ((debut, fin) des lignes d'entrainement, (debut, fin) des lignes de test)
+        candidates: Estimateurs non fittes, par nom (clones a chaque fenetre)
+
+    Returns:
+        list: Une ligne de metriques et de durees par candidat
+    """
+    from sklearn.base import clone
+
+    start = time.perf_counter()
+    features, target = _open_shared(directory)
+    (train_start, train_stop), (test_start, test_stop) = rows
+    # Tranches contigues des fichiers projetes : pas de copie avant le preprocessing
+    X_train, X_test = _window_preprocessing(features[train_start:train_stop], features[test_start:test_stop])
+    y_train, y_test = target[train_start:train_stop], target[test_start:test_stop]
+    preprocess_seconds = time.perf_counter() - start
+
+    results = []
+    for name, candidate in candidates.items():
+        model = clone(candidate)
+        fit_start = time.perf_counter()
+        model.fit(X_train, y_train)
+        fit_seconds = time.perf_counter() - fit_start
+        predict_start = time.perf_counter()
+        y_test_pred = model.predict(X_test)
+        predict_seconds = time.perf_counter() - predict_start
+        row = {
+            "window": window["name"],
+            "model_name": name,
+            "train_rows": len(y_train),
+            "test_rows": len(y_test),
+            **regression_metrics(y_train, model.predict(X_train), "train"),
+            **regression_metrics(y_test, y_test_pred, "test"),
+            "preprocess_seconds": preprocess_seconds,
+            "fit_seconds": fit_seconds,
+            "predict_seconds": predict_seconds,
+            "worker": os.getpid()
+        }
+        row["overfitting"] = row["train_r2"] - row["test_r2"]
+        results.append(row)
+    return results
+
+
+def run_backtest(
+    frame: pd.DataFrame,
+    candidates: dict,
+    train_periods: int,
+    test_periods: int = 1,
+    step: int = 1,
+    expanding: bool = False,
+    workers: int = None,
+    executor: str = "process",
+    work_dir=None
+) -> pd.DataFrame:
+    """
+    Evalue chaque candidat sur chaque fenetre, fenetres en parallele.
+
+    Args:
+        frame: Features brutes, cible et colonne 'period' (load_snapshots(), load_collection())
+        candidates: Estimateurs sklearn non fittes, par nom (default_candidates())
+        train_periods, test_periods, step, expanding: Voir make_windows()
+        workers: Fenetres simultanees (defaut : nombre de CPU)
+        executor: 'process' (defaut), 'thread' ou 'inline' (sans pool, pour le debogage)
+        work_dir: Dossier des matrices partagees (defaut : dossier temporaire supprime a la fin)
+
+    Returns:
+        DataFrame: Une ligne par (fenetre, candidat), dans l'ordre des fenetres ;
+            colonnes de evaluate_model() plus tailles et durees (window_seconds :
+            duree totale de la fenetre dans son worker)
+    """
+    if executor not in ("process", "thread", "inline"):
+        raise ValueError(f"executor inconnu : {executor}")
+    temporary = work_dir is None
+    directory = Path(tempfile.mkdtemp(prefix="backtest-") if temporary else work_dir)
+    try:
+        periods, offsets = share_matrices(frame, directory)
+        windows = make_windows(periods, train_periods, test_periods, step, expanding)
+        if not windows:
+            raise ValueError(f"{len(periods)} periodes : pas assez pour {train_periods} + {test_periods}")
+        rows = [
+            ((offsets[w["train"][0]], offsets[w["train"][1]]), (offsets[w["test"][0]], offsets[w["test"][1]]))
+            for w in windows
+        ]
+        jobs = [(str(directory), window, window_rows, candidates) for window, window_rows in zip(windows, rows)]
+
+        if executor == "inline":
+            results = [_timed(evaluate_window, *job) for job in jobs]
+        else:
+            workers = min(workers or os.cpu_count() or 1, len(jobs))
+            if executor == "process":
+                pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(str(directory),))
+            else:
+                pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="backtest")
+            with pool:
+                futures = [pool.submit(_timed, evaluate_window, *job) for job in jobs]
+                results = [future.result() for future in futures]
+    finally:
+        _shared.pop(str(directory), None)
+        if temporary:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    records = []
+    for window_results, seconds in results:
+        for row in window_results:
+            records.append({**row, "window_seconds": seconds})
+    return pd.DataFrame.from_records(records)
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def summarize(table: pd.DataFrame) -> pd.DataFrame:
+    """Moyenne et ecart-type des metriques de test par candidat, meilleur MAE d'abord."""
+    metrics = ["test_mae", "test_rmse", "test_r2", "overfitting", "fit_seconds", "window_seconds"]
+    summary = table.groupby("model_name")[metrics].agg(["mean", "std"])
+    summary["windows"] = table.groupby("model_name").size()
+    return summary.sort_values(("test_mae", "mean"))
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+    parser = argparse.ArgumentParser(description="Backtest des modeles sur des snapshots historiques")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--snapshots", nargs="+", help="Dossiers d'exports Parquet, un par periode")
+    source.add_argument("--collection", help="Collection MongoDB (avec --time-field)")
+    parser.add_argument("--time-field", default="snapshot_date")
+    parser.add_argument("--freq", default="M", help="Frequence des periodes pour --collection")
+    parser.add_argument("--train-periods", type=int, default=12)
+    parser.add_argument("--test-periods", type=int, default=1)
+    parser.add_argument("--step", type=int, default=1)
+    parser.add_argument("--expanding", action="store_true")
+    parser.add_argument("--models", default=None, help="Noms des candidats separes par des virgules (defaut : tous)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--executor", choices=("process", "thread", "inline"), default="process")
+    parser.add_argument("--output", default=os.path.join(os.path.dirname(__file__), '../../reports/backtest.csv'))
+    args = parser.parse_args()
+
+    if args.snapshots:
+        data = load_snapshots(sorted(args.snapshots))
+    else:
+        from src.database.mongodb import MongoDBConnection
+        mongo = MongoDBConnection()
+        data = load_collection(mongo.get_collection(args.collection), args.time_field, args.freq)
+        mongo.close()
+
+    candidates = default_candidates()
+    if args.models:
+        candidates = {name: candidates[name] for name in args.models.split(",")}
+
+    start = time.perf_counter()
+    table = run_backtest(
+        data, candidates, args.train_periods, args.test_periods, args.step, args.expanding,
+        workers=args.workers, executor=args.executor
+    )
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    table.to_csv(args.output, index=False)
+    print(f" {table['window'].nunique()} fenetres x {len(candidates)} modeles en {time.perf_counter() - start:.1f}s")
+    print(summarize(table).to_string())
+    print(f" Table complete : {args.output}")
@@ -0,0 +1,266 @@
+"""
+Modele rapide pour le mode cascade de l'API.
+
+Le modele rapide (regression lineaire, ou petit GradientBoosting) repond
+en premier ; le modele complet n'est consulte que pour les lignes ou
+l'erreur estimee du modele rapide est elevee. L'erreur estimee est
+predite par un arbre peu profond entraine sur |complet - rapide| : elle
+mesure l'ecart au modele servi aujourd'hui, pas a la verite terrain.
+
+Pour rester nettement moins cher que le chemin complet, le preprocessing
+est recompile en NumPy (features construites, capping, RobustScaler) a
+partir du DataPreprocessor fitte : pas de DataFrame par requete.
+
+Les bornes de l'intervalle du modele rapide sont conformes (split
+conformal) : quantiles des residus sur le jeu de calibration.
+"""
+
+import numpy as np
+
+from src.data.load_data import get_feature_names
+from src.features.engineering import get_engineered_feature_names, engineered_feature_array
+from src.models.intervals import DEFAULT_COVERAGE
+from src.utils.timing import stage
+
+# Part des lignes de calibration envoyees au modele complet (seuil par defaut)
+DEFAULT_ESCALATION_RATE = 0.3
+CALIBRATION_RATES = (0.05, 0.1, 0.2, 0.3, 0.5)
+
+ALL_FEATURES = get_feature_names() + get_engineered_feature_names()
+
+
+class _StackedTrees:
+    """
+    Arbres sklearn empiles dans des tableaux (arbres, noeuds), parcourus
+    sans passer par predict() : son surcout fixe (validation, threads)
+    domine a une ligne. Petits batchs : parcours Python sur des listes ;
+    sinon NumPy, toutes les lignes et tous les arbres a la fois.
+    """
+
+    # Au-dela de lignes x arbres, parcours vectorise
+    PYTHON_MAX_WORK = 64
+
+    def __init__(self, trees, weight=1.0, base=0.0):
+        width = max(tree.node_count for tree in trees)
+        shape = (len(trees), width)
+        self.left = np.full(shape, -1, dtype=np.intp)
+        self.right = np.full(shape, -1, dtype=np.intp)
+        self.feature = np.zeros(shape, dtype=np.intp)
+        self.threshold = np.zeros(shape)
+        self.value = np.zeros(shape)
+        for t, tree in enumerate(trees):
+            n = tree.node_count
+            self.left[t, :n] = tree.children_left
+            self.right[t, :n] = tree.children_right
+            self.feature[t, :n] = np.maximum(tree.feature, 0)
+            self.threshold[t, :n] = tree.threshold
+            self.value[t, :n] = tree.value[:, 0, 0] * weight
+        self.depth = max(tree.max_depth for tree in trees)
+        self.base = base
+        self._trees = np.arange(len(trees))
+        self._lists = [
+            (tree.children_left.tolist(), tree.children_right.tolist(), tree.feature.tolist(),
+             tree.threshold.tolist(), (tree.value[:, 0, 0] * weight).tolist())
+            for tree in trees
+        ]
+
+    def predict(self, X):
+        # Memes comparaisons que sklearn (seuils appris sur des float32)
+        X = np.asarray(X, dtype=np.float32)
+        if len(X) * len(self._lists) <= self.PYTHON_MAX_WORK:
+            return np.array([self._predict_row(row) for row in X.tolist()])
+
+        rows = np.arange(len(X))[:, None]
+        node = np.zeros((len(X), len(self._trees)), dtype=np.intp)
+        for _ in range(self.depth):
+            left = self.left[self._trees, node]
+            go_left = X[rows, self.feature[self._trees, node]] <= self.threshold[self._trees, node]
+            node = np.where(left < 0, node, np.where(go_left, left, self.right[self._trees, node]))
+        return self.base + self.value[self._trees, node].sum(axis=1)
+
+    def _predict_row(self, row) -> float:
+        total = self.base
+        for left, right, feature, threshold, value in self._lists:
+            node = 0
+            while left[node] >= 0:
+                node = left[node] if row[feature[node]] <= threshold[node] else right[node]
+            total += value[node]
+        return total
+
+
+class FastModel:
+    """
+    Modele rapide + estimation de son erreur par rapport au modele complet.
+
+    Attributes:
+        kind (str): 'linear' ou 'trees'
+        threshold (float): Erreur estimee au-dela de laquelle escalader
+        calibration (dict): Compromis escalade / perte mesures a l'entrainement
+
+    Example:
+        >>> fast = FastModel(kind="linear").fit(preprocessor, model, X_train, y_train, X_test, y_test)
+        >>> price, estimated_error, lower, upper = fast.predict(X_raw)
+        >>> escalate = estimated_error > fast.threshold
+    """
+
+    def __init__(self, kind="linear", escalation_rate=DEFAULT_ESCALATION_RATE,
+                 coverage=DEFAULT_COVERAGE, random_state=42):
+        if kind not in ("linear", "trees"):
+            raise ValueError(f"Type de modele rapide inconnu : {kind}")
+        self.kind = kind
+        self.escalation_rate = escalation_rate
+        self.coverage = coverage
+        self.random_state = random_state
+        self.threshold = None
+        self.calibration = None
+
+    def _compile_preprocessor(self, preprocessor):
+        """Copie les parametres du preprocessor dans des tableaux NumPy (ordre ALL_FEATURES)."""
+        self.columns_ = np.array([ALL_FEATURES.index(name) for name in preprocessor.feature_names])
+        bounds = getattr(preprocessor.outlier_handler, 'bounds_', None) or {}
+        self.lower_bounds_ = np.array([bounds.get(name, (-np.inf, np.inf))[0] for name in ALL_FEATURES], dtype=float)
+        self.upper_bounds_ = np.array([bounds.get(name, (-np.inf, np.inf))[1] for name in ALL_FEATURES], dtype=float)
+        scaler = preprocessor.scaler
+        n = len(self.columns_)
+        self.center_ = np.asarray(scaler.center_, dtype=float) if scaler.center_ is not None else np.zeros(n)
+        self.scale_ = np.asarray(scaler.scale_, dtype=float) if scaler.scale_ is not None else np.ones(n)
+
+    def transform(self, X_raw):
+        """
+        Equivalent NumPy de preprocessor.transform().
+
+        Args:
+            X_raw: Matrice (n, 8) dans l'ordre de get_feature_names()
+
+        Returns:
+            np.ndarray: Features transformees (n, 13), ordre du preprocessor
+        """
+        X_raw = np.asarray(X_raw, dtype=float)
+        X = np.empty((len(X_raw), len(ALL_FEATURES)))
+        X[:, :X_raw.shape[1]] = X_raw
+        X[:, X_raw.shape[1]:] = engineered_feature_array(X_raw)
+        np.clip(X, self.lower_bounds_, self.upper_bounds_, out=X)
+        return (X[:, self.columns_] - self.center_) / self.scale_
+
+    def _predict_processed(self, X):
+        if self.kind == "linear":
+            price = X @ self.coef_ + self.intercept_
+        else:
+            price = self.trees_.predict(X)
+        error = self.error_trees_.predict(np.column_stack([X, price]))
+        return price, np.maximum(error, 0.0)
+
+    def fit(self, preprocessor, full_model, X_train, y_train, X_cal, y_cal):
+        """
+        Entraine le modele rapide, son estimateur d'erreur et calibre le seuil.
+
+        Args:
+            preprocessor: DataPreprocessor fitte (celui du modele complet)
+            full_model: Modele complet servi par l'API
+            X_train, y_train: Jeu d'entrainement transforme (sortie de fit_transform)
+            X_cal, y_cal: Jeu de calibration transforme (test du meme split)
+        """
+        from sklearn.tree import DecisionTreeRegressor
+
+        self._compile_preprocessor(preprocessor)
+        full_train, full_cal = full_model.predict(X_train), full_model.predict(X_cal)
+        X_train, X_cal = np.asarray(X_train, dtype=float), np.asarray(X_cal, dtype=float)
+        y_train, y_cal = np.asarray(y_train, dtype=float), np.asarray(y_cal, dtype=float)
+
+        if self.kind == "linear":
+            from sklearn.linear_model import LinearRegression
+            linear = LinearRegression().fit(X_train, y_train)
+            self.coef_, self.intercept_ = linear.coef_, float(linear.intercept_)
+        else:
+            from sklearn.ensemble import GradientBoostingRegressor
+            small = GradientBoostingRegressor(
+                n_estimators=30, max_depth=3, learning_rate=0.2, random_state=self.random_state
+            ).fit(X_train, y_train)
+            base = float(np.ravel(small.init_.predict(X_train[:1]))[0])
+            self.trees_ = _StackedTrees([e.tree_ for e in small.estimators_[:, 0]], small.learning_rate, base)
+
+        # Erreur estimee : ecart au modele complet, appris sur le train
+        fast_train = X_train @ self.coef_ + self.intercept_ if self.kind == "linear" else self.trees_.predict(X_train)
+        error_tree = DecisionTreeRegressor(
+            max_depth=6, min_samples_leaf=50, random_state=self.random_state
+        ).fit(np.column_stack([X_train, fast_train]), np.abs(full_train - fast_train))
+        self.error_trees_ = _StackedTrees([error_tree.tree_])
+
+        fast_cal, estimated = self._predict_processed(X_cal)
+
+        alpha = (1 - self.coverage) / 2
+        self.residual_bounds_ = tuple(np.quantile(y_cal - fast_cal, [alpha, 1 - alpha]))
+
+        self.calibration = {
+            "n_samples": int(len(y_cal)),
+            "mae_full": float(np.mean(np.abs(y_cal - full_cal))),
+            "mae_fast": float(np.mean(np.abs(y_cal - fast_cal))),
+            "rates": [self._calibration_point(rate, estimated, fast_cal, full_cal, y_cal)
+                      for rate in CALIBRATION_RATES]
+        }
+        self.threshold = float(np.quantile(estimated, 1 - self.escalation_rate))
+        return self
+
+    @staticmethod
+    def _calibration_point(rate, estimated, fast, full, y):
+        threshold = float(np.quantile(estimated, 1 - rate))
+        escalate = estimated > threshold
+        cascade = np.where(escalate, full, fast)
+        return {
+            "escalation_rate": float(escalate.mean()),
+            "threshold": threshold,
+            "mae": float(np.mean(np.abs(y - cascade))),
+            # Perte de precision : ecart moyen a la reponse du modele complet
+            "accuracy_loss": float(np.mean(np.abs(cascade - full)))
+        }
+
+    def predict(self, X_raw):
+        """
+        Args:
+            X_raw: Matrice (n, 8) validee, dans l'ordre de get_feature_names()
+
+        Returns:
+            tuple: (prix, erreur estimee, borne basse, borne haute) en 100k$
+        """
+        with stage("fast_model"):
+            price, error = self._predict_processed(self.transform(X_raw))
+        return price, error, price + self.residual_bounds_[0], price + self.residual_bounds_[1]
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import sys
+    import joblib
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+    from src.data.load_data import load_california_housing_data
+    from src.models.artifacts import latest_model_path
+    # Classe importee via son module pour que le pickle soit rechargeable par l'API
+    from src.models.cascade import FastModel
+
+    parser = argparse.ArgumentParser(description="Entraine le modele rapide du mode cascade")
+    parser.add_argument("--model-dir", default=os.getenv("MODEL_DIR", os.path.join(os.path.dirname(__file__), '../../models')))
+    parser.add_argument("--kind", choices=["linear", "trees"], default="linear")
+    parser.add_argument("--escalation-rate", type=float, default=DEFAULT_ESCALATION_RATE)
+    args = parser.parse_args()
+
+    print("Entrainement du modele rapide")
+    full_model = joblib.load(latest_model_path(args.model_dir))
+    preprocessor = joblib.load(os.path.join(args.model_dir, "preprocessor.joblib"))
+    # Meme split que le notebook 04_modeling (random_state=42) ; le preprocessor
+    # charge n'est pas re-fitte, seules ses transformations sont reutilisees
+    df = load_california_housing_data()
+    from sklearn.model_selection import train_test_split
+    train, test = train_test_split(df, test_size=0.2, random_state=42)
+    target = preprocessor.target_name
+    X_train, X_test = preprocessor.transform(train), preprocessor.transform(test)
+
+    fast = FastModel(kind=args.kind, escalation_rate=args.escalation_rate).fit(
+        preprocessor, full_model, X_train, train[target], X_test, test[target]
+    )
+    print(f"MAE complet : {fast.calibration['mae_full']:.4f} ; rapide : {fast.calibration['mae_fast']:.4f}")
+    for point in fast.calibration["rates"]:
+        print(f"  escalade {point['escalation_rate']:.0%} : MAE {point['mae']:.4f}, "
+              f"perte vs complet {point['accuracy_loss']:.4f}")
+    joblib.dump(fast, os.path.join(args.model_dir, "fast_model.joblib"))
+    print("OK!")
@@ -0,0 +1,318 @@
+"""
+Contributions des features (explications) pour les ensembles d'arbres.
+
+Deux modes, vectorises sur les lignes du batch :
+- 'exact' : TreeSHAP path-dependent (Lundberg et al., algorithme 2).
+  Chaque arbre est parcouru une seule fois pour tout le batch : la
+  fraction 'zero' (part des echantillons d'entrainement) est commune aux
+  lignes, la fraction 'one' (la ligne suit-elle cette branche ?) est un
+  vecteur de 0/1. Cout ~ noeuds x profondeur operations NumPy de taille n.
+- 'approx' : attribution de Saabas (variation de la valeur du noeud a
+  chaque split, imputee a la feature du split). Une matrice creuse
+  decision_path x deltas par arbre : cout borne par
+  lignes x profondeur x arbres, independant de la taille des arbres.
+
+Dans les deux cas : expected_value + somme des contributions = prediction.
+Les valeurs des noeuds internes sont recalculees a partir des feuilles
+(moyenne ponderee par la couverture) : les pertes huber, quantile ou
+absolute_error du GradientBoosting reecrivent les valeurs des feuilles
+sans toucher a celles des noeuds internes.
+
+Les structures extraites des arbres et les contributions exactes deja
+calculees (LRU par ligne) sont gardees une fois par modele
+(get_explainer) : un modele re-entraine ou recharge est un nouvel objet,
+donc un nouveau cache.
+"""
+
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+from src.utils.timing import stage
+
+# Au-dela de ce nombre total de noeuds, le mode 'auto' passe en 'approx'
+EXACT_MAX_NODES = 20_000
+# Lignes dont les contributions exactes sont gardees en memoire, par modele
+CACHE_SIZE = 10_000
+
+_explainers = weakref.WeakKeyDictionary()
+
+
+class UnsupportedModelError(TypeError):
+    """Modele sans explication possible (pas un ensemble d'arbres)."""
+
+
+def _ensemble(model):
+    """
+    Decompose un modele en (arbres sklearn, poids par arbre, constante).
+
+    Raises:
+        UnsupportedModelError: modele non base sur des arbres
+    """
+    from sklearn.ensemble import GradientBoostingRegressor
+    from sklearn.ensemble._forest import BaseForest
+    from sklearn.tree import BaseDecisionTree
+
+    if isinstance(model, GradientBoostingRegressor):
+        if model.init_ == "zero":
+            base = 0.0
+        else:
+            # Estimateur initial constant (DummyRegressor par defaut)
+            base = float(np.ravel(model.init_.predict(np.zeros((1, model.n_features_in_))))[0])
+        return [e.tree_ for e in model.estimators_[:, 0]], model.learning_rate, base
+    if isinstance(model, BaseForest):
+        return [e.tree_ for e in model.estimators_], 1.0 / len(model.estimators_), 0.0
+    if isinstance(model, BaseDecisionTree):
+        return [model.tree_], 1.0, 0.0
+    raise UnsupportedModelError(f"Explications non supportees pour {type(model).__name__} (arbres uniquement)")
+
+
+def _node_values(tree) -> np.ndarray:
+    """
+    Esperance de la prediction sous chaque noeud, calculee depuis les feuilles.
+
+    Les enfants ont toujours un indice superieur a leur parent : un seul
+    passage en ordre inverse suffit.
+    """
+    value = tree.value[:, 0, 0].astype(float)
+    cover = tree.weighted_n_node_samples
+    left, right = tree.children_left, tree.children_right
+    for node in range(tree.node_count - 1, -1, -1):
+        if left[node] >= 0:
+            value[node] = (cover[left[node]] * value[left[node]]
+                           + cover[right[node]] * value[right[node]]) / cover[node]
+    return value
+
+
+class _Tree:
+    """Tableaux d'un arbre sklearn, en listes Python pour la recursion."""
+
+    __slots__ = ('left', 'right', 'feature', 'threshold', 'value', 'cover', 'tree')
+
+    def __init__(self, tree, weight):
+        self.tree = tree
+        self.left = tree.children_left.tolist()
+        self.right = tree.children_right.tolist()
+        self.feature = tree.feature.tolist()
+        self.threshold = tree.threshold.tolist()
+        self.value = (_node_values(tree) * weight).tolist()
+        self.cover = tree.weighted_n_node_samples.tolist()
+
+
+def _saabas_table(tree, weight: float, n_features: int):
+    """
+    Matrice creuse (noeuds, features) : variation de valeur a l'entree de
+    chaque noeud, imputee a la feature du split parent.
+    """
+    from scipy import sparse
+
+    value = _node_values(tree) * weight
+    parents = np.flatnonzero(tree.children_left >= 0)
+    children = np.concatenate([tree.children_left[parents], tree.children_right[parents]])
+    parent_of = np.concatenate([parents, parents])
+    return sparse.csr_matrix(
+        (value[children] - value[parent_of], (children, tree.feature[parent_of])),
+        shape=(tree.node_count, n_features)
+    )
+
+
+def _extend(pweight, zeros, ones, zero_fraction, one_fraction, n_rows):
+    d = len(zeros)
+    extended = np.empty((d + 1, n_rows))
+    extended[:d] = pweight
+    extended[d] = 1.0 if d == 0 else 0.0
+    for i in range(d - 1, -1, -1):
+        extended[i + 1] += one_fraction * extended[i] * ((i + 1) / (d + 1))
+        extended[i] *= zero_fraction * ((d - i) / (d + 1))
+    return extended, zeros + [zero_fraction], ones + [one_fraction]
+
+
+def _unwind(pweight, zeros, ones, k):
+    """Retire l'element k du chemin (split repete sur la meme feature)."""
+    depth = len(zeros) - 1
+    one, zero = ones[k], zeros[k]
+    hot = one != 0
+    safe_one = np.where(hot, one, 1.0)
+
+    unwound = pweight[:depth].copy()
+    next_one = pweight[depth]
+    for i in range(depth - 1, -1, -1):
+        current = unwound[i]
+        weight = np.where(
+            hot,
+            next_one * (depth + 1) / ((i + 1) * safe_one),
+            current * (depth + 1) / (zero * (depth - i))
+        )
+        next_one = current - weight * zero * ((depth - i) / (depth + 1))
+        unwound[i] = weight
+    return unwound, zeros[:k] + zeros[k + 1:], ones[:k] + ones[k + 1:]
+
+
+def _unwound_sums(pweight, zeros, ones):
+    """
+    Somme des poids du chemin sans l'element i, pour tous les i >= 1 a la fois.
+
+    Returns:
+        np.ndarray: (profondeur, n) pour les elements 1..profondeur
+    """
+    depth = len(zeros) - 1
+    one = np.stack(ones[1:])
+    zero = np.asarray(zeros[1:])[:, None]
+    hot = one != 0
+    safe_one = np.where(hot, one, 1.0)
+
+    total_hot = 0.0
+    total_cold = 0.0
+    next_one = pweight[depth]
+    for j in range(depth - 1, -1, -1):
+        tmp = next_one / ((j + 1) * safe_one)
+        total_hot = total_hot + tmp
+        next_one = pweight[j] - tmp * zero * (depth - j)
+        total_cold = total_cold + pweight[j] / (zero * (depth - j))
+    return np.where(hot, total_hot, total_cold) * (depth + 1)
+
+
+def _tree_shap(tree: _Tree, X: np.ndarray, phi: np.ndarray):
+    """Ajoute a phi (n, n_features) les valeurs SHAP d'un arbre."""
+    n_rows = len(X)
+    columns = {}
+
+    def goes_left(node):
+        f = tree.feature[node]
+        col = columns.get(f)
+        if col is None:
+            col = columns[f] = X[:, f]
+        return (col <= tree.threshold[node]).astype(float)
+
+    def recurse(node, pweight, features, zeros, ones, zero_fraction, one_fraction, feature):
+        pweight, zeros, ones = _extend(pweight, zeros, ones, zero_fraction, one_fraction, n_rows)
+        features = features + [feature]
+
+        left = tree.left[node]
+        if left < 0:
+            if len(features) > 1:
+                weights = _unwound_sums(pweight, zeros, ones)
+                for i in range(1, len(features)):
+                    phi[:, features[i]] += weights[i - 1] * (ones[i] - zeros[i]) * tree.value[node]
+            return
+
+        split = tree.feature[node]
+        incoming_zero, incoming_one = 1.0, 1.0
+        if split in features:
+            k = features.index(split)
+            incoming_zero, incoming_one = zeros[k], ones[k]
+            pweight, zeros, ones = _unwind(pweight, zeros, ones, k)
+            features = features[:k] + features[k + 1:]
+
+        right = tree.right[node]
+        go_left = goes_left(node)
+        cover = tree.cover[node]
+        recurse(left, pweight, features, zeros, ones,
+                incoming_zero * tree.cover[left] / cover, incoming_one * go_left, split)
+        recurse(right, pweight, features, zeros, ones,
+                incoming_zero * tree.cover[right] / cover, incoming_one * (1.0 - go_left), split)
+
+    recurse(0, np.empty((0, n_rows)), [], [], [], 1.0, 1.0, -1)
+
+
+class TreeExplainer:
+    """
+    Explications par feature pour un modele a base d'arbres.
+
+    Attributes:
+        expected_value (float): Prediction moyenne (sans information sur la ligne)
+        n_nodes (int): Nombre total de noeuds de l'ensemble
+
+    Example:
+        >>> explainer = get_explainer(model)
+        >>> phi, base = explainer.explain(X_processed, mode="exact")
+        >>> np.allclose(base + phi.sum(axis=1), model.predict(X_processed))
+        True
+    """
+
+    def __init__(self, model, cache_size: int = CACHE_SIZE):
+        trees, self.weight, self.base = _ensemble(model)
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.n_features = model.n_features_in_
+        self._sklearn_trees = trees
+        self._trees = None
+        self._saabas = None
+        self.n_nodes = sum(tree.node_count for tree in trees)
+        self.expected_value = self.base + self.weight * sum(_node_values(tree)[0] for tree in trees)
+
+    def resolve_mode(self, mode: str) -> str:
+        """'auto' -> 'exact' si l'ensemble est assez petit, sinon 'approx'."""
+        if mode == "auto":
+            return "exact" if self.n_nodes <= EXACT_MAX_NODES else "approx"
+        if mode not in ("exact", "approx"):
+            raise ValueError(f"Mode d'explication inconnu : {mode}")
+        return mode
+
+    def explain(self, X, mode: str = "auto"):
+        """
+        Contributions de chaque feature pour chaque ligne.
+
+        Args:
+            X: Features transformees (n, n_features), comme pour model.predict
+            mode: 'exact', 'approx' ou 'auto'
+
+        Returns:
+            tuple: (contributions (n, n_features), expected_value)
+        """
+        mode = self.resolve_mode(mode)
+        # Memes comparaisons que sklearn (seuils appris sur des float32)
+        X = np.asarray(X, dtype=np.float32)
+        phi = np.zeros((len(X), self.n_features))
+        if len(X) == 0:
+            return phi, self.expected_value
+
+        with stage(f"explain_{mode}"):
+            if mode == "exact":
+                self._explain_exact_cached(X, phi)
+            else:
+                if self._saabas is None:
+                    self._saabas = [_saabas_table(tree, self.weight, self.n_features)
+                                    for tree in self._sklearn_trees]
+                for tree, table in zip(self._sklearn_trees, self._saabas):
+                    phi += (tree.decision_path(X) @ table).toarray()
+        return phi, self.expected_value
+
+    def _explain_exact_cached(self, X, phi):
+        keys = [row.tobytes() for row in X]
+        missing = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                cached = self._cache.get(key)
+                if cached is None:
+                    missing.append(i)
+                else:
+                    self._cache.move_to_end(key)
+                    phi[i] = cached
+        if not missing:
+            return
+
+        if self._trees is None:
+            self._trees = [_Tree(tree, self.weight) for tree in self._sklearn_trees]
+        X_missing = X[missing].astype(float)
+        phi_missing = np.zeros((len(missing), self.n_features))
+        for tree in self._trees:
+            _tree_shap(tree, X_missing, phi_missing)
+        phi[missing] = phi_missing
+
+        with self._lock:
+            for i, row in zip(missing, phi_missing):
+                self._cache[keys[i]] = row
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+
+def get_explainer(model) -> TreeExplainer:
+    """Explainer du modele, construit au premier appel puis mis en cache."""
+    explainer = _explainers.get(model)
+    if explainer is None:
+        explainer = _explainers[model] = TreeExplainer(model)
+    return explainer
@@ -0,0 +1,292 @@
+"""
+Grille de prix precalculee pour les consultations cartographiques.
+
+Le modele est evalue une fois sur une grille latitude x longitude de la
+Californie (bornes de HouseFeatures) pour quelques profils de logement
+types, par batchs vectorises. Le resultat est stocke dans un tableau
+float32 (profil, latitude, longitude) au format .npy, relu en
+memory-map : une tuile est une simple vue du tableau et un point une
+interpolation bilineaire sur 4 cellules.
+
+Fichiers (dans le dossier de la grille) :
+- price_grid.json : metadonnees (version du modele, axes, profils, fichier)
+- price_grid_<version>.npy : valeurs
+
+La grille est reconstruite par ensure_price_grid() des que la version
+des artefacts (src.models.artifacts.artifact_version) ne correspond plus.
+"""
+
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+LAT_RANGE = (32.0, 42.0)
+LON_RANGE = (-125.0, -114.0)
+DEFAULT_STEP = 0.05
+CHUNK_ROWS = 100_000
+
+RAW_FEATURES = [
+    'MedInc', 'HouseAge', 'AveRooms', 'AveBedrms',
+    'Population', 'AveOccup', 'Latitude', 'Longitude'
+]
+
+# Profils types (features hors localisation), autour des quantiles du dataset
+DEFAULT_PROFILES = {
+    "modest": {"MedInc": 2.0, "HouseAge": 35.0, "AveRooms": 4.5, "AveBedrms": 1.1,
+               "Population": 1200.0, "AveOccup": 3.2},
+    "median": {"MedInc": 3.5, "HouseAge": 29.0, "AveRooms": 5.2, "AveBedrms": 1.05,
+               "Population": 1166.0, "AveOccup": 2.8},
+    "affluent": {"MedInc": 7.0, "HouseAge": 20.0, "AveRooms": 6.5, "AveBedrms": 1.0,
+                 "Population": 900.0, "AveOccup": 2.6},
+}
+
+META_FILENAME = "price_grid.json"
+
+
+def grid_axis(bounds, step: float) -> np.ndarray:
+    """Axe regulier couvrant bounds (bornes incluses)."""
+    n = int(round((bounds[1] - bounds[0]) / step)) + 1
+    return bounds[0] + step * np.arange(n)
+
+
+class PriceGrid:
+    """
+    Grille de prix en lecture seule (memory-map).
+
+    Attributes:
+        values (np.ndarray): Prix predits (n_profils, n_lat, n_lon), en 100k$
+        profiles (list): Noms des profils, dans l'ordre de la 1re dimension
+        lat0, lon0 (float): Origine de la grille
+        step (float): Pas en degres (identique sur les deux axes)
+        model_version (str): Version des artefacts ayant produit la grille
+        signature (str): Configuration de construction (axes, pas, profils) ;
+            distingue deux grilles d'une meme version du modele
+    """
+
+    def __init__(self, values, profiles, lat0, lon0, step, model_version, profile_features=None):
+        self.values = values
+        self.profiles = list(profiles)
+        self.lat0 = lat0
+        self.lon0 = lon0
+        self.step = step
+        self.model_version = model_version
+        self.profile_features = profile_features or {}
+        self._profile_index = {name: i for i, name in enumerate(self.profiles)}
+        self.signature = json.dumps(
+            [lat0, lon0, step, list(values.shape), self.profiles, self.profile_features],
+            sort_keys=True, default=float
+        )
+
+    @property
+    def latitudes(self) -> np.ndarray:
+        return self.lat0 + self.step * np.arange(self.values.shape[1])
+
+    @property
+    def longitudes(self) -> np.ndarray:
+        return self.lon0 + self.step * np.arange(self.values.shape[2])
+
+    @classmethod
+    def load(cls, directory):
+        """
+        Ouvre la grille d'un dossier (memory-map), None si absente.
+        """
+        meta_path = Path(directory) / META_FILENAME
+        if not meta_path.exists():
+            return None
+        meta = json.loads(meta_path.read_text())
+        values_path = Path(directory) / meta['file']
+        if not values_path.exists():
+            return None
+        values = np.load(values_path, mmap_mode='r')
+        return cls(values, meta['profiles'], meta['lat0'], meta['lon0'], meta['step'],
+                   meta['model_version'], meta.get('profile_features'))
+
+    def profile_index(self, profile: str) -> int:
+        """
+        Raises:
+            KeyError: profil inconnu
+        """
+        return self._profile_index[profile]
+
+    def tile(self, profile: str, lat_min: float, lat_max: float, lon_min: float, lon_max: float):
+        """
+        Extrait les cellules dont le centre est dans la boite (vue, sans copie).
+
+        Returns:
+            tuple: (latitudes, longitudes, valeurs 2D (n_lat, n_lon))
+        """
+        p = self.profile_index(profile)
+        n_lat, n_lon = self.values.shape[1:]
+        i0 = max(int(np.ceil((lat_min - self.lat0) / self.step - 1e-9)), 0)
+        i1 = min(int(np.floor((lat_max - self.lat0) / self.step + 1e-9)), n_lat - 1)
+        j0 = max(int(np.ceil((lon_min - self.lon0) / self.step - 1e-9)), 0)
+        j1 = min(int(np.floor((lon_max - self.lon0) / self.step + 1e-9)), n_lon - 1)
+        i1, j1 = max(i1, i0 - 1), max(j1, j0 - 1)
+        return (
+            self.lat0 + self.step * np.arange(i0, i1 + 1),
+            self.lon0 + self.step * np.arange(j0, j1 + 1),
+            self.values[p, i0:i1 + 1, j0:j1 + 1]
+        )
+
+    def interpolate(self, profile: str, lat, lon):
+        """
+        Interpolation bilineaire du prix en un ou plusieurs points.
+
+        Les points hors grille sont ramenes sur le bord.
+
+        Args:
+            profile: Nom du profil
+            lat, lon: Scalaires ou tableaux de meme forme
+
+        Returns:
+            float (scalaires) ou np.ndarray: Prix interpole (en 100k$)
+        """
+        grid = self.values[self.profile_index(profile)]
+        n_lat, n_lon = grid.shape
+        if np.ndim(lat) == 0 and np.ndim(lon) == 0:
+            return self._interpolate_scalar(grid, float(lat), float(lon))
+
+        u = np.clip((np.asarray(lat, dtype=float) - self.lat0) / self.step, 0, n_lat - 1)
+        v = np.clip((np.asarray(lon, dtype=float) - self.lon0) / self.step, 0, n_lon - 1)
+        i = np.minimum(u.astype(np.intp), n_lat - 2)
+        j = np.minimum(v.astype(np.intp), n_lon - 2)
+        du, dv = u - i, v - j
+
+        value = ((1 - du) * (1 - dv) * grid[i, j] + (1 - du) * dv * grid[i, j + 1]
+                 + du * (1 - dv) * grid[i + 1, j] + du * dv * grid[i + 1, j + 1])
+        return value
+
+    def _interpolate_scalar(self, grid, lat: float, lon: float) -> float:
+        # Chemin scalaire sans tableaux temporaires (endpoint /grid/point)
+        n_lat, n_lon = grid.shape
+        u = min(max((lat - self.lat0) / self.step, 0.0), n_lat - 1.0)
+        v = min(max((lon - self.lon0) / self.step, 0.0), n_lon - 1.0)
+        i, j = min(int(u), n_lat - 2), min(int(v), n_lon - 2)
+        du, dv = u - i, v - j
+        return float((1 - du) * ((1 - dv) * grid[i, j] + dv * grid[i, j + 1])
+                     + du * ((1 - dv) * grid[i + 1, j] + dv * grid[i + 1, j + 1]))
+
+
+def _grid_frame(profile_rows: np.ndarray, latitudes, longitudes, start: int, stop: int):
+    """Lignes [start, stop) du produit profils x latitudes x longitudes."""
+    import pandas as pd
+
+    n_lat, n_lon = len(latitudes), len(longitudes)
+    idx = np.arange(start, stop)
+    p, rest = np.divmod(idx, n_lat * n_lon)
+    i, j = np.divmod(rest, n_lon)
+
+    X = np.empty((len(idx), len(RAW_FEATURES)))
+    X[:, :6] = profile_rows[p]
+    X[:, 6] = latitudes[i]
+    X[:, 7] = longitudes[j]
+    return pd.DataFrame(X, columns=RAW_FEATURES, copy=False)
+
+
+def build_price_grid(model, preprocessor, directory, model_version: str,
+                     step: float = DEFAULT_STEP, profiles=None, chunk_rows: int = CHUNK_ROWS) -> PriceGrid:
+    """
+    Evalue le modele sur la grille et l'ecrit dans directory.
+
+    L'ecriture est atomique : le tableau porte la version dans son nom et
+    les metadonnees sont remplacees en dernier (os.replace), les lecteurs
+    voient donc l'ancienne ou la nouvelle grille, jamais un melange.
+
+    Args:
+        model: Modele entraine
+        preprocessor: DataPreprocessor fitte
+        directory: Dossier de sortie
+        model_version: Version des artefacts (invalidation)
+        step: Pas de la grille en degres
+        profiles: dict nom -> features hors localisation (defaut : DEFAULT_PROFILES)
+        chunk_rows: Nombre de lignes par batch de prediction
+
+    Returns:
+        PriceGrid: Grille ouverte en memory-map
+    """
+    profiles = profiles or DEFAULT_PROFILES
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    latitudes, longitudes = grid_axis(LAT_RANGE, step), grid_axis(LON_RANGE, step)
+    names = list(profiles)
+    profile_rows = np.array([[profiles[name][f] for f in RAW_FEATURES[:6]] for name in names], dtype=float)
+    shape = (len(names), len(latitudes), len(longitudes))
+    total = int(np.prod(shape))
+
+    filename = f"price_grid_{model_version}.npy"
+    tmp_values = directory / f".{filename}.{os.getpid()}.tmp"
+    values = np.lib.format.open_memmap(tmp_values, mode='w+', dtype=np.float32, shape=shape)
+    flat = values.reshape(-1)
+    for start in range(0, total, chunk_rows):
+        stop = min(start + chunk_rows, total)
+        frame = _grid_frame(profile_rows, latitudes, longitudes, start, stop)
+        flat[start:stop] = model.predict(preprocessor.transform(frame))
+    values.flush()
+    del values, flat
+    os.replace(tmp_values, directory / filename)
+
+    meta = {
+        'model_version': model_version,
+        'file': filename,
+        'step': step,
+        'lat0': LAT_RANGE[0],
+        'lon0': LON_RANGE[0],
+        'shape': list(shape),
+        'profiles': names,
+        'profile_features': {name: dict(profiles[name]) for name in names},
+    }
+    tmp_meta = directory / f".{META_FILENAME}.{os.getpid()}.tmp"
+    tmp_meta.write_text(json.dumps(meta, indent=2))
+    os.replace(tmp_meta, directory / META_FILENAME)
+
+    # Anciennes versions : les lecteurs deja ouverts gardent leur mapping
+    for old in directory.glob("price_grid_*.npy"):
+        if old.name != filename:
+            old.unlink(missing_ok=True)
+
+    return PriceGrid.load(directory)
+
+
+def ensure_price_grid(model, preprocessor, directory, model_version: str,
+                      step: float = DEFAULT_STEP, profiles=None) -> PriceGrid:
+    """
+    Ouvre la grille existante, ou la reconstruit si elle est absente ou
+    produite par une autre version du modele / une autre configuration.
+    """
+    profiles = profiles or DEFAULT_PROFILES
+    grid = PriceGrid.load(directory)
+    if (grid is not None and grid.model_version == model_version
+            and np.isclose(grid.step, step) and grid.profile_features == profiles):
+        return grid
+    return build_price_grid(model, preprocessor, directory, model_version, step, profiles)
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    import time
+    import joblib
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+    from src.models.artifacts import latest_model_path, artifact_version
+
+    parser = argparse.ArgumentParser(description="Precalcule la grille de prix geographique")
+    parser.add_argument("--model-dir", default=os.getenv("MODEL_DIR", os.path.join(os.path.dirname(__file__), '../../models')))
+    parser.add_argument("--output", default=None, help="Dossier de la grille (defaut : <model-dir>/price_grid)")
+    parser.add_argument("--step", type=float, default=DEFAULT_STEP)
+    parser.add_argument("--profiles", default=None, help="Fichier JSON nom -> features hors localisation")
+    args = parser.parse_args()
+
+    model_path = latest_model_path(args.model_dir)
+    preprocessor_path = Path(args.model_dir) / "preprocessor.joblib"
+    profiles = json.loads(Path(args.profiles).read_text()) if args.profiles else None
+
+    start = time.perf_counter()
+    grid = ensure_price_grid(
+        joblib.load(model_path), joblib.load(preprocessor_path),
+        args.output or Path(args.model_dir) / "price_grid",
+        artifact_version(model_path, preprocessor_path), args.step, profiles
+    )
+    print(f"Grille {grid.values.shape} (version {grid.model_version}) en {time.perf_counter() - start:.1f}s")
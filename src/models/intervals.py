@@ -0,0 +1,199 @@
+"""
+Module pour les intervalles de prediction.
+
+Deux sources d'incertitude sont supportees :
+- RandomForest : dispersion des predictions des arbres, calculee en une
+  seule passe (apply() + lecture vectorisee des valeurs de feuilles)
+- GradientBoosting : deux tetes quantiles (loss='quantile') legeres,
+  entrainees a part et sauvegardees dans models/quantile_heads.joblib
+
+Sans source d'incertitude (pas de tetes quantiles), les bornes valent None
+et le niveau de confiance retombe sur les paliers de prix historiques de
+l'API (prediction_confidence).
+"""
+
+import weakref
+
+import numpy as np
+
+from src.utils.timing import stage
+
+DEFAULT_COVERAGE = 0.9
+
+# Table (n_arbres, max_noeuds) des valeurs de feuilles, par modele
+_leaf_tables = weakref.WeakKeyDictionary()
+
+
+class QuantileHeads:
+    """
+    Paire de GradientBoosting quantiles (borne basse / borne haute).
+
+    Les tetes sont volontairement plus petites que le modele principal
+    (moins d'arbres, moins profonds) pour que le surcout a la prediction
+    reste une fraction bornee de la latence du modele de base.
+
+    Example:
+        >>> heads = QuantileHeads(coverage=0.9).fit(X_train, y_train)
+        >>> lower, upper = heads.predict(X_test)
+    """
+
+    def __init__(self, coverage=DEFAULT_COVERAGE, n_estimators=50, max_depth=3,
+                 learning_rate=0.1, random_state=42):
+        from sklearn.ensemble import GradientBoostingRegressor
+
+        self.coverage = coverage
+        alpha = (1 - coverage) / 2
+        params = dict(
+            loss='quantile',
+            n_estimators=n_estimators,
+            max_depth=max_depth,
+            learning_rate=learning_rate,
+            random_state=random_state
+        )
+        self.lower_model = GradientBoostingRegressor(alpha=alpha, **params)
+        self.upper_model = GradientBoostingRegressor(alpha=1 - alpha, **params)
+
+    def fit(self, X, y):
+        self.lower_model.fit(X, y)
+        self.upper_model.fit(X, y)
+        return self
+
+    def predict(self, X):
+        """
+        Args:
+            X: Features transformees par le preprocessor
+
+        Returns:
+            tuple: (lower, upper) en 100k$
+        """
+        return self.lower_model.predict(X), self.upper_model.predict(X)
+
+
+def _leaf_value_table(model):
+    """Empile les valeurs de noeuds de tous les arbres d'une foret (mise en cache)."""
+    table = _leaf_tables.get(model)
+    if table is None:
+        trees = [est.tree_ for est in model.estimators_]
+        table = np.zeros((len(trees), max(t.node_count for t in trees)))
+        for i, tree in enumerate(trees):
+            table[i, :tree.node_count] = tree.value[:, 0, 0]
+        _leaf_tables[model] = table
+    return table
+
+
+def forest_tree_predictions(model, X):
+    """
+    Predictions de chaque arbre d'une foret, sans boucle Python sur les arbres.
+
+    Args:
+        model: RandomForestRegressor (ou ExtraTreesRegressor) entraine
+        X: Features transformees
+
+    Returns:
+        ndarray: Matrice (n_samples, n_arbres)
+    """
+    leaves = model.apply(X)
+    table = _leaf_value_table(model)
+    return table[np.arange(table.shape[0]), leaves]
+
+
+def predict_with_intervals(model, X, interval_model=None, coverage=DEFAULT_COVERAGE):
+    """
+    Predit les prix et, si possible, les bornes de l'intervalle de prediction.
+
+    Args:
+        model: Modele de prix entraine
+        X: Features transformees par le preprocessor
+        interval_model: QuantileHeads optionnelles (modeles non-forets)
+        coverage: Couverture visee pour la dispersion des forets
+
+    Returns:
+        tuple: (prediction, lower, upper) ; lower et upper valent None
+            quand aucune source d'incertitude n'est disponible
+    """
+    # Deja charge par le depickling du modele : import sans cout
+    from sklearn.ensemble._forest import BaseForest
+
+    if isinstance(model, BaseForest):
+        with stage("model_predict"):
+            per_tree = forest_tree_predictions(model, X)
+            prediction = per_tree.mean(axis=1)
+        with stage("intervals"):
+            alpha = (1 - coverage) / 2
+            lower, upper = np.quantile(per_tree, [alpha, 1 - alpha], axis=1)
+    elif interval_model is not None:
+        with stage("model_predict"):
+            prediction = model.predict(X)
+        with stage("intervals"):
+            lower, upper = interval_model.predict(X)
+    else:
+        with stage("model_predict"):
+            return model.predict(X), None, None
+
+    # Les quantiles ne doivent pas croiser la prediction centrale
+    lower = np.minimum(lower, prediction)
+    upper = np.maximum(upper, prediction)
+    return prediction, lower, upper
+
+
+def confidence_from_interval(prediction, lower, upper):
+    """
+    Niveau de confiance a partir de la largeur relative de l'intervalle.
+
+    Returns:
+        ndarray: 'high' (< 25%), 'medium' (< 50%) ou 'low'
+    """
+    relative_width = (upper - lower) / np.maximum(np.abs(prediction), 1e-6)
+    return np.where(relative_width < 0.25, 'high',
+                    np.where(relative_width < 0.5, 'medium', 'low'))
+
+
+def confidence_from_price(prediction):
+    """
+    Paliers historiques de l'API, utilises quand aucun intervalle n'existe.
+
+    Returns:
+        ndarray: 'high' (< 1.5), 'medium' (< 4.0) ou 'low'
+    """
+    prediction = np.asarray(prediction)
+    return np.where(prediction < 1.5, 'high', np.where(prediction < 4.0, 'medium', 'low'))
+
+
+def prediction_confidence(prediction, lower, upper):
+    """Niveau de confiance : largeur de l'intervalle si disponible, sinon paliers de prix."""
+    if lower is None:
+        return confidence_from_price(prediction)
+    return confidence_from_interval(prediction, lower, upper)
+
+
+if __name__ == "__main__":
+    import sys
+    import os
+    import joblib
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+    from sklearn.model_selection import train_test_split
+    from src.data.load_data import load_california_housing_data, get_target_name
+    # Classe importee via son module pour que le pickle soit rechargeable par l'API
+    from src.models.intervals import QuantileHeads
+
+    model_dir = os.path.abspath(
+        os.getenv("MODEL_DIR", os.path.join(os.path.dirname(__file__), '../../models'))
+    )
+
+    print("Entrainement des tetes quantiles")
+    df = load_california_housing_data()
+    # Preprocessor deploye : les tetes voient les memes features qu'au service
+    # (un preprocessor pickle sans bornes de capping ne cappe pas)
+    preprocessor = joblib.load(os.path.join(model_dir, "preprocessor.joblib"))
+    # Meme split que le notebook 04_modeling (random_state=42)
+    train, test = train_test_split(df, test_size=0.2, random_state=42)
+    X_train, X_test = preprocessor.transform(train), preprocessor.transform(test)
+    y_train, y_test = train[get_target_name()], test[get_target_name()]
+
+    heads = QuantileHeads().fit(X_train, y_train)
+    lower, upper = heads.predict(X_test)
+    covered = np.mean((y_test.values >= lower) & (y_test.values <= upper))
+    print(f"Couverture test : {covered:.3f} (visee {heads.coverage})")
+
+    joblib.dump(heads, os.path.join(model_dir, "quantile_heads.joblib"))
+    print("OK!")
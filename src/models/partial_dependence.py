@@ -0,0 +1,179 @@
+"""
+Courbes what-if et dependance partielle, en une passe sur une grille.
+
+Une requete what-if (une maison, une ou deux features balayees) ou de
+dependance partielle (un echantillon de maisons x la grille) devient une
+seule matrice brute (n, 8) : un seul preprocessing, un seul appel au
+modele, au lieu d'un /predict par point.
+
+Chemin rapide pour les arbres : la prediction d'un ensemble d'arbres ne
+depend, pour chaque feature du modele, que de la position de la valeur
+parmi les seuils de split de cette feature (tous arbres confondus). Deux
+lignes dans les memes cellules de seuils ont exactement la meme
+prediction ; sur une grille fine, beaucoup de points tombent entre les
+memes seuils (et le capping du preprocessor en ecrase d'autres). On ne
+predit donc qu'une ligne par cellule distincte (ThresholdCells), avec
+les memes comparaisons que sklearn (valeurs en float32, x <= seuil).
+Les tetes quantiles et les forets (intervalles) sont incluses dans les
+seuils : bornes et confiance restent exactes.
+"""
+
+import weakref
+
+import numpy as np
+
+from src.models.explain import UnsupportedModelError, _ensemble
+from src.utils.timing import stage
+
+# Par modele : (reference faible vers le modele d'intervalles, ThresholdCells)
+_cells_cache = weakref.WeakKeyDictionary()
+
+
+class CellsNotSupportedError(ValueError):
+    """Chemin 'cells' demande pour un modele qui n'est pas a base d'arbres."""
+
+
+def sweep_axis(start: float, stop: float, num: int, values=None) -> np.ndarray:
+    """Valeurs balayees : liste explicite, sinon num points de start a stop inclus."""
+    if values is not None:
+        return np.asarray(values, dtype=float)
+    return np.linspace(start, stop, num)
+
+
+def grid_matrix(base, columns, axes) -> np.ndarray:
+    """
+    Matrice what-if : la ligne de base repetee, les colonnes balayees
+    parcourant le produit cartesien des axes (premier axe le plus lent).
+
+    Args:
+        base: Ligne brute (8,)
+        columns: Indices des colonnes balayees (1 ou 2)
+        axes: Valeurs de chaque colonne balayee
+
+    Returns:
+        np.ndarray: (prod(len(axe)), 8)
+    """
+    mesh = np.meshgrid(*axes, indexing="ij")
+    X = np.repeat(np.asarray(base, dtype=float)[None, :], mesh[0].size, axis=0)
+    for column, values in zip(columns, mesh):
+        X[:, column] = values.ravel()
+    return X
+
+
+def population_grid_matrix(population, columns, axes) -> np.ndarray:
+    """
+    Matrice de dependance partielle : l'echantillon complet pour chaque
+    point de la grille (bloc k = point k), colonnes balayees fixees.
+
+    Returns:
+        np.ndarray: (n_points * n_lignes, 8)
+    """
+    population = np.asarray(population, dtype=float)
+    n_rows = len(population)
+    mesh = np.meshgrid(*axes, indexing="ij")
+    X = np.tile(population, (mesh[0].size, 1))
+    for column, values in zip(columns, mesh):
+        X[:, column] = np.repeat(values.ravel(), n_rows)
+    return X
+
+
+def _tree_models(model, interval_model=None) -> list:
+    """Modeles a base d'arbres dont les seuils determinent la sortie."""
+    models = [model]
+    if interval_model is not None:
+        models += [interval_model.lower_model, interval_model.upper_model]
+    return models
+
+
+class ThresholdCells:
+    """
+    Seuils de split, par feature, d'un ou plusieurs ensembles d'arbres.
+
+    Raises:
+        UnsupportedModelError: si un des modeles n'est pas a base d'arbres
+    """
+
+    def __init__(self, models):
+        n_features = models[0].n_features_in_
+        thresholds = [[] for _ in range(n_features)]
+        for model in models:
+            trees, _, _ = _ensemble(model)
+            for tree in trees:
+                internal = tree.children_left >= 0
+                for feature, threshold in zip(tree.feature[internal], tree.threshold[internal]):
+                    thresholds[feature].append(threshold)
+        self.thresholds = [np.unique(np.asarray(t, dtype=np.float64)) for t in thresholds]
+        self.n_thresholds = sum(len(t) for t in self.thresholds)
+
+    def signatures(self, X) -> np.ndarray:
+        """
+        Cellule de chaque ligne : nombre de seuils strictement inferieurs,
+        par feature (x <= seuil est alors connu pour chaque split).
+
+        Args:
+            X: Features transformees (n, n_features)
+        """
+        # Memes valeurs que sklearn : float32 compare a un seuil float64
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        used = [j for j, t in enumerate(self.thresholds) if len(t)]
+        cells = np.empty((len(X), len(used)), dtype=np.int32)
+        for k, j in enumerate(used):
+            cells[:, k] = np.searchsorted(self.thresholds[j], X[:, j], side="left")
+        return cells
+
+    def compress(self, X):
+        """
+        Une ligne representante par cellule distincte.
+
+        Returns:
+            tuple: (indices des representants, inverse tel que
+                prediction[representants][inverse] == prediction)
+        """
+        cells = np.ascontiguousarray(self.signatures(X))
+        keys = cells.view(np.dtype((np.void, cells.dtype.itemsize * cells.shape[1]))).ravel()
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        return first, inverse.ravel()
+
+
+def get_threshold_cells(model, interval_model=None) -> ThresholdCells:
+    """
+    ThresholdCells du modele (et de ses tetes quantiles), mises en cache.
+
+    Raises:
+        UnsupportedModelError: modele (ou tetes) non base sur des arbres
+    """
+    cached = _cells_cache.get(model)
+    if cached is not None:
+        interval_ref, cells = cached
+        if (interval_ref() if interval_ref is not None else None) is interval_model:
+            return cells
+    cells = ThresholdCells(_tree_models(model, interval_model))
+    _cells_cache[model] = (weakref.ref(interval_model) if interval_model is not None else None, cells)
+    return cells
+
+
+def compress_rows(X_processed, model, interval_model=None):
+    """
+    Lignes a predire reellement pour des arbres (chemin rapide).
+
+    Returns:
+        tuple: (indices des representants, inverse), ou None si le
+            modele n'est pas a base d'arbres (toutes les lignes sont a predire)
+    """
+    try:
+        cells = get_threshold_cells(model, interval_model)
+    except UnsupportedModelError:
+        return None
+    with stage("threshold_cells"):
+        return cells.compress(X_processed)
+
+
+def summarize_population(prices: np.ndarray, n_points: int, quantiles=(0.1, 0.9)):
+    """
+    Dependance partielle a partir des predictions de population_grid_matrix().
+
+    Returns:
+        tuple: (moyenne par point, quantiles des courbes individuelles (ICE) par point)
+    """
+    per_point = np.asarray(prices).reshape(n_points, -1)
+    return per_point.mean(axis=1), np.quantile(per_point, quantiles, axis=1)
@@ -0,0 +1,341 @@
+"""
+Modeles specialises par region geographique.
+
+Les regions sont les zones de get_top_expensive_zones()
+(src/database/queries.py) : latitude et longitude arrondies au degre
+(arrondi bancaire, comme $round de MongoDB et np.round). Chaque region
+assez peuplee a son propre GradientBoosting, plus petit que le modele
+global, entraine sur les features deja transformees par le preprocessor
+global (un seul preprocessing par batch). Les autres regions, et celles
+ou le modele specialise ne bat pas le global, restent servies par le
+modele global.
+
+Fichiers (dossier des regions, defaut models/regions/) :
+- index.json : regions disponibles, fichier et metriques de chacune
+- region_<lat>_<lon>.joblib : {'model': ..., 'interval_model': ...}
+
+En production, RegionalModelPool ne garde en memoire que les modeles
+recemment utilises (LRU borne en nombre et en octets), charges a la
+demande ; predict_by_region() regroupe les lignes d'un batch par region
+pour un seul appel vectorise par modele.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+from src.models.intervals import predict_with_intervals
+from src.utils.timing import stage
+
+INDEX_FILENAME = "index.json"
+# Meme seuil que get_top_expensive_zones() ($match count > 100)
+MIN_REGION_ROWS = 100
+
+
+def zone_keys(latitude, longitude) -> np.ndarray:
+    """
+    Cle entiere de la zone de chaque ligne : lat_zone * 1000 + lon_zone.
+
+    Args:
+        latitude, longitude: Tableaux de coordonnees brutes
+
+    Returns:
+        np.ndarray: int64, une cle par ligne
+    """
+    lat_zone = np.round(np.asarray(latitude, dtype=float)).astype(np.int64)
+    lon_zone = np.round(np.asarray(longitude, dtype=float)).astype(np.int64)
+    return lat_zone * 1000 + lon_zone
+
+
+def zone_name(key: int) -> str:
+    lat_zone, lon_zone = divmod(int(key), 1000)
+    if lon_zone > 500:
+        lat_zone, lon_zone = lat_zone + 1, lon_zone - 1000
+    return f"{lat_zone}_{lon_zone}"
+
+
+def group_rows(keys: np.ndarray):
+    """
+    Indices des lignes de chaque cle, en une passe de tri.
+
+    Returns:
+        list: [(cle, indices des lignes)], indices croissants dans chaque groupe
+    """
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    bounds = np.flatnonzero(np.diff(sorted_keys)) + 1
+    starts = np.concatenate([[0], bounds])
+    return [(int(sorted_keys[start]), rows) for start, rows in zip(starts, np.split(order, bounds))]
+
+
+class RegionalModelPool:
+    """
+    Modeles regionaux charges a la demande, LRU borne.
+
+    Attributes:
+        directory (Path): Dossier des regions (index.json)
+        max_models (int): Nombre maximal de modeles en memoire
+        max_bytes (int): Taille cumulee maximale des fichiers charges (0 : sans limite)
+        regions (dict): Cle de zone -> entree de l'index
+
+    Example:
+        >>> pool = RegionalModelPool("models/regions", max_models=8)
+        >>> artifact = pool.get(zone_keys([37.9], [-122.2])[0])  # None : modele global
+    """
+
+    def __init__(self, directory, max_models: int = 16, max_bytes: int = 0,
+                 on_load=None, on_evict=None, loader=None):
+        self.directory = Path(directory)
+        index = json.loads((self.directory / INDEX_FILENAME).read_text())
+        self.version = index.get("version")
+        self.regions = {int(entry["key"]): entry for entry in index["regions"]}
+        self.max_models = max_models
+        self.max_bytes = max_bytes
+        self.on_load = on_load
+        self.on_evict = on_evict
+        self._loader = loader
+        self._models = OrderedDict()
+        self._sizes = {}
+        self._loading = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def open(cls, directory, **kwargs):
+        """Pool du dossier, None s'il n'a pas d'index."""
+        if not (Path(directory) / INDEX_FILENAME).exists():
+            return None
+        return cls(directory, **kwargs)
+
+    @property
+    def loaded(self) -> list:
+        with self._lock:
+            return list(self._models)
+
+    @property
+    def loaded_bytes(self) -> int:
+        with self._lock:
+            return sum(self._sizes.values())
+
+    def get(self, key: int):
+        """
+        Artefact de la zone (dict 'model' / 'interval_model'), None sans modele regional.
+
+        Un seul chargement par zone meme si plusieurs threads la demandent
+        en meme temps.
+        """
+        entry = self.regions.get(key)
+        if entry is None:
+            return None
+        with self._lock:
+            artifact = self._models.get(key)
+            if artifact is not None:
+                self._models.move_to_end(key)
+                self.hits += 1
+                return artifact
+            self.misses += 1
+            loading = self._loading.get(key)
+            if loading is None:
+                loading = self._loading[key] = threading.Lock()
+        with loading:
+            with self._lock:
+                artifact = self._models.get(key)
+            if artifact is None:
+                artifact = self._load(key, entry)
+            with self._lock:
+                self._loading.pop(key, None)
+        return artifact
+
+    def _load(self, key, entry):
+        path = self.directory / entry["file"]
+        start = time.perf_counter()
+        if self._loader is not None:
+            artifact = self._loader(path)
+        else:
+            import joblib
+            artifact = joblib.load(path)
+        seconds = time.perf_counter() - start
+        size = os.path.getsize(path)
+
+        evicted = []
+        with self._lock:
+            self._models[key] = artifact
+            self._sizes[key] = size
+            while len(self._models) > 1 and (
+                len(self._models) > self.max_models
+                or (self.max_bytes and sum(self._sizes.values()) > self.max_bytes)
+            ):
+                old, _ = self._models.popitem(last=False)
+                self._sizes.pop(old)
+                evicted.append(old)
+        if self.on_load is not None:
+            self.on_load(zone_name(key), seconds)
+        if self.on_evict is not None:
+            for old in evicted:
+                self.on_evict(zone_name(old))
+        return artifact
+
+
+def predict_by_region(processed, latitude, longitude, pool: RegionalModelPool,
+                      model, interval_model=None) -> dict:
+    """
+    Predit un batch en routant chaque ligne vers le modele de sa region.
+
+    Args:
+        processed: DataFrame transforme par le preprocessor global
+        latitude, longitude: Coordonnees brutes (avant scaling)
+        pool: Modeles regionaux
+        model, interval_model: Modele global (regions sans modele dedie)
+
+    Returns:
+        dict: Meme format que predict_frame(), plus 'regions' (nombre de
+            lignes par zone servie par un modele regional)
+    """
+    n_rows = len(processed)
+    with stage("region_routing"):
+        groups = group_rows(zone_keys(latitude, longitude))
+        routed = [(key, rows, pool.get(key)) for key, rows in groups]
+
+    fallback = np.concatenate([rows for _, rows, artifact in routed if artifact is None] or [np.empty(0, np.intp)])
+    parts = []
+    if len(fallback):
+        fallback.sort()
+        X = processed if len(fallback) == n_rows else processed.iloc[fallback]
+        parts.append((fallback, *predict_with_intervals(model, X, interval_model)))
+
+    values = processed.to_numpy()
+    regions = {}
+    for key, rows, artifact in routed:
+        if artifact is not None:
+            parts.append((rows, *predict_with_intervals(
+                artifact["model"], values[rows], artifact.get("interval_model")
+            )))
+            regions[zone_name(key)] = len(rows)
+
+    prediction = np.empty(n_rows)
+    with_intervals = all(lower is not None for _, _, lower, _ in parts)
+    lower_all = np.empty(n_rows) if with_intervals else None
+    upper_all = np.empty(n_rows) if with_intervals else None
+    for rows, pred, lower, upper in parts:
+        prediction[rows] = pred
+        if with_intervals:
+            lower_all[rows] = lower
+            upper_all[rows] = upper
+    return {"predicted_price": prediction, "lower_bound": lower_all, "upper_bound": upper_all, "regions": regions}
+
+
+def train_regional_models(train_frame, test_frame, preprocessor, global_model, directory,
+                          min_rows: int = MIN_REGION_ROWS, keep_if_better: bool = True,
+                          with_intervals: bool = True, n_estimators: int = 100, max_depth: int = 4,
+                          random_state: int = 42) -> dict:
+    """
+    Entraine un modele par region et ecrit l'index.
+
+    Args:
+        train_frame, test_frame: DataFrames bruts (8 features + cible)
+        preprocessor: DataPreprocessor fitte du modele global
+        global_model: Modele global (reference des metriques)
+        directory: Dossier de sortie
+        min_rows: Lignes d'entrainement minimales pour une region
+        keep_if_better: Ne garder que les regions ou le modele dedie bat le
+            global sur le test (MAE)
+        with_intervals: Entrainer des tetes quantiles par region
+        n_estimators, max_depth: Taille des modeles regionaux
+
+    Returns:
+        dict: Contenu de index.json
+    """
+    import joblib
+    from sklearn.ensemble import GradientBoostingRegressor
+    from src.models.intervals import QuantileHeads
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    target = preprocessor.target_name
+
+    X_train = preprocessor.transform(train_frame).to_numpy()
+    X_test = preprocessor.transform(test_frame)
+    global_test = global_model.predict(X_test)
+    X_test = X_test.to_numpy()
+    y_train = train_frame[target].to_numpy()
+    y_test = test_frame[target].to_numpy()
+    train_keys = zone_keys(train_frame['Latitude'], train_frame['Longitude'])
+    test_keys = zone_keys(test_frame['Latitude'], test_frame['Longitude'])
+
+    regions, skipped = [], []
+    for key, rows in group_rows(train_keys):
+        name = zone_name(key)
+        test_rows = np.flatnonzero(test_keys == key)
+        if len(rows) < min_rows or len(test_rows) == 0:
+            skipped.append({"zone": name, "reason": "too_few_rows", "train_rows": int(len(rows))})
+            continue
+        model = GradientBoostingRegressor(
+            n_estimators=n_estimators, max_depth=max_depth, learning_rate=0.1, random_state=random_state
+        ).fit(X_train[rows], y_train[rows])
+        mae = float(np.mean(np.abs(model.predict(X_test[test_rows]) - y_test[test_rows])))
+        global_mae = float(np.mean(np.abs(global_test[test_rows] - y_test[test_rows])))
+        if keep_if_better and mae >= global_mae:
+            skipped.append({"zone": name, "reason": "not_better", "mae": mae, "global_mae": global_mae})
+            continue
+
+        interval_model = None
+        if with_intervals:
+            interval_model = QuantileHeads().fit(X_train[rows], y_train[rows])
+        filename = f"region_{name}.joblib"
+        joblib.dump({"model": model, "interval_model": interval_model}, directory / filename)
+        regions.append({
+            "key": int(key), "zone": name, "file": filename,
+            "train_rows": int(len(rows)), "test_rows": int(len(test_rows)),
+            "mae": mae, "global_mae": global_mae
+        })
+
+    index = {
+        "version": time.strftime("%Y%m%dT%H%M%S"),
+        "min_rows": min_rows,
+        "model_params": {"n_estimators": n_estimators, "max_depth": max_depth},
+        "regions": regions,
+        "skipped": skipped
+    }
+    tmp = directory / f".{INDEX_FILENAME}.{os.getpid()}.tmp"
+    tmp.write_text(json.dumps(index, indent=2))
+    os.replace(tmp, directory / INDEX_FILENAME)
+    return index
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    import joblib
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+    from sklearn.model_selection import train_test_split
+    from src.data.load_data import load_california_housing_data
+    from src.models.artifacts import latest_model_path
+
+    parser = argparse.ArgumentParser(description="Entraine les modeles regionaux")
+    parser.add_argument("--model-dir", default=os.getenv("MODEL_DIR", os.path.join(os.path.dirname(__file__), '../../models')))
+    parser.add_argument("--output", default=None, help="Dossier des regions (defaut : <model-dir>/regions)")
+    parser.add_argument("--min-rows", type=int, default=MIN_REGION_ROWS)
+    parser.add_argument("--keep-all", action="store_true", help="Garder aussi les regions ou le global est meilleur")
+    parser.add_argument("--no-intervals", action="store_true")
+    args = parser.parse_args()
+
+    global_model = joblib.load(latest_model_path(args.model_dir))
+    preprocessor = joblib.load(os.path.join(args.model_dir, "preprocessor.joblib"))
+    # Meme split que le notebook 04_modeling (random_state=42)
+    train, test = train_test_split(load_california_housing_data(), test_size=0.2, random_state=42)
+
+    start = time.perf_counter()
+    index = train_regional_models(
+        train, test, preprocessor, global_model, args.output or os.path.join(args.model_dir, "regions"),
+        min_rows=args.min_rows, keep_if_better=not args.keep_all, with_intervals=not args.no_intervals
+    )
+    for entry in index["regions"]:
+        print(f"  {entry['zone']:>9} : {entry['train_rows']:>5} lignes, MAE {entry['mae']:.3f} (global {entry['global_mae']:.3f})")
+    print(f"{len(index['regions'])} regions, {len(index['skipped'])} ignorees, en {time.perf_counter() - start:.1f}s")
+    print("OK!")
@@ -0,0 +1,85 @@
+"""
+Chronometrage leger des etapes du pipeline de prediction.
+
+Les modules de src/ marquent leurs etapes avec stage("nom") sans
+dependre de l'API. L'API branche un collecteur avec set_stage_sink() ;
+sans collecteur, stage() renvoie un context manager partage qui ne fait
+rien (pas d'allocation, pas d'horloge : quelques dizaines de ns).
+
+Un thread de fond qui ne doit pas alimenter les metriques de production
+(evaluation shadow) remplace le collecteur pour lui seul avec
+set_thread_stage_sink().
+
+Example:
+    >>> with stage("scaling"):
+    ...     X = scaler.transform(X)
+"""
+
+import threading
+import time
+
+_sink = None
+_local = threading.local()
+
+
+class _NoopStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+class _TimedStage:
+    __slots__ = ('name', 'sink', 'start')
+
+    def __init__(self, name, sink):
+        self.name = name
+        self.sink = sink
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.sink(self.name, time.perf_counter() - self.start)
+        return False
+
+
+_NOOP = _NoopStage()
+
+
+def set_stage_sink(sink):
+    """
+    Branche (ou debranche avec None) le collecteur des durees d'etapes.
+
+    Args:
+        sink: Callable (nom_etape, duree_en_secondes) ou None
+    """
+    global _sink
+    _sink = sink
+
+
+def set_thread_stage_sink(sink):
+    """
+    Collecteur propre au thread courant, prioritaire sur set_stage_sink().
+
+    Args:
+        sink: Callable (nom_etape, duree_en_secondes) ou None (etapes non mesurees)
+    """
+    _local.sink = sink
+
+
+def stage(name):
+    """
+    Context manager mesurant la duree d'une etape.
+
+    Args:
+        name: Nom de l'etape (label 'stage' des metriques)
+    """
+    sink = getattr(_local, 'sink', _sink)
+    if sink is None:
+        return _NOOP
+    return _TimedStage(name, sink)
@@ -144,7 +144,7 @@ if __name__ == "__main__":
         
     except requests.exceptions.ConnectionError:
         print("\n ERREUR: Impossible de se connecter à l'API")
-        print("Assurez-vous que l'API tourne avec: python api/main.py")
+        print("Assurez-vous que l'API tourne avec: python -m api.main")
     
     except AssertionError as e:
         print(f"\n Test échoué: {e}")
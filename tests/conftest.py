@@ -0,0 +1,35 @@
+"""
+Fixtures partagees : application de test autour du router de l'API, avec
+une fausse prediction (ni modele ni artefacts).
+"""
+
+import numpy as np
+import pytest
+
+
+def fake_predict_matrix(calls):
+    """predict_matrix de substitution : prix = MedInc / 2, lignes recues gardees dans calls."""
+    def predict(X):
+        calls.append(np.array(X, copy=True))
+        price = X[:, 0] / 2
+        return {"predicted_price": price, "lower_bound": price - 0.1, "upper_bound": price + 0.1,
+                "confidence": np.full(len(X), "high", dtype=object)}
+    return predict
+
+
+@pytest.fixture
+def batch_client(monkeypatch):
+    """Client de test et liste des matrices passees au modele."""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from api import endpoints
+
+    calls = []
+    monkeypatch.setattr(endpoints, "predict_matrix", fake_predict_matrix(calls))
+    monkeypatch.setattr(endpoints, "observe_inputs", lambda X: None)
+    monkeypatch.setattr(endpoints, "CASCADE_ENABLED", False)
+    monkeypatch.setattr(endpoints, "get_shadow", lambda: None)
+    app = FastAPI()
+    app.include_router(endpoints.router)
+    return TestClient(app), calls
@@ -0,0 +1,65 @@
+"""
+Backtesting : fenetres glissantes, matrices partagees et parite entre executors.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.load_data import get_feature_names, get_target_name
+from src.models.backtest import PERIOD_COLUMN, make_windows, run_backtest, share_matrices, summarize
+
+
+def _snapshots(n_periods=5, rows=300):
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame(rng.uniform(1, 10, size=(n_periods * rows, 8)), columns=get_feature_names())
+    frame["Latitude"] = rng.uniform(32.5, 41.9, len(frame))
+    frame["Longitude"] = rng.uniform(-124.3, -114.4, len(frame))
+    frame[get_target_name()] = 0.4 * frame["MedInc"] + rng.normal(0, 0.3, len(frame))
+    # Periodes melangees : share_matrices() doit trier
+    frame[PERIOD_COLUMN] = [f"2024-{i % n_periods + 1:02d}" for i in range(len(frame))]
+    return frame
+
+
+def test_make_windows():
+    periods = ["a", "b", "c", "d", "e"]
+    assert make_windows(periods, 2) == [
+        {"name": "c", "train": (0, 2), "test": (2, 3)},
+        {"name": "d", "train": (1, 3), "test": (3, 4)},
+        {"name": "e", "train": (2, 4), "test": (4, 5)},
+    ]
+    assert [w["train"] for w in make_windows(periods, 2, step=2, expanding=True)] == [(0, 2), (0, 4)]
+    assert make_windows(periods, 3, test_periods=3) == []
+
+
+def test_shared_matrices_are_sorted_by_period(tmp_path):
+    frame = _snapshots()
+    periods, offsets = share_matrices(frame, tmp_path)
+    assert periods == [f"2024-{m:02d}" for m in range(1, 6)]
+    assert offsets.tolist() == [0, 300, 600, 900, 1200, 1500]
+    target = np.load(tmp_path / "target.npy", mmap_mode="r")
+    expected = frame.loc[frame[PERIOD_COLUMN] == "2024-02", get_target_name()].to_numpy()
+    assert np.array_equal(target[300:600], expected)
+    assert np.load(tmp_path / "features.npy", mmap_mode="r").shape == (1500, 13)
+
+
+def test_process_pool_matches_inline():
+    from sklearn.ensemble import GradientBoostingRegressor
+    from sklearn.linear_model import LinearRegression
+
+    candidates = {
+        "linear": LinearRegression(),
+        "gb": GradientBoostingRegressor(n_estimators=10, max_depth=2, random_state=0)
+    }
+    frame = _snapshots()
+    inline = run_backtest(frame, candidates, train_periods=2, executor="inline")
+    pooled = run_backtest(frame, candidates, train_periods=2, workers=2, executor="process")
+    assert inline["window"].tolist() == ["2024-03"] * 2 + ["2024-04"] * 2 + ["2024-05"] * 2
+    assert (inline[["train_rows", "test_rows"]].to_numpy() == [600, 300]).all()
+    metrics = ["train_mae", "test_mae", "test_rmse", "test_r2", "overfitting"]
+    assert np.allclose(inline[metrics].to_numpy(), pooled[metrics].to_numpy())
+    assert (pooled[["fit_seconds", "window_seconds"]].to_numpy() > 0).all()
+    assert summarize(pooled)["windows"].tolist() == [3, 3]
+
+    with pytest.raises(ValueError):
+        run_backtest(frame, candidates, train_periods=5)
@@ -0,0 +1,94 @@
+"""
+Forme des reponses JSON de /predict-batch (records / columnar, avec ou
+sans features, batch vide) et repli de ORJSONResponse sur json.
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+from api import responses
+from api.formats import FEATURE_NAMES
+from api.inference import format_price, result_columns, result_records
+from api.schemas import BatchPredictionResponse, ColumnarBatchPredictionResponse
+
+HOUSES = [
+    {"MedInc": 8.3, "HouseAge": 41, "AveRooms": 6.9, "AveBedrms": 1.0, "Population": 322,
+     "AveOccup": 2.5, "Latitude": 37.88, "Longitude": -122.23},
+    {"MedInc": 2.0, "HouseAge": 12, "AveRooms": 4.1, "AveBedrms": 1.1, "Population": 900,
+     "AveOccup": 3.1, "Latitude": 34.05, "Longitude": -118.24},
+]
+
+
+def test_result_conversions():
+    result = {"predicted_price": np.array([1.5, 2.5]), "lower_bound": np.array([1.0, 2.0]),
+              "upper_bound": None, "confidence": np.array(["high", "low"])}
+    records = result_records(result, features=[{"a": 1}, {"a": 2}])
+    assert records[1] == {"predicted_price": 2.5, "predicted_price_formatted": format_price(2.5),
+                          "lower_bound": 2.0, "upper_bound": None, "confidence": "low", "features": {"a": 2}}
+    assert all(type(record["predicted_price"]) is float for record in records)
+    assert "features" not in result_records(result)[0]
+    assert result_columns(result) == {"predicted_price": [1.5, 2.5], "lower_bound": [1.0, 2.0],
+                                      "upper_bound": None, "confidence": ["high", "low"]}
+
+
+@pytest.mark.parametrize("include_features", [True, False])
+def test_records_response(batch_client, include_features):
+    client, _ = batch_client
+    response = client.post("/predict-batch", json=HOUSES, params={"include_features": include_features})
+    body = response.json()
+    assert response.status_code == 200
+    BatchPredictionResponse.model_validate(body)
+    assert body["count"] == 2 and body["dedup_ratio"] == 0.0
+    assert [p["predicted_price"] for p in body["predictions"]] == [4.15, 1.0]
+    assert all(p["confidence"] == "high" and p["lower_bound"] < p["upper_bound"] for p in body["predictions"])
+    if include_features:
+        assert [p["features"] for p in body["predictions"]] == [
+            {name: float(house[name]) for name in FEATURE_NAMES} for house in HOUSES
+        ]
+    else:
+        assert all("features" not in p for p in body["predictions"])
+
+
+@pytest.mark.parametrize("include_features", [True, False])
+def test_columnar_response(batch_client, include_features):
+    client, _ = batch_client
+    response = client.post("/predict-batch", json=HOUSES,
+                           params={"format": "columnar", "include_features": include_features})
+    body = response.json()
+    ColumnarBatchPredictionResponse.model_validate(body)
+    assert body["count"] == 2
+    assert body["predicted_price"] == [4.15, 1.0]
+    assert body["confidence"] == ["high", "high"]
+    assert len(body["lower_bound"]) == len(body["upper_bound"]) == 2
+    if include_features:
+        assert body["features"] == {name: [float(house[name]) for house in HOUSES] for name in FEATURE_NAMES}
+    else:
+        assert "features" not in body
+
+
+@pytest.mark.parametrize("format", ["records", "columnar"])
+def test_empty_batch(batch_client, format):
+    client, calls = batch_client
+    body = client.post("/predict-batch", json=[], params={"format": format}).json()
+    assert body["count"] == 0 and body["dedup_ratio"] == 0.0
+    if format == "records":
+        assert body["predictions"] == []
+    else:
+        assert body["predicted_price"] == [] and body["lower_bound"] is None
+        assert body["features"] == {name: [] for name in FEATURE_NAMES}
+    assert calls == []
+
+
+def test_orjson_fallback(batch_client, monkeypatch):
+    content = {"count": 1, "price": 4.52, "label": "élevé", "bounds": None}
+    expected = responses.ORJSONResponse(content).body
+
+    monkeypatch.setattr(responses, "orjson", None)
+    fallback = responses.ORJSONResponse(content).body
+    assert json.loads(fallback) == json.loads(expected) == content
+
+    client, _ = batch_client
+    body = client.post("/predict-batch", json=HOUSES, params={"format": "columnar"}).json()
+    assert body["predicted_price"] == [4.15, 1.0]
@@ -0,0 +1,127 @@
+"""
+Mode cascade : arbres empiles et preprocessing NumPy identiques a sklearn
+et au DataPreprocessor, repartition des lignes entre modele rapide,
+modele complet et audit.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.load_data import get_feature_names
+from src.data.preprocess import DataPreprocessor
+from src.models.cascade import FastModel, _StackedTrees
+
+
+@pytest.fixture(scope="module")
+def boosting():
+    from sklearn.ensemble import GradientBoostingRegressor
+
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(400, 5))
+    y = X[:, 0] ** 2 + np.sin(2 * X[:, 1]) + X[:, 2] * X[:, 3] + 0.1 * rng.normal(size=400)
+    return GradientBoostingRegressor(n_estimators=30, max_depth=4, random_state=0).fit(X, y), X
+
+
+def _stacked(model):
+    base = float(np.ravel(model.init_.predict(np.zeros((1, model.n_features_in_))))[0])
+    return _StackedTrees([e.tree_ for e in model.estimators_[:, 0]], model.learning_rate, base)
+
+
+def test_stacked_trees_match_sklearn(boosting):
+    model, X = boosting
+    stacked = _stacked(model)
+    # Chemin vectorise (lignes x arbres > PYTHON_MAX_WORK) et chemin ligne par ligne
+    assert len(X) * 30 > _StackedTrees.PYTHON_MAX_WORK
+    assert np.allclose(stacked.predict(X), model.predict(X))
+    assert 2 * 30 <= _StackedTrees.PYTHON_MAX_WORK
+    assert np.allclose(stacked.predict(X[:2]), model.predict(X[:2]))
+
+
+def test_stacked_trees_pad_shallow_trees(boosting):
+    from sklearn.tree import DecisionTreeRegressor
+
+    _, X = boosting
+    y = X[:, 0] - X[:, 1]
+    trees = [DecisionTreeRegressor(max_depth=depth, random_state=0).fit(X, y) for depth in (1, 3, 8)]
+    assert len({tree.tree_.node_count for tree in trees}) == 3
+    stacked = _StackedTrees([tree.tree_ for tree in trees], weight=0.5, base=1.0)
+    expected = 1.0 + 0.5 * sum(tree.predict(X) for tree in trees)
+    assert np.allclose(stacked.predict(X), expected)
+    assert np.allclose(stacked.predict(X[:3]), expected[:3])
+
+
+def _housing_frame(n, seed):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        "MedInc": rng.lognormal(1.2, 0.5, n), "HouseAge": rng.uniform(1, 52, n),
+        "AveRooms": rng.lognormal(1.6, 0.4, n), "AveBedrms": rng.lognormal(0.05, 0.2, n),
+        "Population": rng.lognormal(7, 0.8, n), "AveOccup": rng.lognormal(1, 0.4, n),
+        "Latitude": rng.uniform(32.5, 42, n), "Longitude": rng.uniform(-124, -114, n),
+    })
+    frame["MedHouseVal"] = 0.4 * frame["MedInc"] + rng.normal(0, 0.2, n)
+    return frame
+
+
+@pytest.mark.parametrize("legacy", [False, True])
+def test_fast_transform_matches_preprocessor(legacy):
+    preprocessor = DataPreprocessor()
+    preprocessor.fit_transform(_housing_frame(2000, 0))
+    if legacy:
+        # Preprocessor pickle avant les bornes de capping : aucun capping
+        del preprocessor.outlier_handler.bounds_
+
+    fast = FastModel()
+    fast._compile_preprocessor(preprocessor)
+    # Valeurs extremes pour exercer le capping
+    raw = _housing_frame(300, 1)[get_feature_names()]
+    raw.iloc[:10, 2:6] *= 50
+    expected = preprocessor.transform(raw).to_numpy()
+    assert np.allclose(fast.transform(raw.to_numpy()), expected)
+
+
+class _StubFast:
+    threshold = 0.5
+    residual_bounds_ = (-0.2, 0.3)
+
+    def predict(self, X):
+        price = X[:, 0].copy()
+        error = X[:, 1].copy()
+        return price, error, price - 0.1, price + 0.1
+
+
+def test_cascade_splits_escalated_and_audited_rows(monkeypatch):
+    from api import cascade
+
+    calls = []
+
+    def full(X):
+        calls.append(X.copy())
+        price = X[:, 0] + 10.0
+        return {"predicted_price": price, "lower_bound": price - 1.0, "upper_bound": price + 1.0,
+                "confidence": None}
+
+    monkeypatch.setattr(cascade, "get_fast_model", lambda: _StubFast())
+    monkeypatch.setattr(cascade, "predict_matrix", full)
+
+    X = np.zeros((6, 8))
+    X[:, 0] = np.arange(6)
+    X[:, 1] = [0.1, 0.9, 0.2, 0.7, 0.3, 0.4]      # lignes 1 et 3 au-dessus du seuil
+    escalated = np.array([False, True, False, True, False, False])
+
+    monkeypatch.setattr(cascade, "CASCADE_AUDIT_RATE", 0.0)
+    result, info = cascade.predict_matrix_cascade(X)
+    assert np.array_equal(calls[-1], X[escalated])
+    assert result["predicted_price"].tolist() == [0.0, 11.0, 2.0, 13.0, 4.0, 5.0]
+    assert result["lower_bound"].tolist() == pytest.approx([-0.1, 10.0, 1.9, 12.0, 3.9, 4.9])
+    assert (info["fast"], info["full"], info["error"]) == (4, 2, 2)
+    assert len(info["audit_errors"]) == 0
+
+    # Audit de toutes les lignes rapides : reponse inchangee, ecarts mesures
+    monkeypatch.setattr(cascade, "CASCADE_AUDIT_RATE", 1.0)
+    audited, info = cascade.predict_matrix_cascade(X)
+    assert np.array_equal(calls[-1], X)
+    assert audited["predicted_price"].tolist() == result["predicted_price"].tolist()
+    assert info["audit_errors"].tolist() == [10.0] * 4
+    assert (info["fast"], info["full"]) == (4, 2)
+    assert cascade.escalation_ratio(info) == pytest.approx(2 / 6)
@@ -0,0 +1,73 @@
+"""
+Dedoublonnage des lignes d'un batch : predictions identiques et dans
+l'ordre d'origine, ratio de doublons dans la reponse.
+"""
+
+import numpy as np
+import pytest
+
+from api.formats import NUMPY_MEDIA_TYPE
+from api.inference import dedup_ratio, deduplicate_rows, expand_result
+
+HOUSE = [8.3, 41.0, 6.9, 1.0, 322.0, 2.5, 37.88, -122.23]
+
+
+@pytest.fixture(scope="module")
+def model():
+    from sklearn.ensemble import GradientBoostingRegressor
+
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(300, 8))
+    return GradientBoostingRegressor(n_estimators=20, random_state=0).fit(X, X[:, 0] + X[:, 1] ** 2)
+
+
+def _predict(model, X):
+    prices = model.predict(X)
+    return {"predicted_price": prices, "lower_bound": prices - 1, "upper_bound": None,
+            "confidence": np.where(prices > 0, "high", "low")}
+
+
+def test_deduplicated_predictions_match_full_batch(model):
+    rng = np.random.default_rng(1)
+    distinct = rng.normal(size=(20, 8))
+    X = distinct[rng.integers(0, 20, size=200)]
+    X[:3, 0] = [0.0, -0.0, 0.0]      # 0.0 et -0.0 : distincts bit a bit, non fusionnes
+
+    unique, inverse = deduplicate_rows(X)
+    assert len(unique) < len(X) and np.array_equal(unique[inverse], X)
+    expanded = expand_result(_predict(model, unique), inverse)
+    expected = _predict(model, X)
+    for key in ("predicted_price", "lower_bound", "confidence"):
+        assert np.array_equal(expanded[key], expected[key])
+    assert expanded["upper_bound"] is None
+
+
+def test_no_duplicates_keeps_batch():
+    X = np.arange(24.0).reshape(3, 8)
+    unique, inverse = deduplicate_rows(X)
+    assert inverse is None and np.array_equal(unique, X)
+    assert deduplicate_rows(X[:1])[1] is None
+    result = {"predicted_price": np.ones(3), "lower_bound": None}
+    assert expand_result(result, None) is result
+
+    assert dedup_ratio(0, 0) == 0.0
+    assert dedup_ratio(10, 10) == 0.0
+    assert dedup_ratio(10, 4) == pytest.approx(0.6)
+
+
+def test_dedup_ratio_in_responses(batch_client):
+    client, calls = batch_client
+    X = np.tile(HOUSE, (4, 1))
+    X[1, 0] = 5.0
+
+    response = client.post("/predict-batch", content=X.tobytes(), headers={"Content-Type": NUMPY_MEDIA_TYPE})
+    assert response.headers["X-Dedup-Ratio"] == "0.5000"
+    assert len(calls[-1]) == 2
+    prices = np.frombuffer(response.content, dtype="<f8").reshape(4, 3)[:, 0]
+    assert np.array_equal(prices, X[:, 0] / 2)     # prix factice de conftest.py
+
+    houses = [dict(zip(["MedInc", "HouseAge", "AveRooms", "AveBedrms", "Population", "AveOccup",
+                        "Latitude", "Longitude"], row)) for row in X.tolist()]
+    body = client.post("/predict-batch", json=houses).json()
+    assert body["dedup_ratio"] == 0.5
+    assert [p["predicted_price"] for p in body["predictions"]] == prices.tolist()
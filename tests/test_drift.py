@@ -0,0 +1,120 @@
+"""
+Suivi de derive : PSI / KS face a un decalage connu, memes bins quelle que
+soit la taille du batch (y compris NaN et +inf), fermeture des fenetres et
+creation unique du moniteur de l'API.
+"""
+
+import json
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.data.drift import SMALL_BATCH, DriftMonitor, build_baseline
+from src.data.load_data import get_feature_names
+from src.features.engineering import add_engineered_features
+
+
+def _raw(n, rng, shift=0.0):
+    return np.column_stack([
+        rng.lognormal(1.2, 0.4, n) + shift,    # MedInc
+        rng.uniform(1, 52, n),                  # HouseAge
+        rng.uniform(3, 8, n),                   # AveRooms
+        rng.uniform(0.8, 1.3, n),               # AveBedrms
+        rng.uniform(100, 3000, n),              # Population
+        rng.uniform(1.5, 4.5, n),               # AveOccup
+        rng.uniform(32.5, 42, n),               # Latitude
+        rng.uniform(-124, -114, n),             # Longitude
+    ])
+
+
+def _monitor(**kwargs):
+    rng = np.random.default_rng(0)
+    frame = add_engineered_features(pd.DataFrame(_raw(5000, rng), columns=get_feature_names()))
+    return DriftMonitor(build_baseline(frame), **kwargs)
+
+
+def test_psi_and_ks_detect_known_shift():
+    rng = np.random.default_rng(1)
+    monitor = _monitor()
+    monitor.observe(_raw(2000, rng))
+    stable = monitor.report()["current"]["features"]
+    assert stable["MedInc"]["status"] == "stable"
+    assert stable["MedInc"]["ks"] < 0.05
+
+    shifted = _monitor()
+    shifted.observe(_raw(2000, rng, shift=2.0))
+    report = shifted.report()["current"]
+    assert report["features"]["MedInc"]["status"] == "significant"
+    assert report["features"]["MedInc"]["ks"] > 0.3
+    # Les features non decalees restent stables
+    assert report["features"]["HouseAge"]["status"] == "stable"
+    assert report["status"] == "significant"
+
+
+def test_small_and_large_batches_give_same_counts():
+    rng = np.random.default_rng(2)
+    X = _raw(4 * SMALL_BATCH, rng)
+    X[0, 0] = np.nan
+    X[1, 2] = 0.0      # AveRooms = 0 -> BedroomRatio = +inf
+    X[2, 7] = -np.inf
+
+    large = _monitor()
+    large.observe(X)
+    small = _monitor()
+    for start in range(0, len(X), SMALL_BATCH // 2):
+        small.observe(X[start:start + SMALL_BATCH // 2])
+
+    assert np.array_equal(small._window, large._window)
+    # Une entree par feature et par ligne, sans debordement sur la feature suivante
+    for k in range(len(large.features)):
+        assert large._window[large._offsets[k]:large._offsets[k + 1]].sum() == len(X)
+
+
+def test_window_closes_on_report_without_traffic():
+    published = []
+    monitor = _monitor(window_seconds=60.0, on_report=published.append)
+    monitor.observe(_raw(150, np.random.default_rng(3)))
+    assert monitor.report()["last_window"] is None
+
+    # Fenetre expiree, aucune nouvelle entree : report() la ferme
+    monitor._window_start -= 61.0
+    report = monitor.report()
+    assert len(published) == 1
+    assert report["last_window"]["n_rows"] == 150
+    assert report["current"]["n_rows"] == 0
+    assert report["cumulative"]["n_rows"] == 150
+
+    monitor._window_start -= 61.0
+    monitor.observe(_raw(50, np.random.default_rng(4)))
+    assert len(published) == 2
+    assert monitor.report()["cumulative"]["n_rows"] == 200
+
+
+def test_monitor_is_created_once_under_concurrency(tmp_path, monkeypatch):
+    from api import dependencies
+
+    path = tmp_path / "model_metadata.json"
+    path.write_text(json.dumps({"drift_baseline": {"features": {}}}))
+    created = []
+
+    class SlowMonitor:
+        def __init__(self, baseline, *args, **kwargs):
+            time.sleep(0.05)
+            created.append(self)
+
+    monkeypatch.setattr(dependencies, "METADATA_PATH", path)
+    monkeypatch.setattr(dependencies, "DRIFT_ENABLED", True)
+    monkeypatch.setattr(dependencies, "DriftMonitor", SlowMonitor)
+    monkeypatch.setattr(dependencies, "_drift_monitor", None)
+    monkeypatch.setattr(dependencies, "_drift_loaded", False)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(dependencies.get_drift_monitor())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(created) == 1
+    assert all(result is created[0] for result in results)
@@ -0,0 +1,84 @@
+"""
+Executor d'inference : controle d'admission, liberation des places,
+metriques d'utilisation et reponse 503 + Retry-After.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from api.executor import (
+    EXECUTOR_BUSY_SECONDS, EXECUTOR_PENDING, EXECUTOR_REJECTED, EXECUTOR_UTILIZATION,
+    ExecutorSaturated, InferenceExecutor
+)
+
+
+def _fail():
+    raise RuntimeError("modele en panne")
+
+
+def test_pending_bound_is_enforced_and_released():
+    executor = InferenceExecutor(name="test-admission", kind="thread", workers=1, max_pending=2)
+    gate = threading.Event()
+
+    async def scenario():
+        jobs = [asyncio.create_task(executor.run(gate.wait)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        assert executor.pending == 2
+        assert EXECUTOR_PENDING._series[("test-admission",)] == 2
+        with pytest.raises(ExecutorSaturated) as e:
+            await executor.run(time.sleep, 0)
+        assert e.value.retry_after >= 1
+        gate.set()
+        await asyncio.gather(*jobs)
+        assert executor.pending == 0
+
+        # Un travail en erreur libere aussi sa place
+        with pytest.raises(RuntimeError):
+            await executor.run(_fail)
+        assert executor.pending == 0
+        return await executor.run(sum, [1, 2])
+
+    try:
+        assert asyncio.run(scenario()) == 3
+    finally:
+        executor.shutdown()
+    assert EXECUTOR_REJECTED._series[("test-admission",)] == 1
+    assert EXECUTOR_PENDING._series[("test-admission",)] == 0
+
+
+def test_utilization_gauges_move():
+    executor = InferenceExecutor(name="test-utilization", kind="thread", workers=2, max_pending=4)
+
+    async def scenario():
+        results = await asyncio.gather(*[executor.run_timed(time.sleep, 0.02) for _ in range(4)])
+        return [busy for _, busy in results]
+
+    try:
+        busy = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+    assert all(seconds >= 0.02 for seconds in busy)
+    assert EXECUTOR_BUSY_SECONDS._series[("test-utilization",)] == pytest.approx(sum(busy))
+    assert 0 < EXECUTOR_UTILIZATION._series[("test-utilization",)] <= 1
+    assert executor.busy_seconds == pytest.approx(sum(busy))
+
+
+def test_saturated_executor_returns_503(batch_client, monkeypatch):
+    from api import endpoints
+
+    client, calls = batch_client
+    executor = InferenceExecutor(name="test-saturated", kind="thread", workers=1, max_pending=0)
+    monkeypatch.setattr(endpoints, "get_executor", lambda: executor)
+    try:
+        houses = [{"MedInc": 8.3, "HouseAge": 41, "AveRooms": 6.9, "AveBedrms": 1.0, "Population": 322,
+                   "AveOccup": 2.5, "Latitude": 37.88, "Longitude": -122.23}]
+        for path, body in [("/predict", houses[0]), ("/predict-batch", houses)]:
+            response = client.post(path, json=body)
+            assert response.status_code == 503
+            assert response.headers["Retry-After"] == str(ExecutorSaturated().retry_after)
+    finally:
+        executor.shutdown()
+    assert calls == []
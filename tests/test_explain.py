@@ -0,0 +1,105 @@
+"""
+Explications TreeSHAP / Saabas : valeurs de Shapley exactes (contre un
+calcul brute force sur toutes les coalitions) et additivite des deux modes.
+"""
+
+from itertools import combinations
+from math import factorial
+
+import numpy as np
+import pytest
+
+from src.models.explain import TreeExplainer, UnsupportedModelError, _ensemble, _node_values
+
+N_FEATURES = 4
+
+
+def _training_data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(300, N_FEATURES))
+    y = X[:, 0] ** 2 + 2 * X[:, 1] * X[:, 2] + np.sin(X[:, 3]) + 0.1 * rng.normal(size=300)
+    return X, y
+
+
+def _models():
+    from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+
+    X, y = _training_data()
+    return {
+        "gbr": GradientBoostingRegressor(n_estimators=15, max_depth=3, random_state=0).fit(X, y),
+        "gbr_huber": GradientBoostingRegressor(
+            loss="huber", n_estimators=15, max_depth=3, random_state=0
+        ).fit(X, y),
+        "forest": RandomForestRegressor(n_estimators=8, max_depth=4, random_state=0).fit(X, y),
+    }
+
+
+def _conditional_expectation(tree, value, x, subset):
+    """E[f(x) | x_S] path-dependent : hors de S, moyenne des enfants ponderee par la couverture."""
+    def walk(node):
+        left, right = tree.children_left[node], tree.children_right[node]
+        if left < 0:
+            return value[node]
+        f = tree.feature[node]
+        if f in subset:
+            return walk(left if np.float32(x[f]) <= tree.threshold[node] else right)
+        cover = tree.weighted_n_node_samples
+        return (cover[left] * walk(left) + cover[right] * walk(right)) / cover[node]
+    return walk(0)
+
+
+def _brute_force_shap(model, x):
+    trees, weight, _ = _ensemble(model)
+    phi = np.zeros(N_FEATURES)
+    for tree in trees:
+        value = _node_values(tree) * weight
+        for i in range(N_FEATURES):
+            others = [f for f in range(N_FEATURES) if f != i]
+            for size in range(N_FEATURES):
+                scale = factorial(size) * factorial(N_FEATURES - size - 1) / factorial(N_FEATURES)
+                for subset in combinations(others, size):
+                    with_i = _conditional_expectation(tree, value, x, set(subset) | {i})
+                    without_i = _conditional_expectation(tree, value, x, set(subset))
+                    phi[i] += scale * (with_i - without_i)
+    return phi
+
+
+@pytest.fixture(scope="module")
+def models():
+    return _models()
+
+
+@pytest.mark.parametrize("name", ["gbr", "gbr_huber", "forest"])
+def test_exact_matches_brute_force_shapley(models, name):
+    model = models[name]
+    X = np.random.default_rng(1).normal(size=(6, N_FEATURES))
+    phi, _ = TreeExplainer(model).explain(X, mode="exact")
+    for row, contributions in zip(X, phi):
+        assert np.allclose(contributions, _brute_force_shap(model, row), atol=1e-10)
+
+
+@pytest.mark.parametrize("name", ["gbr", "gbr_huber", "forest"])
+@pytest.mark.parametrize("mode", ["exact", "approx"])
+def test_contributions_add_up_to_prediction(models, name, mode):
+    model = models[name]
+    X = np.random.default_rng(2).normal(size=(50, N_FEATURES))
+    phi, expected_value = TreeExplainer(model).explain(X, mode=mode)
+    assert phi.shape == (50, N_FEATURES)
+    assert np.allclose(expected_value + phi.sum(axis=1), model.predict(X), atol=1e-8)
+
+
+def test_exact_cache_returns_same_contributions(models):
+    explainer = TreeExplainer(models["gbr"], cache_size=4)
+    X = np.random.default_rng(3).normal(size=(10, N_FEATURES))
+    first, _ = explainer.explain(X, mode="exact")
+    second, _ = explainer.explain(X[::-1], mode="exact")
+    assert np.array_equal(first[::-1], second)
+    assert len(explainer._cache) == 4
+
+
+def test_unsupported_model():
+    from sklearn.linear_model import LinearRegression
+
+    X, y = _training_data()
+    with pytest.raises(UnsupportedModelError):
+        TreeExplainer(LinearRegression().fit(X, y))
@@ -0,0 +1,132 @@
+"""
+Noyau fusionne des features construites : egalite avec la version pandas.
+
+Chaque backend disponible (numpy toujours, numba / numexpr si installes)
+doit donner les memes valeurs que add_engineered_features_pandas(), y
+compris pour les divisions par zero, NaN et inf (regle IEEE).
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.features import kernel
+
+from src.data.load_data import get_feature_names
+from src.features.engineering import (
+    add_engineered_features, add_engineered_features_pandas, get_engineered_feature_names
+)
+from src.features.kernel import BACKENDS, BLOCK_ROWS, available_backends, compute_engineered_features
+
+BACKEND_PARAMS = [
+    pytest.param(name, marks=pytest.mark.skipif(name not in available_backends(), reason=f"{name} non installe"))
+    for name in BACKENDS
+]
+
+
+def _raw_matrix(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, 8)) * [3, 20, 2, 0.3, 1000, 1, 3, 3] + [4, 30, 5, 1, 1500, 3, 36, -119]
+    # Cas limites : divisions par zero, 0 / 0, NaN et inf en entree
+    X[0, 2] = 0.0
+    X[1, [2, 3]] = 0.0
+    X[2, 5] = 0.0
+    X[3, 5] = -0.0
+    X[4] = np.nan
+    X[5, 6] = np.inf
+    X[6, 2] = np.inf
+    return X
+
+
+def _pandas_reference(X):
+    frame = add_engineered_features_pandas(pd.DataFrame(X, columns=get_feature_names()))
+    return frame[get_engineered_feature_names()].to_numpy()
+
+
+@pytest.mark.parametrize("backend", BACKEND_PARAMS)
+@pytest.mark.parametrize("n_rows", [7, 1000, 3 * BLOCK_ROWS + 5])
+def test_kernel_matches_pandas(backend, n_rows):
+    X = _raw_matrix(n_rows)
+    expected = _pandas_reference(X)
+    result = compute_engineered_features(X, backend=backend)
+    if backend == "numpy":
+        assert np.array_equal(result, expected, equal_nan=True)
+    else:
+        np.testing.assert_allclose(result, expected, rtol=1e-15, atol=0)
+
+
+def test_division_rule():
+    X = _raw_matrix(7)
+    result = compute_engineered_features(X, backend="numpy")
+    assert result[0, 0] == np.inf          # x / 0
+    assert np.isnan(result[1, 0])          # 0 / 0
+    assert result[3, 1] == -np.inf         # x / -0
+    assert np.isnan(result[4]).all()       # NaN se propage
+    assert result[5, 4] == np.inf
+    assert result[6, 0] == 0.0             # x / inf
+
+
+def test_output_buffer_and_layout():
+    X = _raw_matrix(50)
+    out = np.full((50, 5), -1.0)
+    assert compute_engineered_features(np.asfortranarray(X), out=out, backend="numpy") is out
+    assert np.array_equal(out, _pandas_reference(X), equal_nan=True)
+    assert compute_engineered_features(np.empty((0, 8))).shape == (0, 5)
+    with pytest.raises(ValueError):
+        compute_engineered_features(X[:, :7])
+    with pytest.raises(ValueError):
+        compute_engineered_features(X, out=np.empty((50, 4)))
+    with pytest.raises(ValueError):
+        compute_engineered_features(X, backend="fortran")
+
+
+@pytest.mark.parametrize("inplace", [False, True])
+def test_add_engineered_features_matches_pandas(inplace):
+    frame = pd.DataFrame(_raw_matrix(200), columns=get_feature_names())
+    frame["MedHouseVal"] = 1.5
+    expected = add_engineered_features_pandas(frame)
+    result = add_engineered_features(frame.copy(), inplace=inplace)
+    pd.testing.assert_frame_equal(result, expected)
+    # Recalcul sur un DataFrame qui contient deja les colonnes construites
+    pd.testing.assert_frame_equal(add_engineered_features(expected), expected)
+
+
+@pytest.mark.parametrize("backend", BACKEND_PARAMS)
+def test_kernel_is_thread_safe(backend):
+    # Appels concurrents comme depuis l'executor d'inference (threads)
+    matrices = [_raw_matrix(n, seed=n) for n in (7, 50, 500, 2000)] * 8
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda X: compute_engineered_features(X, backend=backend), matrices))
+    for X, result in zip(matrices, results):
+        np.testing.assert_allclose(result, _pandas_reference(X), rtol=1e-15, atol=0)
+
+
+@pytest.mark.parametrize("backend", ["auto", "numba"])
+def test_compile_error_falls_back_to_numpy(monkeypatch, backend):
+    def broken():
+        raise RuntimeError("cannot cache function: no locator available")
+
+    monkeypatch.setattr(kernel, "_kernels", {"numexpr": None})
+    monkeypatch.setitem(kernel._FACTORIES, "numba", broken)
+    name, fallback = kernel.get_kernel(backend)
+    assert name == "numpy" and fallback is kernel._numpy_kernel
+    assert "numba" not in available_backends()
+    X = _raw_matrix(7)
+    assert np.array_equal(compute_engineered_features(X, backend=backend), _pandas_reference(X), equal_nan=True)
+
+
+def test_numba_without_writable_cache(monkeypatch):
+    numba = pytest.importorskip("numba")
+    njit = numba.njit
+
+    def read_only_njit(*args, cache=False, **kwargs):
+        if cache:
+            raise RuntimeError("cannot cache function: no locator available")
+        return njit(*args, **kwargs)
+
+    monkeypatch.setattr(numba, "njit", read_only_njit)
+    compiled = kernel._make_numba_kernel()
+    X = _raw_matrix(7)
+    np.testing.assert_allclose(compiled(X, np.empty((7, 5))), _pandas_reference(X), rtol=1e-15, atol=0)
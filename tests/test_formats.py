@@ -0,0 +1,141 @@
+"""
+Formats binaires de /predict-batch : matrice float64 brute, Arrow IPC,
+validation par colonne et reponse dans le format de la requete.
+"""
+
+import numpy as np
+import pytest
+
+from api.formats import (
+    ARROW_MEDIA_TYPE, FEATURE_NAMES, NUMPY_MEDIA_TYPE, PayloadError, decode_arrow, decode_numpy,
+    validate_matrix
+)
+
+HOUSE = [8.3, 41.0, 6.9, 1.0, 322.0, 2.5, 37.88, -122.23]
+
+
+def _matrix(n=4):
+    X = np.tile(HOUSE, (n, 1))
+    X[:, 0] = np.arange(1, n + 1)
+    return X
+
+
+def test_decode_numpy():
+    X = _matrix()
+    assert np.array_equal(decode_numpy(X.tobytes()), X)
+
+    # Colonnes declarees dans un autre ordre : remises dans l'ordre FEATURE_NAMES
+    order = FEATURE_NAMES[::-1]
+    assert np.array_equal(decode_numpy(X[:, ::-1].tobytes(), ",".join(order)), X)
+
+    with pytest.raises(PayloadError) as e:
+        decode_numpy(X.tobytes()[:-8])
+    assert e.value.status_code == 400
+    for columns in [",".join(FEATURE_NAMES[:-1]), ",".join(FEATURE_NAMES + ["Extra"]),
+                    ",".join(FEATURE_NAMES[:-1] + ["MedInc"])]:
+        with pytest.raises(PayloadError) as e:
+            decode_numpy(X.tobytes(), columns)
+        assert e.value.status_code == 400
+
+
+def _arrow(columns, names=None):
+    pa = pytest.importorskip("pyarrow")
+    table = pa.Table.from_arrays(list(columns.values()), names=names or list(columns))
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _arrow_columns(X):
+    pa = pytest.importorskip("pyarrow")
+    return {name: pa.array(X[:, i]) for i, name in enumerate(FEATURE_NAMES)}
+
+
+def test_decode_arrow():
+    pa = pytest.importorskip("pyarrow")
+    X = _matrix()
+    columns = _arrow_columns(X)
+    columns["HouseAge"] = pa.array(X[:, 1].astype(np.int32))
+    columns["ignored"] = pa.array(["a"] * len(X))
+    assert np.array_equal(decode_arrow(_arrow(dict(reversed(columns.items())))), X)
+
+
+@pytest.mark.parametrize("case, status", [
+    ("missing", 400), ("duplicated", 400), ("null", 422), ("string", 422), ("timestamp", 422), ("bool", 422),
+    ("garbage", 400)
+])
+def test_decode_arrow_rejects_bad_columns(case, status):
+    pa = pytest.importorskip("pyarrow")
+    X = _matrix()
+    columns = _arrow_columns(X)
+    names = None
+    if case == "missing":
+        del columns["Latitude"]
+    elif case == "duplicated":
+        columns["extra"] = pa.array(X[:, 0])
+        names = FEATURE_NAMES + ["MedInc"]
+    elif case == "null":
+        columns["MedInc"] = pa.array([1.0, None, 3.0, 4.0])
+    elif case == "string":
+        columns["MedInc"] = pa.array(["1", "2", "3", "4"])
+    elif case == "timestamp":
+        columns["HouseAge"] = pa.array(np.arange(4).astype("datetime64[s]"))
+    elif case == "bool":
+        columns["AveBedrms"] = pa.array([True, False, True, True])
+    body = b"pas un stream arrow" if case == "garbage" else _arrow(columns, names)
+    with pytest.raises(PayloadError) as e:
+        decode_arrow(body)
+    assert e.value.status_code == status
+
+
+def test_validate_matrix_counts_invalid_values():
+    X = _matrix()
+    validate_matrix(X)
+    X[0, 0] = -1.0            # MedInc < 0
+    X[1, 6] = np.nan
+    X[2, 7] = np.inf
+    with pytest.raises(PayloadError) as e:
+        validate_matrix(X)
+    assert e.value.status_code == 422
+    assert e.value.detail["invalid_values"] == 3
+    assert [error["loc"] for error in e.value.detail["errors"]] == [
+        ["body", 0, "MedInc"], ["body", 1, "Latitude"], ["body", 2, "Longitude"]
+    ]
+    assert [error["input"] for error in e.value.detail["errors"]] == [-1.0, "nan", "inf"]
+
+
+def test_numpy_round_trip(batch_client):
+    client, calls = batch_client
+    X = _matrix(5)
+    response = client.post("/predict-batch", content=X.tobytes(), headers={"Content-Type": NUMPY_MEDIA_TYPE})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == NUMPY_MEDIA_TYPE
+    assert response.headers["X-Columns"] == "predicted_price,lower_bound,upper_bound"
+    assert response.headers["X-Rows"] == "5"
+    result = np.frombuffer(response.content, dtype="<f8").reshape(5, 3)
+    assert np.allclose(result[:, 0], X[:, 0] / 2)
+
+    bad = X.copy()
+    bad[0, 6] = 99.0
+    response = client.post("/predict-batch", content=bad.tobytes(), headers={"Content-Type": NUMPY_MEDIA_TYPE})
+    assert response.status_code == 422 and response.json()["detail"]["invalid_values"] == 1
+
+
+def test_arrow_round_trip(batch_client):
+    pa = pytest.importorskip("pyarrow")
+    client, _ = batch_client
+    X = _matrix(5)
+    response = client.post("/predict-batch", content=_arrow(_arrow_columns(X)),
+                           headers={"Content-Type": ARROW_MEDIA_TYPE})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == ARROW_MEDIA_TYPE
+    table = pa.ipc.open_stream(response.content).read_all()
+    assert table.column_names == ["predicted_price", "lower_bound", "upper_bound", "confidence"]
+    assert np.allclose(table.column("predicted_price").to_numpy(), X[:, 0] / 2)
+
+    # Colonne non numerique : erreur du client, pas 500
+    columns = _arrow_columns(X)
+    columns["MedInc"] = pa.array(["1"] * 5)
+    response = client.post("/predict-batch", content=_arrow(columns), headers={"Content-Type": ARROW_MEDIA_TYPE})
+    assert response.status_code == 422
@@ -0,0 +1,101 @@
+"""
+Cache HTTP : validateurs, requetes conditionnelles et metadonnees en memoire.
+"""
+
+import json
+import os
+
+import pytest
+
+from api import dependencies
+from api.http_cache import http_date, is_not_modified, make_etag
+
+
+def test_conditional_headers():
+    etag = make_etag("model-info", "abc")
+    assert etag.startswith('"') and make_etag("model-info", "abc") == etag
+    assert make_etag("model-info", "abd") != etag
+    assert is_not_modified({"if-none-match": etag}, etag)
+    assert is_not_modified({"if-none-match": f'"other", W/{etag}'}, etag)
+    assert is_not_modified({"if-none-match": "*"}, etag)
+    assert not is_not_modified({"if-none-match": '"other"'}, etag)
+    assert is_not_modified({"if-none-match": etag}, make_etag("model-info", "abc", weak=True)[2:])
+
+    # If-Modified-Since : a la seconde pres, ignore si If-None-Match est present
+    assert is_not_modified({"if-modified-since": http_date(1000)}, etag, last_modified=1000.7)
+    assert not is_not_modified({"if-modified-since": http_date(999)}, etag, last_modified=1000.0)
+    assert not is_not_modified({"if-modified-since": "pas une date"}, etag, last_modified=1000.0)
+    assert not is_not_modified({"if-none-match": '"other"', "if-modified-since": http_date(2000)}, etag, 1000.0)
+
+
+@pytest.fixture
+def metadata_file(tmp_path, monkeypatch):
+    path = tmp_path / "model_metadata.json"
+    metadata = {
+        "model_name": "GB", "model_type": "GradientBoostingRegressor", "training_date": "2024-05-01T10:00:00",
+        "metrics": {"test_r2": 0.8}, "n_features": 13, "features": ["MedInc"]
+    }
+    path.write_text(json.dumps(metadata))
+    monkeypatch.setattr(dependencies, "METADATA_PATH", path)
+    monkeypatch.setattr(dependencies, "_metadata_cache", None)
+    return path
+
+
+def test_metadata_is_parsed_once_until_file_changes(metadata_file, monkeypatch):
+    loads = []
+    real_load = json.load
+    monkeypatch.setattr(json, "load", lambda f: loads.append(1) or real_load(f))
+
+    first = dependencies.get_model_metadata()
+    assert dependencies.get_model_metadata() is first and len(loads) == 1
+
+    metadata_file.write_text(metadata_file.read_text().replace("0.8", "0.85"))
+    os.utime(metadata_file, ns=(0, metadata_file.stat().st_mtime_ns + 1_000_000))
+    refreshed = dependencies.get_model_metadata()
+    assert refreshed[0]["metrics"]["test_r2"] == 0.85 and refreshed[1] != first[1] and len(loads) == 2
+
+    # Un autre modele charge change la signature (et donc l'ETag de /model-info)
+    monkeypatch.setattr(dependencies, "_model_version", "other-version")
+    assert dependencies.get_model_metadata()[1] != refreshed[1]
+
+
+def test_model_info_not_modified(metadata_file):
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    from api.main import app
+
+    client = TestClient(app)
+    response = client.get("/model-info")
+    assert response.status_code == 200 and response.json()["version"] == "2024-05-01"
+    assert response.headers["cache-control"].startswith("public, max-age=")
+    assert client.get("/model-info", headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+    since = client.get("/model-info", headers={"If-Modified-Since": response.headers["last-modified"]})
+    assert since.status_code == 304 and since.content == b"" and since.headers["etag"] == response.headers["etag"]
+
+    metadata_file.unlink()
+    assert client.get("/model-info").status_code == 404
+
+
+def test_prediction_version_covers_heads_and_regions(monkeypatch):
+    monkeypatch.setattr(dependencies, "load_model_and_preprocessor", lambda: None)
+    monkeypatch.setattr(dependencies, "_model_version", "model")
+    monkeypatch.setattr(dependencies, "_model_modified_at", 100.0)
+    monkeypatch.setattr(dependencies, "_interval_version", None)
+    monkeypatch.setattr(dependencies, "_interval_modified_at", None)
+    monkeypatch.setattr(dependencies, "get_region_pool", lambda: None)
+    base = dependencies.get_prediction_version()
+    assert dependencies.get_prediction_modified_at() == 100.0
+
+    monkeypatch.setattr(dependencies, "_interval_version", "heads")
+    monkeypatch.setattr(dependencies, "_interval_modified_at", 200.0)
+    with_heads = dependencies.get_prediction_version()
+    assert with_heads != base and dependencies.get_prediction_modified_at() == 200.0
+
+    monkeypatch.setattr(dependencies, "get_region_pool", lambda: object())
+    monkeypatch.setattr(dependencies, "_region_pool_version", "v1:abc")
+    monkeypatch.setattr(dependencies, "_region_pool_modified_at", 300.0)
+    with_regions = dependencies.get_prediction_version()
+    assert with_regions != with_heads and dependencies.get_prediction_modified_at() == 300.0
+    monkeypatch.setattr(dependencies, "_region_pool_version", "v2:def")
+    assert dependencies.get_prediction_version() != with_regions
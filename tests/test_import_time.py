@@ -0,0 +1,56 @@
+"""
+Budget de demarrage : temps d'import mesure avec python -X importtime.
+
+Importer l'API ne doit charger ni pandas, ni sklearn, ni scipy, ni
+joblib : ils ne sont importes qu'au chargement du modele. Chaque import
+est mesure dans un interpreteur neuf (demarrage a froid).
+
+Le budget total est ajustable avec IMPORT_BUDGET_SECONDS (machines de CI lentes).
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+HEAVY_PACKAGES = {"pandas", "sklearn", "scipy", "joblib", "pyarrow"}
+IMPORT_BUDGET_SECONDS = float(os.getenv("IMPORT_BUDGET_SECONDS", "1.5"))
+
+
+def import_times(module: str) -> dict:
+    """
+    Importe module dans un nouvel interpreteur et parse la sortie de -X importtime.
+
+    Returns:
+        dict: nom du module -> (temps propre, temps cumule) en secondes
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BASE_DIR, capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(self_us) / 1e6, int(cumulative_us) / 1e6)
+    return times
+
+
+@pytest.mark.parametrize("module", ["api.main", "src.data.load_data", "src.features.engineering"])
+def test_import_does_not_load_heavy_packages(module):
+    loaded = {name.split(".")[0] for name in import_times(module)} & HEAVY_PACKAGES
+    assert not loaded, f"import {module} charge {sorted(loaded)}"
+
+
+def test_api_import_within_budget():
+    times = import_times("api.main")
+    total = sum(self_time for self_time, _ in times.values())
+    assert total < IMPORT_BUDGET_SECONDS, (
+        f"import api.main : {total:.2f}s > budget {IMPORT_BUDGET_SECONDS}s ; "
+        f"plus lents : {sorted(times, key=lambda m: times[m][1], reverse=True)[:5]}"
+    )
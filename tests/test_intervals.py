@@ -0,0 +1,109 @@
+"""
+Intervalles de prediction (dispersion des forets, tetes quantiles), niveau
+de confiance et bornes de capping memorisees par OutlierHandler.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.preprocess import OutlierHandler
+from src.models.intervals import (
+    QuantileHeads, confidence_from_interval, forest_tree_predictions, predict_with_intervals,
+    prediction_confidence
+)
+
+
+def _training_data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(400, 3))
+    y = 2 + X[:, 0] + 0.5 * X[:, 1] ** 2 + 0.3 * rng.normal(size=400)
+    return X, y
+
+
+def test_forest_intervals_from_tree_dispersion():
+    from sklearn.ensemble import RandomForestRegressor
+
+    X, y = _training_data()
+    model = RandomForestRegressor(n_estimators=20, max_depth=6, random_state=0).fit(X, y)
+    per_tree = np.column_stack([tree.predict(X[:50]) for tree in model.estimators_])
+    assert np.allclose(forest_tree_predictions(model, X[:50]), per_tree)
+
+    prediction, lower, upper = predict_with_intervals(model, X[:50], coverage=0.8)
+    assert np.allclose(prediction, model.predict(X[:50]))
+    expected_lower, expected_upper = np.quantile(per_tree, [0.1, 0.9], axis=1)
+    assert np.allclose(lower, np.minimum(expected_lower, prediction))
+    assert np.allclose(upper, np.maximum(expected_upper, prediction))
+
+
+def test_boosting_intervals_from_quantile_heads():
+    from sklearn.ensemble import GradientBoostingRegressor
+
+    X, y = _training_data()
+    model = GradientBoostingRegressor(n_estimators=30, random_state=0).fit(X, y)
+    heads = QuantileHeads(n_estimators=20).fit(X, y)
+
+    prediction, lower, upper = predict_with_intervals(model, X[:50], heads)
+    assert np.allclose(prediction, model.predict(X[:50]))
+    assert np.all(lower <= prediction) and np.all(prediction <= upper)
+    covered = np.mean((y >= heads.predict(X)[0]) & (y <= heads.predict(X)[1]))
+    assert covered > 0.75
+
+    # Sans tetes : pas de bornes, confiance par paliers de prix
+    prediction, lower, upper = predict_with_intervals(model, X[:50])
+    assert lower is None and upper is None
+    assert prediction_confidence(prediction, lower, upper).shape == (50,)
+
+
+def test_confidence_levels():
+    prediction = np.array([1.0, 1.0, 1.0, 2.0])
+    lower = np.array([0.9, 0.8, 0.5, 1.9])
+    upper = np.array([1.1, 1.2, 1.5, 2.1])
+    assert confidence_from_interval(prediction, lower, upper).tolist() == ['high', 'medium', 'low', 'high']
+    assert prediction_confidence(prediction, lower, upper).tolist() == ['high', 'medium', 'low', 'high']
+    # Paliers historiques de l'API
+    assert prediction_confidence(np.array([1.0, 2.0, 4.5]), None, None).tolist() == ['high', 'medium', 'low']
+
+
+def test_outlier_bounds_are_batch_independent():
+    rng = np.random.default_rng(1)
+    train = pd.DataFrame({"AveRooms": rng.lognormal(1.5, 0.5, 1000), "MedInc": rng.normal(size=1000)})
+    handler = OutlierHandler().fit(train, columns=["AveRooms", "Missing"])
+    assert list(handler.bounds_) == ["AveRooms"]
+    assert handler.bounds_["AveRooms"] == (train["AveRooms"].quantile(0.01), train["AveRooms"].quantile(0.99))
+
+    batch = pd.DataFrame({"AveRooms": [0.0, 5.0, 1e6], "MedInc": [1e6, 0.0, -1e6]})
+    capped = handler.apply_bounds(batch)
+    low, high = handler.bounds_["AveRooms"]
+    assert capped["AveRooms"].tolist() == [low, 5.0, high]
+    assert capped["MedInc"].equals(batch["MedInc"])
+    assert batch["AveRooms"].tolist() == [0.0, 5.0, 1e6]
+
+    rows = pd.concat([handler.apply_bounds(batch.iloc[[i]]) for i in range(len(batch))])
+    assert rows.equals(capped)
+
+
+def test_legacy_outlier_handler_is_identity():
+    handler = OutlierHandler()
+    # Pickle anterieur a fit() : l'attribut n'existe pas du tout
+    del handler.bounds_
+    batch = pd.DataFrame({"AveRooms": [0.0, 1e6]})
+    assert handler.apply_bounds(batch) is batch
+
+
+@pytest.mark.parametrize("with_heads", [False, True])
+def test_predict_frame_always_reports_confidence(with_heads):
+    from sklearn.ensemble import GradientBoostingRegressor
+
+    from api.inference import predict_frame
+
+    class Identity:
+        def transform(self, frame):
+            return frame.to_numpy()
+
+    X, y = _training_data()
+    model = GradientBoostingRegressor(n_estimators=30, random_state=0).fit(X, y)
+    heads = QuantileHeads(n_estimators=20).fit(X, y) if with_heads else None
+    result = predict_frame(pd.DataFrame(X[:10]), model, Identity(), heads)
+    assert result["confidence"].tolist() and set(result["confidence"]) <= {"high", "medium", "low"}
+    assert (result["lower_bound"] is not None) == with_heads
@@ -0,0 +1,95 @@
+"""
+Registre de metriques : texte d'exposition Prometheus de /metrics et
+timers d'etapes de src.utils.timing.
+"""
+
+import re
+
+import pytest
+
+from api import metrics
+from src.utils import timing
+
+# Ligne d'echantillon : nom{label="valeur",...} valeur
+SAMPLE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{([a-zA-Z_]\w*="([^"\\\n]|\\["\\n])*",?)*\})? \S+$')
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setattr(metrics, "REGISTRY", [])
+    return metrics.REGISTRY
+
+
+def _samples(text):
+    assert text.endswith("\n")
+    lines = text.splitlines()
+    for line in lines:
+        assert line.startswith(("# HELP ", "# TYPE ")) or SAMPLE.match(line), line
+    return dict(line.rsplit(" ", 1) for line in lines if not line.startswith("#"))
+
+
+def test_histogram_exposition(registry):
+    histogram = metrics.Histogram("test_latency_seconds", "Latence", labelnames=("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, "/predict")
+
+    samples = _samples(metrics.render_metrics())
+    assert samples['test_latency_seconds_bucket{route="/predict",le="0.1"}'] == "2"
+    assert samples['test_latency_seconds_bucket{route="/predict",le="1.0"}'] == "3"
+    assert samples['test_latency_seconds_bucket{route="/predict",le="+Inf"}'] == "4"
+    assert samples['test_latency_seconds_count{route="/predict"}'] == "4"
+    assert float(samples['test_latency_seconds_sum{route="/predict"}']) == pytest.approx(3.65)
+
+
+def test_counter_gauge_and_label_escaping(registry):
+    counter = metrics.Counter("test_events_total", "Evenements", labelnames=("name",))
+    gauge = metrics.Gauge("test_level", "Niveau")
+    counter.inc('a"b\\c\nd', amount=2)
+    gauge.set(float("inf"))
+
+    text = metrics.render_metrics()
+    assert "# TYPE test_events_total counter" in text and "# TYPE test_level gauge" in text
+    samples = _samples(text)
+    assert samples['test_events_total{name="a\\"b\\\\c\\nd"}'] == "2.0"
+    assert samples["test_level"] == "+Inf"
+
+
+def test_metrics_endpoint(monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    monkeypatch.setattr(timing, "_sink", None)
+    app = FastAPI()
+    metrics.setup_metrics(app)
+
+    @app.get("/ping")
+    def ping():
+        with timing.stage("test-stage"):
+            return {}
+
+    client = TestClient(app)
+    client.get("/ping")
+    response = client.get("/metrics")
+    assert response.headers["content-type"] == metrics.CONTENT_TYPE
+    samples = _samples(response.text)
+    assert int(samples['http_request_duration_seconds_count{method="GET",route="/ping",status="200"}']) >= 1
+    assert int(samples['prediction_stage_duration_seconds_count{stage="test-stage"}']) >= 1
+
+
+def test_stage_records_into_sink(monkeypatch):
+    recorded = []
+    monkeypatch.setattr(timing, "_sink", None)
+    assert timing.stage("noop") is timing._NOOP
+    with timing.stage("noop"):
+        pass
+
+    timing.set_stage_sink(lambda name, seconds: recorded.append((name, seconds)))
+    with pytest.raises(ValueError):
+        with timing.stage("scaling"):
+            raise ValueError()
+    assert [name for name, _ in recorded] == ["scaling"] and recorded[0][1] >= 0
+
+    timing.set_stage_sink(None)
+    with timing.stage("scaling"):
+        pass
+    assert len(recorded) == 1
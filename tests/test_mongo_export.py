@@ -0,0 +1,113 @@
+"""
+Export MongoDB -> Parquet partitionne : plages, conversion et debit.
+
+Le decoupage et la conversion sont testes sur mongomock ; le debit selon
+le nombre de partitions demande un mongod local (MONGODB_TEST_URL,
+defaut mongodb://localhost:27017), sinon le test est ignore.
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from src.database.export import (
+    DEFAULT_FIELDS, _export_partition_in_process, export_collection, plan_partitions, read_parquet_export
+)
+
+MONGODB_TEST_URL = os.getenv("MONGODB_TEST_URL", "mongodb://localhost:27017")
+
+
+def _documents(n, seed=0):
+    rng = np.random.default_rng(seed)
+    values = rng.normal(size=(n, len(DEFAULT_FIELDS)))
+    docs = [dict(zip(DEFAULT_FIELDS, row)) for row in values.tolist()]
+    for doc in docs:
+        doc["price_category"] = "low"   # champ non exporte
+    return docs
+
+
+@pytest.fixture
+def mock_collection():
+    mongomock = pytest.importorskip("mongomock")
+    collection = mongomock.MongoClient().db.properties
+    collection.insert_many(_documents(2000))
+    return collection
+
+
+def test_partitions_are_disjoint_and_cover_collection(mock_collection):
+    ranges = plan_partitions(mock_collection, 4)
+    assert len(ranges) == 4
+    counts = [mock_collection.count_documents(r) for r in ranges]
+    assert sum(counts) == 2000 and min(counts) > 0
+    filtered = plan_partitions(mock_collection, 3, query={"MedInc": {"$gt": 0}})
+    assert sum(mock_collection.count_documents(r) for r in filtered) == \
+        mock_collection.count_documents({"MedInc": {"$gt": 0}})
+    assert plan_partitions(mock_collection, 1) == [{}]
+
+
+def test_export_roundtrip(mock_collection, tmp_path):
+    mock_collection.insert_one({"MedInc": 1.0, "HouseAge": None})    # champs absents / null -> NaN
+    summary = export_collection(mock_collection, tmp_path, partitions=3)
+    assert summary["rows"] == summary["expected_rows"] == 2001
+    assert len(list(tmp_path.glob("part-*.parquet"))) == 3
+
+    frame = read_parquet_export(tmp_path)
+    assert list(frame.columns) == DEFAULT_FIELDS
+    expected = np.array([[doc.get(f) for f in DEFAULT_FIELDS] for doc in mock_collection.find()], dtype=float)
+    key = lambda m: m[np.lexsort(np.nan_to_num(m, nan=-1e9).T)]
+    assert np.array_equal(key(frame.to_numpy()), key(expected), equal_nan=True)
+
+    # Un nouvel export remplace les anciennes partitions
+    export_collection(mock_collection, tmp_path, partitions=1)
+    assert len(list(tmp_path.glob("part-*.parquet"))) == 1
+
+
+def test_process_partition_reads_source_database(monkeypatch, tmp_path):
+    mongomock = pytest.importorskip("mongomock")
+    client = mongomock.MongoClient()
+    client.other_db.properties.insert_many(_documents(50))
+    client.real_estate.properties.insert_many(_documents(10, seed=1))
+
+    class Connection:
+        db_name = "real_estate"
+
+        def get_collection(self, name):
+            return client[self.db_name][name]
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr("src.database.mongodb.MongoDBConnection", Connection)
+    result = _export_partition_in_process("other_db", "properties", {}, DEFAULT_FIELDS,
+                                          str(tmp_path / "part-00000.parquet"), 1000, 100)
+    assert result["rows"] == 50
+
+
+@pytest.fixture(scope="module")
+def mongod_collection():
+    pymongo = pytest.importorskip("pymongo")
+    client = pymongo.MongoClient(MONGODB_TEST_URL, serverSelectionTimeoutMS=500)
+    try:
+        client.admin.command("ping")
+    except pymongo.errors.PyMongoError:
+        pytest.skip(f"Pas de mongod sur {MONGODB_TEST_URL}")
+    collection = client["export_test"]["properties"]
+    collection.drop()
+    for start in range(0, 200_000, 20_000):
+        collection.insert_many(_documents(20_000, seed=start))
+    yield collection
+    client.drop_database("export_test")
+    client.close()
+
+
+def test_throughput_by_partitions(mongod_collection, tmp_path, record_property):
+    # Mesure seulement : le gain depend de la machine et du serveur, il est rapporte
+    # (junitxml / -rA) sans seuil impose
+    single = export_collection(mongod_collection, tmp_path / "p1", partitions=1)
+    parallel = export_collection(mongod_collection, tmp_path / "p4", partitions=4)
+    assert single["rows"] == parallel["rows"] == 200_000
+    record_property("docs_per_second_1_partition", round(single["docs_per_second"]))
+    record_property("docs_per_second_4_partitions", round(parallel["docs_per_second"]))
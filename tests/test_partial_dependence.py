@@ -0,0 +1,87 @@
+"""
+Grilles what-if : construction des matrices et chemin rapide des arbres
+(une prediction par cellule de seuils, identique a la prediction brute).
+"""
+
+import numpy as np
+import pytest
+
+from src.models.explain import UnsupportedModelError
+from src.models.partial_dependence import (
+    ThresholdCells, compress_rows, grid_matrix, population_grid_matrix, summarize_population
+)
+
+
+def test_grid_matrices_follow_ij_order():
+    base = np.arange(8, dtype=float)
+    X = grid_matrix(base, [1, 6], [np.array([10.0, 20.0]), np.array([33.0, 34.0, 35.0])])
+    assert X.shape == (6, 8)
+    assert X[:, 1].tolist() == [10, 10, 10, 20, 20, 20]
+    assert X[:, 6].tolist() == [33, 34, 35, 33, 34, 35]
+    assert np.array_equal(X[:, [0, 2, 3, 4, 5, 7]], np.tile(base[[0, 2, 3, 4, 5, 7]], (6, 1)))
+
+    population = np.arange(16, dtype=float).reshape(2, 8)
+    X = population_grid_matrix(population, [0], [np.array([1.0, 2.0, 3.0])])
+    assert X[:, 0].tolist() == [1, 1, 2, 2, 3, 3]
+    assert X[:, 1].tolist() == [1, 9] * 3
+    average, (p10, p90) = summarize_population(X[:, 1], 3)
+    assert average.tolist() == [5.0] * 3 and np.all(p10 <= p90)
+
+
+@pytest.mark.parametrize("kind", ["boosting", "forest"])
+def test_cells_prediction_matches_brute_force(kind):
+    from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+
+    from src.models.intervals import QuantileHeads
+
+    rng = np.random.default_rng(0)
+    X_train = rng.normal(size=(500, 4))
+    y = X_train[:, 0] ** 2 + np.sin(3 * X_train[:, 1]) + 0.1 * rng.normal(size=500)
+    if kind == "boosting":
+        model = GradientBoostingRegressor(n_estimators=30, max_depth=3, random_state=0).fit(X_train, y)
+        heads = QuantileHeads(n_estimators=10).fit(X_train, y)
+        models = [model, heads.lower_model, heads.upper_model]
+    else:
+        model = RandomForestRegressor(n_estimators=10, max_depth=5, random_state=0).fit(X_train, y)
+        models = [model]
+
+    # Grille fine sur deux features, y compris des valeurs exactement sur un seuil
+    cells = ThresholdCells(models)
+    mesh = np.meshgrid(np.linspace(-3, 3, 60), np.append(np.linspace(-3, 3, 59), cells.thresholds[1][0]))
+    X = np.tile(X_train[0], (mesh[0].size, 1))
+    X[:, 0], X[:, 1] = mesh[0].ravel(), mesh[1].ravel()
+
+    first, inverse = cells.compress(X)
+    assert len(first) < len(X) // 2
+    for m in models:
+        assert np.array_equal(m.predict(X[first])[inverse], m.predict(X))
+
+    from sklearn.linear_model import LinearRegression
+    linear = LinearRegression().fit(X_train, y)
+    with pytest.raises(UnsupportedModelError):
+        ThresholdCells([linear])
+    assert compress_rows(X, linear) is None
+
+
+def test_cells_method_requires_trees(monkeypatch):
+    from sklearn.linear_model import LinearRegression
+
+    from api import inference
+    from src.models.partial_dependence import CellsNotSupportedError
+
+    class Identity:
+        def transform(self, frame):
+            return frame
+
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(50, 8))
+    linear = LinearRegression().fit(X, X[:, 0])
+    monkeypatch.setattr(inference, "load_model_and_preprocessor", lambda: (linear, Identity()))
+    monkeypatch.setattr(inference, "get_interval_model", lambda: None)
+    monkeypatch.setattr(inference, "get_region_pool", lambda: None)
+
+    with pytest.raises(CellsNotSupportedError):
+        inference.predict_grid(X, "cells")
+    result, info = inference.predict_grid(X, "auto")
+    assert info == {"method": "brute", "evaluated_rows": 50}
+    assert np.allclose(result["predicted_price"], X[:, 0])
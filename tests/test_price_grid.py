@@ -0,0 +1,124 @@
+"""
+Grille de prix : interpolation bilineaire, cellules au bord de la grille,
+decoupage des tuiles et ecriture atomique.
+"""
+
+import numpy as np
+import pytest
+
+from src.models.grid import LAT_RANGE, LON_RANGE, META_FILENAME, PriceGrid, build_price_grid, ensure_price_grid
+
+
+def _surface(lat, lon):
+    # Bilineaire en (lat, lon) : l'interpolation doit etre exacte partout
+    return 1.0 + 0.5 * lat - 0.25 * lon + 0.1 * lat * lon
+
+
+def _grid(step=0.5, n_lat=5, n_lon=7):
+    lat = 34.0 + step * np.arange(n_lat)
+    lon = -120.0 + step * np.arange(n_lon)
+    values = np.stack([_surface(*np.meshgrid(lat, lon, indexing='ij')), np.zeros((n_lat, n_lon))])
+    return PriceGrid(values, ["a", "b"], 34.0, -120.0, step, "v1")
+
+
+def test_interpolation_is_exact_for_bilinear_surface():
+    grid = _grid()
+    rng = np.random.default_rng(0)
+    lat = rng.uniform(34.0, 36.0, 50)
+    lon = rng.uniform(-120.0, -117.0, 50)
+    assert np.allclose(grid.interpolate("a", lat, lon), _surface(lat, lon))
+    assert all(grid.interpolate("a", la, lo) == pytest.approx(_surface(la, lo)) for la, lo in zip(lat, lon))
+    # Noeuds de la grille, y compris derniere ligne et derniere colonne
+    assert grid.interpolate("a", 36.0, -117.0) == pytest.approx(_surface(36.0, -117.0))
+    assert grid.interpolate("a", np.array([34.0, 36.0]), np.array([-120.0, -117.0])) == pytest.approx(
+        _surface(np.array([34.0, 36.0]), np.array([-120.0, -117.0])))
+    assert grid.interpolate("b", 35.3, -118.2) == 0.0
+
+
+def test_points_outside_grid_are_clamped_to_edge():
+    grid = _grid()
+    assert grid.interpolate("a", 30.0, -130.0) == pytest.approx(_surface(34.0, -120.0))
+    assert grid.interpolate("a", 50.0, -100.0) == pytest.approx(_surface(36.0, -117.0))
+    assert grid.interpolate("a", 35.25, -100.0) == pytest.approx(_surface(35.25, -117.0))
+    assert np.allclose(grid.interpolate("a", np.array([30.0, 50.0]), np.array([-118.0, -118.0])),
+                       _surface(np.array([34.0, 36.0]), -118.0))
+    with pytest.raises(KeyError):
+        grid.interpolate("inconnu", 35.0, -118.0)
+
+
+def test_tile_slicing():
+    grid = _grid()
+    lat, lon, values = grid.tile("a", 34.5, 35.5, -119.5, -118.4)
+    assert lat.tolist() == [34.5, 35.0, 35.5]
+    assert lon.tolist() == [-119.5, -119.0, -118.5]
+    assert np.allclose(values, _surface(*np.meshgrid(lat, lon, indexing='ij')))
+    assert np.shares_memory(values, grid.values)
+
+    # Boite debordant de la grille : coupee aux bords
+    lat, lon, values = grid.tile("a", 0.0, 90.0, -180.0, -119.6)
+    assert lat.tolist() == grid.latitudes.tolist() and lon.tolist() == [-120.0]
+    assert values.shape == (5, 1)
+
+    # Boite entre deux cellules ou hors grille : tuile vide
+    for box in [(34.1, 34.4, -120.0, -117.0), (40.0, 41.0, -120.0, -117.0)]:
+        lat, lon, values = grid.tile("a", *box)
+        assert len(lat) == 0 and values.shape[0] == 0
+
+
+class _SumModel:
+    def __init__(self):
+        self.rows = 0
+
+    def predict(self, frame):
+        self.rows += len(frame)
+        return frame["MedInc"].to_numpy() + frame["Latitude"].to_numpy() - frame["Longitude"].to_numpy()
+
+
+class _Identity:
+    def transform(self, frame):
+        return frame
+
+
+PROFILES = {"low": {"MedInc": 1.0, "HouseAge": 30.0, "AveRooms": 5.0, "AveBedrms": 1.0,
+                    "Population": 1000.0, "AveOccup": 3.0},
+            "high": {"MedInc": 5.0, "HouseAge": 30.0, "AveRooms": 5.0, "AveBedrms": 1.0,
+                     "Population": 1000.0, "AveOccup": 3.0}}
+
+
+def test_build_is_atomic_and_versioned(tmp_path):
+    model = _SumModel()
+    grid = build_price_grid(model, _Identity(), tmp_path, "v1", step=1.0, profiles=PROFILES, chunk_rows=50)
+    assert grid.values.shape == (2, 11, 12)
+    assert grid.latitudes[[0, -1]].tolist() == list(LAT_RANGE)
+    assert grid.longitudes[[0, -1]].tolist() == list(LON_RANGE)
+    assert grid.interpolate("high", 37.0, -120.0) == pytest.approx(5.0 + 37.0 + 120.0)
+    assert sorted(p.name for p in tmp_path.iterdir()) == [META_FILENAME, "price_grid_v1.npy"]
+
+    # Meme version et configuration : pas de nouvelle evaluation
+    model.rows = 0
+    assert ensure_price_grid(model, _Identity(), tmp_path, "v1", step=1.0, profiles=PROFILES).model_version == "v1"
+    assert model.rows == 0
+
+    # Nouvelle version : l'ancien fichier disparait, la grille deja ouverte reste lisible
+    rebuilt = ensure_price_grid(model, _Identity(), tmp_path, "v2", step=1.0, profiles=PROFILES)
+    assert rebuilt.model_version == "v2" and model.rows == 2 * 11 * 12
+    assert sorted(p.name for p in tmp_path.iterdir()) == [META_FILENAME, "price_grid_v2.npy"]
+    assert grid.interpolate("low", 32.0, -125.0) == pytest.approx(1.0 + 32.0 + 125.0)
+    assert PriceGrid.load(tmp_path).model_version == "v2"
+    assert PriceGrid.load(tmp_path / "absent") is None
+
+
+def test_signature_changes_with_build_configuration(tmp_path):
+    from api.endpoints import _grid_cache_headers
+
+    model = _SumModel()
+    grid = build_price_grid(model, _Identity(), tmp_path, "v1", step=1.0, profiles=PROFILES)
+    assert PriceGrid.load(tmp_path).signature == grid.signature
+    etag = _grid_cache_headers(grid)["ETag"]
+
+    # Meme version du modele, autre pas ou autres profils : autre ETag
+    finer = ensure_price_grid(model, _Identity(), tmp_path, "v1", step=0.5, profiles=PROFILES)
+    assert finer.model_version == "v1" and _grid_cache_headers(finer)["ETag"] != etag
+    fewer = ensure_price_grid(model, _Identity(), tmp_path, "v1", step=1.0, profiles={"low": PROFILES["low"]})
+    assert _grid_cache_headers(fewer)["ETag"] not in (etag, _grid_cache_headers(finer)["ETag"])
+    assert _grid_cache_headers(fewer, "low", 35.0, -118.0)["ETag"] != _grid_cache_headers(fewer)["ETag"]
@@ -0,0 +1,90 @@
+"""
+Profileur par echantillonnage : piles folded, bornes et desactivation.
+"""
+
+import time
+
+from api import profiling
+from api.profiling import SamplingProfiler
+
+
+def _busy_leaf(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def _busy_parent(seconds):
+    _busy_leaf(seconds)
+
+
+def test_samples_are_folded_from_request_tag():
+    profiler = SamplingProfiler(interval=0.001)
+    profiler.call("POST /predict", _busy_parent, 0.1)
+    lines = profiler.folded().splitlines()
+    assert profiler.requests == 1 and profiler.samples > 10
+    stack, count = lines[0].rsplit(" ", 1)
+    frames = stack.split(";")
+    # Racine : la requete ; pas de frames du pool ni du profileur
+    assert frames[:3] == ["POST /predict", f"{__name__}:_busy_parent", f"{__name__}:_busy_leaf"]
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in lines) == profiler.samples
+
+    profiler.reset()
+    assert profiler.folded() == "" and profiler.samples == 0
+
+
+def test_distinct_stacks_are_bounded():
+    profiler = SamplingProfiler(interval=0.001, max_stacks=1)
+    profiler.call("a", _busy_parent, 0.03)
+    profiler.call("b", _busy_parent, 0.03)
+    assert len(profiler.stacks) == 1 and profiler.dropped_samples > 0
+
+
+def test_disabled_profiling_is_a_passthrough(monkeypatch):
+    monkeypatch.setattr(profiling, "_profiler", None)
+    assert profiling.request_tag() is None
+    assert profiling.profiled_call("POST /predict", sum, [1, 2]) == 3
+
+
+def test_frame_name_without_co_qualname():
+    class Code:
+        co_name = "predict"
+
+    class Frame:
+        f_code = Code()
+        f_globals = {"__name__": "sklearn.ensemble"}
+
+    # Python < 3.11 : pas de co_qualname
+    assert profiling._frame_name(Frame()) == "sklearn.ensemble:predict"
+
+
+def test_profile_header_requires_token():
+    def wanted(header, token):
+        middleware = profiling.ProfilingMiddleware(None, sample_rate=0.0, token=token)
+        return middleware._wanted({"headers": [(b"x-profile", header)]})
+
+    assert wanted(b"secret", "secret")
+    assert not wanted(b"1", "secret")
+    assert not wanted(b"1", None)
+
+
+def test_profiling_is_not_installed_without_token(monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    # setup_profiling() remplace le profileur global : restaure a la fin du test
+    monkeypatch.setattr(profiling, "_profiler", None)
+    monkeypatch.setattr(profiling, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(profiling, "PROFILING_TOKEN", None)
+    app = FastAPI()
+    profiling.setup_profiling(app)
+    assert profiling.get_profiler() is None
+    assert TestClient(app).get("/admin/profile").status_code == 404
+
+    monkeypatch.setattr(profiling, "PROFILING_TOKEN", "secret")
+    app = FastAPI()
+    profiling.setup_profiling(app)
+    client = TestClient(app)
+    assert client.get("/admin/profile").status_code == 403
+    assert client.get("/admin/profile", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    assert client.get("/admin/profile", headers={"X-Admin-Token": "secret"}).status_code == 200
@@ -0,0 +1,164 @@
+"""
+Cache des requetes analytiques : appels MongoDB comptes sur mongomock.
+
+mongomock ne connait pas $round : get_top_expensive_zones() n'est pas
+execute ici, son enveloppe est la meme que celle des trois autres.
+"""
+
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from src.database import queries
+from src.database.cache import QueryCache
+
+pytest.importorskip("mongomock")
+
+
+class CountingCollection:
+    """Collection mongomock qui compte (et peut ralentir) les requetes envoyees."""
+
+    def __init__(self, collection, delay=0.0):
+        self._collection = collection
+        self.delay = delay
+        self.calls = 0
+
+    def __getattr__(self, name):
+        attribute = getattr(self._collection, name)
+        if name not in ("find", "aggregate", "count_documents"):
+            return attribute
+
+        def counted(*args, **kwargs):
+            self.calls += 1
+            time.sleep(self.delay)
+            return attribute(*args, **kwargs)
+        return counted
+
+
+@pytest.fixture
+def collection():
+    import mongomock
+
+    rng = np.random.default_rng(0)
+    docs = [
+        {
+            "MedInc": float(rng.uniform(1, 10)), "MedHouseVal": float(rng.uniform(0.5, 5.5)),
+            "AveRooms": 5.0, "Latitude": float(rng.uniform(33, 35)), "Longitude": -118.0,
+            "price_category": str(rng.choice(["low", "medium", "high"]))
+        }
+        for _ in range(500)
+    ]
+    raw = mongomock.MongoClient().db.properties
+    raw.insert_many(docs)
+    return CountingCollection(raw)
+
+
+def _cached(cache):
+    return {
+        name: cache.wrap(getattr(queries, name))
+        for name in ("find_expensive_properties", "get_properties_by_price_category",
+                     "get_average_price_by_category")
+    }
+
+
+def test_repeated_questions_hit_mongodb_once(collection):
+    cache = QueryCache(ttl=60)
+    q = _cached(cache)
+    for _ in range(5):
+        expensive = q["find_expensive_properties"](collection, 5)
+        q["find_expensive_properties"](collection, price_threshold=5.0, limit=10)    # meme cle normalisee
+        assert q["get_properties_by_price_category"](collection, "high") == \
+            queries.get_properties_by_price_category(collection._collection, "high")
+        q["get_average_price_by_category"](collection)
+    assert collection.calls == 3
+    assert expensive == queries.find_expensive_properties(collection._collection, 5)
+
+    # Les appelants recoivent une copie
+    expensive.clear()
+    assert len(q["find_expensive_properties"](collection, 5)) == 10
+    q["find_expensive_properties"](collection, 4.5)
+    assert collection.calls == 4
+
+    stats = cache.stats()
+    assert (stats["misses"], stats["hits"]) == (4, 18)
+    assert stats["hit_rate"] == pytest.approx(18 / 22)
+
+
+def test_ttl_and_lru_bounds(collection):
+    now = [0.0]
+    cache = QueryCache(ttl=10, max_entries=2, clock=lambda: now[0])
+    count = cache.wrap(queries.get_properties_by_price_category)
+
+    count(collection, "low")
+    now[0] = 9.0
+    count(collection, "low")
+    assert collection.calls == 1
+    now[0] = 10.5
+    count(collection, "low")
+    assert collection.calls == 2 and cache.stats()["expirations"] == 1
+
+    count(collection, "medium")
+    count(collection, "low")             # 'low' redevient le plus recent
+    count(collection, "high")            # evince 'medium'
+    assert collection.calls == 4 and cache.stats()["evictions"] == 1
+    count(collection, "low")
+    assert collection.calls == 4
+    count(collection, "medium")
+    assert collection.calls == 5
+
+
+def test_concurrent_misses_are_coalesced(collection):
+    collection.delay = 0.2
+    cache = QueryCache(ttl=60)
+    averages = cache.wrap(queries.get_average_price_by_category)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(averages(collection))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert collection.calls == 1
+    assert len(results) == 8 and all(result == results[0] for result in results)
+    assert cache.stats()["coalesced"] == 7
+
+
+def test_errors_are_shared_but_not_cached(collection):
+    cache = QueryCache(ttl=60)
+    calls = []
+
+    def failing():
+        calls.append(1)
+        raise RuntimeError("serveur indisponible")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_load(("db.properties", "f", ()), failing)
+    assert cache.get_or_load(("db.properties", "f", ()), lambda: 42) == 42
+    assert len(calls) == 1 and cache.stats()["errors"] == 1
+
+
+def test_writers_invalidate(collection):
+    cache = QueryCache(ttl=60)
+    q = _cached(cache)
+    before = q["get_properties_by_price_category"](collection, "high")
+    q["get_average_price_by_category"](collection)
+
+    collection.insert_one({"MedHouseVal": 5.0, "MedInc": 8.0, "AveRooms": 6.0, "price_category": "high"})
+    assert q["get_properties_by_price_category"](collection, "high") == before    # encore en cache
+    assert cache.invalidate(collection, function="get_properties_by_price_category") == 1
+    assert q["get_properties_by_price_category"](collection, "high") == before + 1
+    assert cache.invalidate(collection) == 2
+    assert cache.invalidate("other.properties") == 0
+
+    # Invalidation pendant la requete : le resultat (peut-etre perime) n'est pas stocke
+    collection.delay = 0.2
+    thread = threading.Thread(target=q["get_average_price_by_category"], args=(collection,))
+    thread.start()
+    time.sleep(0.05)
+    cache.invalidate(collection)
+    thread.join()
+    calls = collection.calls
+    q["get_average_price_by_category"](collection)
+    assert collection.calls == calls + 1
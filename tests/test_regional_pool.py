@@ -0,0 +1,131 @@
+"""
+Routage par region : cles de zone, regroupement des lignes, pool LRU et
+reassemblage des predictions d'un batch.
+"""
+
+import json
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.models.regional import (
+    INDEX_FILENAME, RegionalModelPool, group_rows, predict_by_region, zone_keys, zone_name
+)
+
+
+def test_zone_keys_match_mongodb_round():
+    # $round de MongoDB et np.round : arrondi au pair le plus proche
+    keys = zone_keys([37.5, 38.5, 37.49, 32.0], [-122.5, -121.5, -122.51, -114.0])
+    assert [zone_name(k) for k in keys] == ["38_-122", "38_-122", "37_-123", "32_-114"]
+
+
+def test_group_rows_covers_every_row_once():
+    keys = np.array([5, 3, 5, 1, 3, 5])
+    groups = group_rows(keys)
+    assert [key for key, _ in groups] == [1, 3, 5]
+    assert [rows.tolist() for _, rows in groups] == [[3], [1, 4], [0, 2, 5]]
+
+
+def _pool(tmp_path, n_regions, loader, **kwargs):
+    regions = []
+    for i in range(n_regions):
+        key = int(zone_keys([33 + i], [-118])[0])
+        filename = f"region_{zone_name(key)}.joblib"
+        (tmp_path / filename).write_bytes(b"x" * 100)
+        regions.append({"key": key, "zone": zone_name(key), "file": filename})
+    (tmp_path / INDEX_FILENAME).write_text(json.dumps({"regions": regions}))
+    return RegionalModelPool(tmp_path, loader=loader, **kwargs), [r["key"] for r in regions]
+
+
+def test_pool_is_lru_bounded(tmp_path):
+    evicted = []
+    pool, keys = _pool(tmp_path, 4, loader=lambda path: {"model": path.name},
+                       max_models=2, on_evict=evicted.append)
+    assert pool.get(999_999) is None
+    pool.get(keys[0])
+    pool.get(keys[1])
+    pool.get(keys[0])          # keys[0] redevient le plus recent
+    pool.get(keys[2])          # evince keys[1]
+    assert pool.loaded == [keys[0], keys[2]]
+    assert evicted == [zone_name(keys[1])]
+    assert (pool.hits, pool.misses) == (1, 3)
+
+    by_size, keys = _pool(tmp_path, 4, loader=lambda path: {}, max_models=10, max_bytes=250)
+    for key in keys:
+        by_size.get(key)
+    assert by_size.loaded == keys[2:]
+
+
+def test_pool_loads_each_region_once_under_concurrency(tmp_path):
+    calls = []
+
+    def slow_loader(path):
+        calls.append(path.name)
+        time.sleep(0.05)
+        return {"model": path.name}
+
+    pool, keys = _pool(tmp_path, 1, loader=slow_loader)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(pool.get(keys[0]))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+
+
+class _OffsetModel:
+    """Prix = identifiant de ligne (colonne 0) + decalage propre au modele."""
+
+    def __init__(self, offset):
+        self.offset = offset
+
+    def predict(self, X):
+        return np.asarray(X)[:, 0] + self.offset
+
+
+class _Heads(_OffsetModel):
+    def predict(self, X):
+        price = super().predict(X)
+        return price - 0.5, price + 0.5
+
+
+@pytest.mark.parametrize("regional_heads", [True, False])
+def test_predict_by_region_reassembles_rows(tmp_path, regional_heads):
+    offsets = {"33_-118": 1000.0, "34_-118": 2000.0}
+    artifacts = {
+        f"region_{zone}.joblib": {"model": _OffsetModel(offset),
+                                  "interval_model": _Heads(offset) if regional_heads or zone == "33_-118" else None}
+        for zone, offset in offsets.items()
+    }
+    pool, _ = _pool(tmp_path, 2, loader=lambda path: artifacts[path.name])
+
+    # Zones melangees : deux regionales (33, 34) et une servie par le global (40)
+    rng = np.random.default_rng(0)
+    latitude = rng.choice([33.0, 34.0, 40.0], size=60)
+    longitude = np.full(60, -118.0)
+    processed = pd.DataFrame({"row": np.arange(60.0), "other": rng.normal(size=60)})
+
+    result = predict_by_region(processed, latitude, longitude, pool, _OffsetModel(0.0), _Heads(0.0))
+    expected = np.arange(60.0) + np.select([latitude == 33.0, latitude == 34.0], [1000.0, 2000.0], 0.0)
+    assert np.array_equal(result["predicted_price"], expected)
+    assert result["regions"] == {zone: int((latitude == float(zone[:2])).sum()) for zone in offsets}
+
+    if regional_heads:
+        assert np.array_equal(result["lower_bound"], expected - 0.5)
+        assert np.array_equal(result["upper_bound"], expected + 0.5)
+    else:
+        # Une region sans intervalle : aucune borne pour tout le batch
+        assert result["lower_bound"] is None and result["upper_bound"] is None
+
+
+def test_predict_by_region_without_fallback_rows(tmp_path):
+    pool, _ = _pool(tmp_path, 2, loader=lambda path: {"model": _OffsetModel(1000.0)})
+    processed = pd.DataFrame({"row": np.arange(4.0)})
+    result = predict_by_region(processed, [34.0, 33.0, 34.0, 33.0], [-118.0] * 4, pool, _OffsetModel(0.0))
+    assert result["predicted_price"].tolist() == [1000.0, 1001.0, 1002.0, 1003.0]
+    assert result["lower_bound"] is None
@@ -0,0 +1,150 @@
+"""
+Re-scoring : re-score complet reprenable, scrutation de updated_at, changement de modele.
+
+Tests sur mongomock avec un faux modele (somme des features) : pas de
+modele entraine ni de mongod.
+"""
+
+import json
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from pymongo import UpdateOne
+
+from src.data.load_data import get_feature_names
+from src.database.rescore import PRICE_FIELD, UPDATED_AT_FIELD, VERSION_FIELD, Rescorer, Scorer
+
+mongomock = pytest.importorskip("mongomock")
+
+
+def _bulk_write_supported() -> bool:
+    # Certaines combinaisons mongomock / pymongo recentes cassent bulk_write (argument 'sort')
+    try:
+        mongomock.MongoClient().db.probe.bulk_write([UpdateOne({}, {"$set": {"a": 1}})])
+        return True
+    except TypeError:
+        return False
+
+
+pytestmark = pytest.mark.skipif(not _bulk_write_supported(), reason="bulk_write non supporte par ce mongomock")
+
+# mongomock n'est pas thread-safe : plusieurs plages, traitees une a une
+WORKERS = 1
+
+FEATURES = get_feature_names()
+T0 = datetime(2026, 1, 1)
+
+
+class SumModel:
+    """Faux modele : prix = somme des features (+ decalage selon la version)."""
+
+    def __init__(self, offset=0.0, fail_after=None):
+        self.offset = offset
+        self.fail_after = fail_after
+        self.rows = 0
+
+    def predict(self, X):
+        if self.fail_after is not None and self.rows >= self.fail_after:
+            raise RuntimeError("arret simule")
+        self.rows += len(X)
+        return X.to_numpy().sum(axis=1) + self.offset
+
+
+class Identity:
+    def transform(self, frame):
+        return frame
+
+
+def _scorer(version, **kwargs):
+    return Scorer(SumModel(**kwargs), Identity(), version)
+
+
+@pytest.fixture
+def db():
+    database = mongomock.MongoClient().db
+    rng = np.random.default_rng(0)
+    database.properties.insert_many([
+        {**dict(zip(FEATURES, row)), UPDATED_AT_FIELD: T0} for row in rng.uniform(1, 2, size=(300, 8)).tolist()
+    ])
+    database.properties.insert_one({"MedInc": 1.0, UPDATED_AT_FIELD: T0})   # features manquantes
+    return database
+
+
+def _rescorer(db, scorer, tmp_path, **kwargs):
+    return Rescorer(db.properties, db.rescore_state, load_scorer=lambda: scorer, model_dir=tmp_path,
+                    batch_size=40, partitions=3, workers=WORKERS, **kwargs)
+
+
+def _check_prices(db, version, offset=0.0):
+    for document in db.properties.find({"HouseAge": {"$exists": True}}):
+        assert document[VERSION_FIELD] == version
+        assert document[PRICE_FIELD] == pytest.approx(sum(document[f] for f in FEATURES) + offset)
+
+
+def test_full_rescore_resumes_after_interruption(db, tmp_path):
+    failing = _scorer("v1", fail_after=120)
+    with pytest.raises(RuntimeError):
+        _rescorer(db, failing, tmp_path).full_rescore()
+    already = db.properties.count_documents({VERSION_FIELD: "v1"})
+    assert 0 < already < 300
+
+    resumed = _scorer("v1")
+    summary = _rescorer(db, resumed, tmp_path).full_rescore()
+    # Reprise : seules les pages non terminees sont re-predites
+    assert summary["scored"] == resumed.model.rows == 300 - already
+    assert summary["invalid"] == 1
+    _check_prices(db, "v1")
+    assert _rescorer(db, resumed, tmp_path).full_rescore()["scored"] == 0
+
+
+def test_poll_rescores_only_changed_documents(db, tmp_path):
+    rescorer = _rescorer(db, _scorer("v1"), tmp_path)
+    rescorer.full_rescore()
+    # Le re-score complet a deja couvert les documents existants
+    assert rescorer.poll_once() == {"scored": 0, "invalid": 0}
+
+    target = db.properties.find_one({"HouseAge": {"$exists": True}})
+    db.properties.update_one({"_id": target["_id"]},
+                             {"$set": {"MedInc": 10.0, UPDATED_AT_FIELD: T0 + timedelta(minutes=1)}})
+    rescorer.scorer.model.rows = 0
+    assert rescorer.poll_once() == {"scored": 1, "invalid": 0}
+    assert rescorer.scorer.model.rows == 1
+    assert rescorer.poll_once() == {"scored": 0, "invalid": 0}   # nos ecritures ne redeclenchent rien
+    _check_prices(db, "v1")
+
+
+def test_stale_write_is_skipped(db, tmp_path):
+    rescorer = _rescorer(db, _scorer("v1"), tmp_path)
+    document = db.properties.find_one({"HouseAge": {"$exists": True}})
+    db.properties.update_one({"_id": document["_id"]}, {"$set": {UPDATED_AT_FIELD: T0 + timedelta(hours=1)}})
+    rescorer.rescore_documents([document])
+    assert PRICE_FIELD not in db.properties.find_one({"_id": document["_id"]})
+
+
+def test_non_numeric_feature_is_counted_invalid(db, tmp_path):
+    rescorer = _rescorer(db, _scorer("v1"), tmp_path)
+    document = db.properties.find_one({"HouseAge": {"$exists": True}})
+    db.properties.update_one({"_id": document["_id"]},
+                             {"$set": {"MedInc": "n/a", UPDATED_AT_FIELD: T0 + timedelta(minutes=1)}})
+    db.properties.update_one({"_id": {"$ne": document["_id"]}, "HouseAge": {"$exists": True}},
+                             {"$set": {UPDATED_AT_FIELD: T0 + timedelta(minutes=2)}})
+    rescorer._save_state({"poll_position": {"updated_at": T0, "_id": max(d["_id"] for d in db.properties.find())}})
+
+    assert rescorer.poll_once() == {"scored": 1, "invalid": 1}
+    assert rescorer.poll_once() == {"scored": 0, "invalid": 0}
+    assert PRICE_FIELD not in db.properties.find_one({"_id": document["_id"]})
+
+
+def test_model_change_triggers_full_rescore(db, tmp_path):
+    metadata = tmp_path / "model_metadata.json"
+    metadata.write_text(json.dumps({"training_date": "v1"}))
+    scorers = iter([_scorer("v1"), _scorer("v2", offset=1.0)])
+    rescorer = Rescorer(db.properties, db.rescore_state, load_scorer=lambda: next(scorers),
+                        model_dir=tmp_path, batch_size=50, partitions=2, workers=WORKERS)
+    assert rescorer.sync_model()["scored"] == 300
+    assert rescorer.sync_model() is None
+
+    metadata.write_text(json.dumps({"training_date": "v2"}))
+    assert rescorer.sync_model()["model_version"] == "v2"
+    _check_prices(db, "v2", offset=1.0)
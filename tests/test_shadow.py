@@ -0,0 +1,134 @@
+"""
+Evaluation shadow : tirage et file bornee, lignes ignorees, agregats des
+ecarts et isolation des timers d'etapes de la production.
+"""
+
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from api import shadow
+from api.inference import matrix_to_frame, predict_frame
+from src.utils.timing import set_stage_sink
+
+
+class _Identity:
+    def transform(self, frame):
+        return frame.to_numpy()
+
+
+class _ShiftedModel:
+    """Candidat : premiere colonne + 0.1."""
+
+    def predict(self, X):
+        return X[:, 0] + 0.1
+
+
+def _artifacts(model_dir, label="Modele"):
+    return {
+        "model": _ShiftedModel(), "preprocessor": _Identity(), "interval_model": None,
+        "fast_model": None, "version": "candidate", "model_file": "best_model_candidate.joblib"
+    }
+
+
+@pytest.fixture
+def make_evaluator(monkeypatch):
+    monkeypatch.setattr(shadow, "get_model_version", lambda: "production")
+    evaluators = []
+
+    def make(**kwargs):
+        evaluator = shadow.ShadowEvaluator("unused", **kwargs)
+        evaluators.append(evaluator)
+        return evaluator
+
+    yield make
+    for evaluator in evaluators:
+        evaluator.shutdown()
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "delai depasse"
+        time.sleep(0.01)
+
+
+def test_sampling_and_queue_bound(make_evaluator, monkeypatch):
+    # Candidat en cours de chargement : rien ne vide la file
+    loaded = threading.Event()
+
+    def slow_load(model_dir, label="Modele"):
+        loaded.wait()
+        return _artifacts(model_dir, label)
+
+    monkeypatch.setattr(shadow, "load_artifacts", slow_load)
+    X = np.ones((6, 8))
+    try:
+        none = make_evaluator(sample_rate=0.0)
+        none.offer(X, X[:, 0], 0.001)
+        assert none._pending_rows == 0 and none.stats.production_rows == 6
+
+        bounded = make_evaluator(sample_rate=1.0, max_pending_rows=10, batch_rows=100)
+        bounded.offer(X, X[:, 0], 0.001)
+        bounded.offer(X, X[:, 0], 0.001)
+        bounded.offer(X[:1], X[:1, 0], 0.001)
+        report = bounded.report()
+        assert report["status"] == "loading" and report["pending_rows"] == 7
+        assert report["dropped_rows"] == 6
+        assert report["latency"]["production"]["calls"] == 3
+
+        np.random.seed(0)
+        sampled = make_evaluator(sample_rate=0.25, max_pending_rows=100_000, batch_rows=100_000)
+        sampled.offer(np.ones((4000, 8)), np.ones(4000), 0.001)
+        assert 800 < sampled._pending_rows < 1200
+    finally:
+        loaded.set()
+
+
+def test_delta_stats_and_production_stage_metrics(make_evaluator, monkeypatch):
+    monkeypatch.setattr(shadow, "load_artifacts", _artifacts)
+    recorded = []
+    set_stage_sink(lambda name, seconds: recorded.append((name, threading.current_thread().name)))
+    try:
+        evaluator = make_evaluator(sample_rate=1.0, batch_rows=8, flush_seconds=0.05)
+        X = np.zeros((8, 8))
+        X[:, 0] = [2.0] * 6 + [0.5] * 2
+        # Production = premiere colonne : ecart constant de 0.1 avec le candidat
+        evaluator.offer(X, X[:, 0].copy(), 0.002)
+        _wait_for(lambda: evaluator.stats.compared_rows == 8)
+
+        # Le candidat n'alimente aucun timer ; la production, si
+        predict_frame(matrix_to_frame(X), _ShiftedModel(), _Identity())
+    finally:
+        set_stage_sink(None)
+
+    assert recorded
+    assert all(thread != "shadow-evaluator" for _, thread in recorded)
+
+    report = evaluator.report()
+    assert report["status"] == "running" and report["candidate_version"] == "candidate"
+    delta = report["delta"]
+    assert delta["mean"] == pytest.approx(0.1)
+    assert delta["mae"] == pytest.approx(0.1)
+    assert delta["rmse"] == pytest.approx(0.1)
+    assert delta["max_abs"] == pytest.approx(0.1)
+    assert delta["mean_relative"] == pytest.approx((6 * 0.05 + 2 * 0.2) / 8)
+    assert delta["divergent_fraction"] == pytest.approx(2 / 8)
+    assert report["latency"]["shadow"]["batches"] == 1
+    assert report["errors"] == 0
+
+
+def test_failed_candidate_stops_sampling(make_evaluator, monkeypatch):
+    monkeypatch.setattr(shadow, "load_artifacts", lambda *a, **k: 1 / 0)
+    evaluator = make_evaluator(sample_rate=1.0, max_pending_rows=10, batch_rows=100)
+    _wait_for(lambda: evaluator.status == "failed")
+    X = np.ones((6, 8))
+    for _ in range(5):
+        evaluator.offer(X, X[:, 0], 0.001)
+
+    report = evaluator.report()
+    assert report["status"] == "failed"
+    assert report["pending_rows"] == 0 and report["dropped_rows"] == 0
+    assert report["errors"] == 1 and report["last_error"].startswith("Chargement du candidat")
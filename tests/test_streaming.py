@@ -0,0 +1,117 @@
+"""
+Canal WebSocket /ws/predict : regroupement, erreurs par message et contre-pression.
+
+La session est testee avec une fausse WebSocket et une fausse prediction :
+ni modele ni serveur.
+"""
+
+import asyncio
+import json
+
+import numpy as np
+
+from api.streaming import StreamSession
+
+HOUSE = {"MedInc": 8.3, "HouseAge": 41, "AveRooms": 6.9, "AveBedrms": 1.0,
+         "Population": 322, "AveOccup": 2.5, "Latitude": 37.88, "Longitude": -122.23}
+
+
+class FakeWebSocket:
+    def __init__(self, messages):
+        self.incoming = asyncio.Queue()
+        for message in messages:
+            self.incoming.put_nowait({"type": "websocket.receive", "text": json.dumps(message)})
+        self.received = 0
+        self.sent = []
+
+    async def receive(self):
+        message = await self.incoming.get()
+        self.received += 1
+        return message
+
+    async def send(self, message):
+        self.sent.append(json.loads(message["text"]))
+
+    def close(self):
+        self.incoming.put_nowait({"type": "websocket.disconnect"})
+
+
+def _fake_predict(calls, delay=0.0):
+    async def predict(X):
+        calls.append(len(X))
+        await asyncio.sleep(delay)
+        prices = X[:, 0].copy()
+        return {"predicted_price": prices, "lower_bound": None, "upper_bound": None, "confidence": None}
+    return predict
+
+
+async def _wait_for(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.001)
+
+
+def test_messages_are_coalesced_and_answered_by_id():
+    async def scenario():
+        messages = [{"id": f"r{i}", "features": {**HOUSE, "MedInc": float(i + 1)}} for i in range(20)]
+        messages.append({"id": "bad", "features": {**HOUSE, "MedInc": -1}})
+        websocket, calls = FakeWebSocket(messages), []
+        session = StreamSession(websocket, _fake_predict(calls), window=0.005, max_batch=8)
+        task = asyncio.create_task(session.run())
+        await _wait_for(lambda: len(websocket.sent) == 21)
+        websocket.close()
+        await task
+        return websocket.sent, calls
+
+    sent, calls = asyncio.run(scenario())
+    replies = {reply["id"]: reply for reply in sent}
+    assert replies["bad"]["error"] == "validation"
+    assert all(replies[f"r{i}"]["predicted_price"] == i + 1 for i in range(20))
+    # Moins d'appels au modele que de messages, batchs bornes par max_batch
+    assert sum(calls) == 20 and len(calls) < 20 and max(calls) <= 8
+
+
+def test_reading_stops_at_max_pending():
+    async def scenario():
+        messages = [{"id": i, "features": HOUSE} for i in range(10)]
+        websocket, calls = FakeWebSocket(messages), []
+        gate = asyncio.Event()
+
+        async def blocked_predict(X):
+            calls.append(len(X))
+            await gate.wait()
+            return {"predicted_price": np.ones(len(X)), "lower_bound": None,
+                    "upper_bound": None, "confidence": None}
+
+        session = StreamSession(websocket, blocked_predict, window=0.001, max_pending=3)
+        task = asyncio.create_task(session.run())
+        await asyncio.sleep(0.05)
+        received_while_blocked = websocket.received
+        gate.set()
+        await _wait_for(lambda: len(websocket.sent) == 10)
+        websocket.close()
+        await task
+        return received_while_blocked, websocket.sent
+
+    received_while_blocked, sent = asyncio.run(scenario())
+    assert received_while_blocked == 3
+    assert sorted(reply["id"] for reply in sent) == list(range(10))
+
+
+def test_every_row_is_observed_before_deduplication():
+    async def scenario():
+        messages = [{"id": i, "features": HOUSE} for i in range(6)]
+        websocket, calls, observed = FakeWebSocket(messages), [], []
+        session = StreamSession(websocket, _fake_predict(calls), observe=lambda X: observed.append(len(X)),
+                                window=0.005)
+        task = asyncio.create_task(session.run())
+        await _wait_for(lambda: len(websocket.sent) == 6)
+        websocket.close()
+        await task
+        return calls, observed
+
+    calls, observed = asyncio.run(scenario())
+    # Lignes identiques : une seule predite par batch, mais toutes observees
+    assert sum(observed) == 6
+    assert sum(calls) == len(observed)